@@ -0,0 +1,147 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from pose_batch import ANGLE_JOINTS, batch_joint_angles
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Joint angles are quantized into bins of this many degrees
+ADVICE_CACHE_TOLERANCE = float(os.getenv("ADVICE_CACHE_TOLERANCE", "15"))
+ADVICE_CACHE_SIZE = int(os.getenv("ADVICE_CACHE_SIZE", "1024"))
+# Entries older than this are treated as misses (0 disables expiry)
+ADVICE_CACHE_TTL = float(os.getenv("ADVICE_CACHE_TTL", str(7 * 24 * 3600)))
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def pose_angles(landmarks) -> np.ndarray:
+    """
+    Joint angle vector (ANGLE_JOINTS order) from a dict of angles as returned
+    by calculate_joint_angles, a (33, 4) landmark array or a MediaPipe
+    landmark list
+    """
+    if isinstance(landmarks, dict):
+        return np.array([landmarks[joint] for joint in ANGLE_JOINTS], dtype=np.float64)
+    if hasattr(landmarks, "landmark"):
+        landmarks = np.array([[lm.x, lm.y, lm.z] for lm in landmarks.landmark], dtype=np.float64)
+    return batch_joint_angles(np.asarray(landmarks)[None])[0]
+
+class PoseAdviceCache:
+    """
+    LRU cache of pose advice for equivalent poses: poses whose joint angles
+    all differ by at most `tolerance` degrees share one Gemini response.
+
+    Lookups first try the quantized-angle key (exact dict hit), then fall
+    back to a nearest-neighbour scan so poses straddling a bin edge still match.
+    """
+
+    def __init__(self, tolerance: float = ADVICE_CACHE_TOLERANCE, max_entries: int = ADVICE_CACHE_SIZE,
+                 ttl_seconds: float = ADVICE_CACHE_TTL):
+        self.tolerance = tolerance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (stored_at, angles, advice)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, landmarks) -> Tuple[int, ...]:
+        """
+        Quantize the pose's joint angles into a hashable key.
+        Undetectable angles (NaN) get their own bin.
+        """
+        return self._quantize(pose_angles(landmarks))
+
+    def _quantize(self, angles: np.ndarray) -> Tuple[int, ...]:
+        bins = np.where(np.isnan(angles), -1, np.floor(np.nan_to_num(angles) / self.tolerance))
+        return tuple(int(b) for b in bins)
+
+    def _expired(self, entry) -> bool:
+        return bool(self.ttl_seconds) and time.time() - entry[0] > self.ttl_seconds
+
+    def _nearest(self, angles: np.ndarray):
+        """
+        Key of the closest stored pose within tolerance (max abs angle difference)
+        """
+        if not self._entries:
+            return None
+        keys = list(self._entries.keys())
+        stored = np.stack([entry[1] for entry in self._entries.values()])
+        both_nan = np.isnan(stored) & np.isnan(angles)
+        diff = np.where(both_nan, 0.0, np.abs(stored - angles))
+        distance = np.nan_to_num(diff, nan=np.inf).max(axis=1)
+        best = int(np.argmin(distance))
+        return keys[best] if distance[best] <= self.tolerance else None
+
+    def get(self, landmarks) -> Optional[Dict]:
+        """
+        Return stored advice for an equivalent pose, or None
+        """
+        angles = pose_angles(landmarks)
+        key = self._quantize(angles)
+        with self._lock:
+            near = False
+            if key not in self._entries:
+                key = self._nearest(angles)
+                near = True
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None and self._expired(entry):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.near_hits += int(near)
+            return entry[2]
+
+    def put(self, landmarks, advice: Dict):
+        """
+        Store advice for this pose, evicting the least recently used entries
+        """
+        angles = pose_angles(landmarks)
+        key = self._quantize(angles)
+        with self._lock:
+            self._entries[key] = (time.time(), angles, advice)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def report(self) -> Dict[str, float]:
+        """
+        Hit-rate report
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "tolerance_degrees": self.tolerance,
+            }
+
+def get_default_cache() -> PoseAdviceCache:
+    """
+    Return the process-wide advice cache (shared by all sessions)
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PoseAdviceCache()
+        return _default_cache
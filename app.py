@@ -1,15 +1,37 @@
 import streamlit as st
-from PIL import Image
 import io
-import base64
-from pose_extractor import extract_pose
-from image_generator import generate_image_with_style
-from pose_analysis import analyze_pose_for_improvements
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Heavy modules (MediaPipe, OpenCV, requests) are imported lazily through these
+# accessors so the first render does not wait for them.
+def get_pose_extractor():
+    import pose_extractor
+    return pose_extractor
+
+def get_pipeline():
+    import pipeline
+    return pipeline
+
+def get_image_generator():
+    import image_generator
+    return image_generator
+
+def get_pose_analysis():
+    import pose_analysis
+    return pose_analysis
+
+def get_multi_person():
+    import multi_person
+    return multi_person
+
+def get_image_budget():
+    import image_budget
+    return image_budget
+
 st.set_page_config(
     page_title="AI Style Transfer with Pose Matching",
     layout="wide",
@@ -86,17 +108,19 @@ with left_col:
     st.text("ポーズ参照画像")
     pose_file = st.file_uploader("再現したいポーズの画像", type=['png', 'jpg', 'jpeg'], key="pose_upload")
     if pose_file:
-        pose_image = Image.open(pose_file)
+        # Bounded working copy: large uploads are never fully decoded (JPEG draft mode)
+        pose_image, pose_original_size = get_pipeline().open_pose_upload(pose_file)
         st.markdown('<div class="preview-image">', unsafe_allow_html=True)
-        st.image(pose_image, width=80)
+        st.image(get_image_budget().working_copy(pose_image, get_image_budget().PREVIEW_MAX_SIDE), width=80)
         st.markdown('</div>', unsafe_allow_html=True)
+    multi_person_mode = st.checkbox("複数人モード", key="multi_person_mode")
 
     st.text("スタイル参照画像")
     style_file = st.file_uploader("目標とする画風や洋服の画像", type=['png', 'jpg', 'jpeg'], key="style_upload")
     if style_file:
-        style_image = Image.open(style_file)
+        style_image = get_pipeline().open_style_upload(style_file)
         st.markdown('<div class="preview-image">', unsafe_allow_html=True)
-        st.image(style_image, width=80)
+        st.image(get_image_budget().working_copy(style_image, get_image_budget().PREVIEW_MAX_SIDE), width=80)
         st.markdown('</div>', unsafe_allow_html=True)
 
 with right_col:
@@ -104,18 +128,53 @@ with right_col:
         try:
             result_image = None
             with st.status("🔍 ポーズを解析中...", expanded=False) as status:
-                pose_result, pose_descriptions, landmarks = extract_pose(pose_image)
+                if multi_person_mode:
+                    pose_result, people, person_boxes = get_multi_person().extract_poses_multi(pose_image)
+                    pose_descriptions = None
+                else:
+                    pose_result, pose_descriptions, landmarks = get_pipeline().extract_single_pose(
+                        pose_file, pose_image, pose_original_size)
                 if pose_result is None:
                     st.error("ポーズの検出に失敗しました。")
                     st.stop()
                 status.update(label="✅ ポーズの解析が完了", state="complete")
-
-            with st.status("🎨 画像を生成中...", expanded=False) as status:
-                result_image = generate_image_with_style(pose_image, style_image)
-                if result_image:
-                    status.update(label="✅ 画像の生成が完了", state="complete")
+            if pose_result.info.get("low_confidence"):
+                # No pose was found; extract_pose returned the basic stick figure
+                st.warning("人物のポーズを検出できませんでした。簡易的な骨格で続行します。")
+
+            if multi_person_mode and len(people) > 1:
+                # Re-selecting a person reruns the script, but crop poses come from the cache
+                selected_person = st.selectbox("人物を選択", range(len(people)),
+                                               format_func=lambda i: f"人物 {i + 1}",
+                                               key="selected_person")
+                st.markdown('<div class="preview-image">', unsafe_allow_html=True)
+                st.image(pose_result, width=80)
+                st.markdown('</div>', unsafe_allow_html=True)
+                pose_image = pose_image.crop(person_boxes[selected_person])
+                landmarks = people[selected_person]
+            elif multi_person_mode:
+                landmarks = people[0]
+
+            # Reruns of the same inputs (e.g. asking for the AI advice) reuse this session's result
+            request_key = (
+                getattr(pose_file, "file_id", pose_file.name),
+                getattr(style_file, "file_id", style_file.name),
+                st.session_state.get("selected_person") if multi_person_mode else None
+            )
+            generated = st.session_state.get("generated_image")
+            if generated and generated[0] == request_key:
+                result_image = generated[1]
+            else:
+                with st.status("🎨 画像を生成中...", expanded=False) as status:
+                    result_image = get_image_generator().generate_image_with_style(
+                        pose_image, style_image, seed=None, pose_descriptions=pose_descriptions)
+                    if result_image:
+                        status.update(label="✅ 画像の生成が完了", state="complete")
+                st.session_state["generated_image"] = (request_key, result_image)
 
             if result_image is not None:
+                if result_image.info.get("degraded"):
+                    st.info("AIによる画像解析が一時的に利用できないため、ローカルで作成したプロンプトで生成しました。")
                 st.markdown('<div class="output-image">', unsafe_allow_html=True)
                 st.image(result_image)
                 st.markdown('</div>', unsafe_allow_html=True)
@@ -128,10 +187,12 @@ with right_col:
                                  mime="image/png")
 
             with st.expander("💡 AIポーズアドバイス"):
-                pose_buf = io.BytesIO()
-                pose_image.save(pose_buf, format='JPEG')
-                pose_base64 = base64.b64encode(pose_buf.getvalue()).decode('utf-8')
-                pose_analysis = analyze_pose_for_improvements(pose_base64)
+                # Local rule-based advice is instant; Gemini is only called when asked for
+                # or when the local confidence is low
+                pose_analysis = get_pipeline().pose_advice(
+                    landmarks, pose_image,
+                    escalate=st.session_state.get("advice_escalated") == request_key
+                )
 
                 st.text("現在のポーズ")
                 st.text(pose_analysis["current_pose"])
@@ -148,6 +209,15 @@ with right_col:
                         st.text(f"改善方法: {suggestion['suggestion']}")
                         st.text(f"理由: {suggestion['reason']}")
 
+                if pose_analysis.get("degraded"):
+                    st.caption("AI分析は一時的に利用できません。ローカル解析の結果を表示しています。")
+                elif pose_analysis.get("source") == "local":
+                    st.caption(f"ローカル解析 (信頼度 {pose_analysis['confidence']:.0%})")
+                    # The click reruns the script; the generated image comes from session state
+                    st.button("🤖 AIで詳しく分析", key="escalate_advice",
+                              on_click=st.session_state.__setitem__,
+                              args=("advice_escalated", request_key))
+
         except Exception as e:
             st.error(f"エラーが発生しました: {str(e)}")
             logger.error(f"Error processing images: {str(e)}")
@@ -157,4 +227,9 @@ with right_col:
 with st.expander("💡 使い方"):
     st.text("1. ポーズ参照画像をアップロード\n   再現したいポーズの画像を選択")
     st.text("2. スタイル参照画像をアップロード\n   目標とする画風や洋服の画像を選択")
-    st.text("3. 生成された画像を確認\n   AIが2つの画像を組み合わせて新しい画像を生成")
\ No newline at end of file
+    st.text("3. 生成された画像を確認\n   AIが2つの画像を組み合わせて新しい画像を生成")
+
+# Load the MediaPipe graph in the background once the page has rendered.
+# Set POSE_WARMUP=0 to disable.
+if os.getenv("POSE_WARMUP", "1") != "0":
+    get_pose_extractor().start_background_warmup()
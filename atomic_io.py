@@ -0,0 +1,24 @@
+"""
+Crash-safe file writes shared by the on-disk stores (results, pose cache,
+style cache): readers see either the old file or the complete new one.
+"""
+import os
+import tempfile
+
+def atomic_write(path: str, data: bytes):
+    """
+    Write data to path via a temp file in the same directory and os.replace
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,308 @@
+"""
+Batch style transfer: one style image applied to many pose images.
+
+The style is analyzed once (and cached by pixel digest). Poses are analyzed
+in parallel: local pose extraction plus the pose-only Gemini prompt.
+Prompts are composed locally or in batched Gemini calls. Stability requests
+fan out under a concurrency limit as soon as their prompts are ready. Every
+finished item is appended to <output>/manifest.jsonl, so an interrupted run
+resumes where it stopped; <output>/manifest.json lists the results of the
+whole batch.
+
+Usage:
+    python -m batch_style_transfer --style style.png --output out/ poses/*.jpg
+                                   [--concurrency 4] [--pose-workers 4]
+                                   [--prompts local|gemini] [--prompt-batch 10]
+                                   [--no-pose-llm] [--seed 0]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+from image_budget import CONTROL_IMAGE_MAX_SIDE, GEMINI_IMAGE_MAX_SIDE, open_reduced
+from image_generator import (
+    analyze_pose_with_llm,
+    analyze_style_with_llm,
+    generate_batch_prompts,
+    generate_from_prompt,
+)
+from local_prompt import compose_prompt
+from pipeline import extract_single_pose, open_pose_upload
+from style_cache import get_default_style_cache, style_digest
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Concurrent Stability requests
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Threads analyzing poses (pose inference plus the pose-only Gemini call)
+BATCH_POSE_WORKERS = int(os.getenv("BATCH_POSE_WORKERS", "4"))
+# Poses per Gemini prompt-composition call
+BATCH_PROMPT_SIZE = 10
+
+CHECKPOINT_NAME = "manifest.jsonl"
+MANIFEST_NAME = "manifest.json"
+IMAGES_DIR = "images"
+
+class CheckpointMismatchError(ValueError):
+    """
+    The output directory holds a batch run with a different style, seed or
+    prompt mode
+    """
+
+class BatchCheckpoint:
+    """
+    Append-only JSON-lines log of finished items, after a first line with
+    the run's settings (style digest, seed, prompt mode). The last entry per
+    pose wins; poses whose last entry is "ok" (and whose output still
+    exists) are skipped on resume. Resuming with other settings raises
+    CheckpointMismatchError instead of mixing runs in one manifest.
+    """
+
+    def __init__(self, output_dir: str, run: Dict):
+        self.path = os.path.join(output_dir, CHECKPOINT_NAME)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        recorded_run = None
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an interrupted run
+                    if "run" in entry:
+                        recorded_run = entry["run"]
+                    else:
+                        self.entries[entry["pose"]] = entry
+        if recorded_run is None and self.entries:
+            recorded_run = {}  # Written without settings: cannot tell whether it matches
+        if recorded_run is not None and recorded_run != run:
+            raise CheckpointMismatchError(
+                f"{output_dir} holds a batch with other settings ({recorded_run or 'unknown'}); "
+                f"use a new output directory")
+        if recorded_run is None:
+            self._append({"run": run})
+
+    def completed(self, pose_path: str) -> bool:
+        entry = self.entries.get(pose_path)
+        return bool(entry and entry["status"] == "ok" and os.path.exists(entry["output"]))
+
+    def _append(self, entry: Dict):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, entry: Dict):
+        with self._lock:
+            self._append(entry)
+            self.entries[entry["pose"]] = entry
+
+def analyze_style(style_image, digest: str):
+    """
+    style_reference for the batch's style image, from the style cache or
+    one style-only Gemini call; None if the analysis failed
+    """
+    cache = get_default_style_cache()
+    style_reference = cache.get(digest)
+    if style_reference is None:
+        logger.info("Analyzing the batch style with Gemini...")
+        style_reference = analyze_style_with_llm(style_image)
+        if style_reference:
+            cache.put(digest, style_reference)
+    return style_reference
+
+def analyze_pose(index: int, pose_path: str, pose_llm: bool = True) -> Dict:
+    """
+    Pose descriptions and (optionally) the Gemini pose_reference for one pose
+    image. The image itself is not kept; it is reopened for generation.
+    """
+    start = time.perf_counter()
+    pose_image, original_size = open_pose_upload(pose_path)
+    pose_result, pose_descriptions, _ = extract_single_pose(pose_path, pose_image, original_size)
+    if pose_result is None:
+        raise RuntimeError("Pose detection failed")
+    pose_reference = analyze_pose_with_llm(pose_image, pose_descriptions) if pose_llm else None
+    return {
+        "index": index,
+        "pose": pose_path,
+        "pose_descriptions": pose_descriptions,
+        "pose_reference": pose_reference,
+        "low_confidence": bool(pose_result.info.get("low_confidence")),
+        "seconds": time.perf_counter() - start,
+    }
+
+def compose_prompts(style_reference: Optional[Dict], analyses: List[Dict], mode: str = "local") -> List[Dict]:
+    """
+    Prompt data for each analyzed pose: composed locally, or with one Gemini
+    call for all of them (falling back to local composition if it fails).
+    Without a style analysis the prompts are marked degraded.
+    """
+    if mode == "gemini" and style_reference:
+        prompts = generate_batch_prompts(
+            style_reference, [(a["pose_reference"], a["pose_descriptions"]) for a in analyses])
+        if prompts:
+            return prompts
+        logger.warning("Batched prompt composition failed, composing locally")
+
+    prompts = [compose_prompt(style_reference, a["pose_descriptions"], a["pose_reference"]) for a in analyses]
+    if not style_reference:
+        prompts = [dict(prompt, source="local") for prompt in prompts]
+    return prompts
+
+def _generate(analysis: Dict, prompt_data: Dict, output_dir: str, seed: int, store) -> Dict:
+    start = time.perf_counter()
+    pose_image, _ = open_reduced(analysis["pose"], CONTROL_IMAGE_MAX_SIDE)
+    img = generate_from_prompt(pose_image, prompt_data, seed, store)
+    stem = os.path.splitext(os.path.basename(analysis["pose"]))[0]
+    output = os.path.join(output_dir, IMAGES_DIR, f"{analysis['index']:04d}-{stem}.png")
+    img.save(output, format="PNG")
+    return {
+        "output": output,
+        "generation_key": img.info.get("generation_key"),
+        "seed": img.info.get("seed"),
+        "finish_reason": img.info.get("finish_reason"),
+        "degraded": bool(img.info.get("degraded")),
+        "generate_seconds": time.perf_counter() - start,
+    }
+
+def run_batch(style_path: str, pose_paths: Sequence[str], output_dir: str,
+              concurrency: int = BATCH_CONCURRENCY, pose_workers: int = BATCH_POSE_WORKERS,
+              prompt_mode: str = "local", prompt_batch: int = BATCH_PROMPT_SIZE,
+              pose_llm: bool = True, seed: int = 0, store=None,
+              progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Apply one style to every pose image and write the outputs and manifest
+    to output_dir. Poses already completed in output_dir by a run with the
+    same style, seed and prompt mode are skipped (other settings raise
+    CheckpointMismatchError). Returns the manifest.
+    """
+    start = time.perf_counter()
+    os.makedirs(os.path.join(output_dir, IMAGES_DIR), exist_ok=True)
+    style_image, _ = open_reduced(style_path, GEMINI_IMAGE_MAX_SIDE)
+    style_key = style_digest(style_image)
+    checkpoint = BatchCheckpoint(output_dir, {"style_sha256": style_key, "seed": seed,
+                                              "prompt_mode": prompt_mode})
+    pose_paths = [os.path.abspath(path) for path in pose_paths]
+    pending = [(i, path) for i, path in enumerate(pose_paths) if not checkpoint.completed(path)]
+    total = len(pose_paths)
+    done = total - len(pending)
+    logger.info(f"Batch of {total} poses, {done} already done")
+
+    style_reference = analyze_style(style_image, style_key)
+    del style_image
+    batch_size = prompt_batch if prompt_mode == "gemini" else 1
+
+    def finish(entry: Dict):
+        nonlocal done
+        checkpoint.record(entry)
+        done += 1
+        if progress:
+            progress(done, total)
+
+    def fail(index: int, pose_path: str, stage: str, error: Exception):
+        logger.error(f"Pose {pose_path} failed at {stage}: {str(error)}")
+        finish({"index": index, "pose": pose_path, "status": "error", "stage": stage, "error": str(error)})
+
+    with ThreadPoolExecutor(pose_workers, thread_name_prefix="batch-pose") as pose_pool, \
+            ThreadPoolExecutor(concurrency, thread_name_prefix="batch-generate") as generate_pool:
+        analyzing = {pose_pool.submit(analyze_pose, i, path, pose_llm): (i, path) for i, path in pending}
+        generating = {}
+        ready: List[Dict] = []
+
+        def submit_ready(flush: bool = False):
+            while len(ready) >= batch_size or (flush and ready):
+                chunk, ready[:] = ready[:batch_size], ready[batch_size:]
+                for analysis, prompt_data in zip(chunk, compose_prompts(style_reference, chunk, prompt_mode)):
+                    future = generate_pool.submit(_generate, analysis, prompt_data, output_dir, seed, store)
+                    generating[future] = (analysis, prompt_data)
+
+        while analyzing or generating or ready:
+            if not analyzing:
+                submit_ready(flush=True)
+            completed, _ = wait(list(analyzing) + list(generating), return_when=FIRST_COMPLETED)
+            for future in completed:
+                if future in analyzing:
+                    index, path = analyzing.pop(future)
+                    try:
+                        ready.append(future.result())
+                    except Exception as e:
+                        fail(index, path, "pose", e)
+                    continue
+
+                analysis, prompt_data = generating.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    fail(analysis["index"], analysis["pose"], "generate", e)
+                    continue
+                finish({
+                    "index": analysis["index"],
+                    "pose": analysis["pose"],
+                    "status": "ok",
+                    "prompt": prompt_data["main_prompt"],
+                    "negative_prompt": prompt_data["negative_prompt"],
+                    "low_confidence": analysis["low_confidence"],
+                    "pose_seconds": analysis["seconds"],
+                    **result,
+                })
+            submit_ready()
+
+    items = [checkpoint.entries[path] for path in pose_paths if path in checkpoint.entries]
+    manifest = {
+        "style": os.path.abspath(style_path),
+        "style_sha256": style_key,
+        "style_reference": style_reference,
+        "prompt_mode": prompt_mode,
+        "seed": seed,
+        "summary": {
+            "total": total,
+            "ok": sum(1 for item in items if item["status"] == "ok"),
+            "error": sum(1 for item in items if item["status"] == "error"),
+            "degraded": sum(1 for item in items if item.get("degraded")),
+            "seconds": time.perf_counter() - start,
+        },
+        "items": items,
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply one style image to many pose images")
+    parser.add_argument("poses", nargs="+", help="Pose images")
+    parser.add_argument("--style", required=True, help="Style reference image")
+    parser.add_argument("--output", required=True, help="Output directory (resumes if it has a manifest)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Concurrent Stability requests")
+    parser.add_argument("--pose-workers", type=int, default=BATCH_POSE_WORKERS)
+    parser.add_argument("--prompts", choices=["local", "gemini"], default="local",
+                        help="Compose prompts locally or in batched Gemini calls")
+    parser.add_argument("--prompt-batch", type=int, default=BATCH_PROMPT_SIZE, help="Poses per Gemini prompt call")
+    parser.add_argument("--no-pose-llm", action="store_true", help="Skip the pose-only Gemini analysis")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def progress(done, total):
+        logger.info(f"{done}/{total} poses done")
+
+    try:
+        manifest = run_batch(args.style, args.poses, args.output, args.concurrency, args.pose_workers,
+                             args.prompts, args.prompt_batch, not args.no_pose_llm, args.seed,
+                             progress=progress)
+    except CheckpointMismatchError as e:
+        parser.error(str(e))
+    summary = manifest["summary"]
+    print(f"{summary['ok']}/{summary['total']} generated, {summary['error']} failed, "
+          f"{summary['degraded']} degraded in {summary['seconds']:.1f}s -> "
+          f"{os.path.join(args.output, MANIFEST_NAME)}")
+
+if __name__ == "__main__":
+    main()
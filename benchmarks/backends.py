@@ -0,0 +1,170 @@
+"""
+Latency and accuracy of the pose backends against the MediaPipe path.
+
+Every backend configuration (runtime x precision x threads x batch size)
+runs over the same frames: the repository's bundled images (no person in
+them, so backends should agree on finding none), synthetic people from the
+benchmark fixtures at several sizes, rotations and difficulties, and any
+--images given. Landmarks are compared with MediaPipe's Pose solution at the
+same model complexity. Configurations whose runtime or model files are
+missing are reported as skipped.
+
+Usage:
+    python -m benchmarks.backends [--backends tflite onnx] [--precisions fp32 fp16 int8]
+                                  [--threads 1 2 4] [--batch 1 4] [--model-complexity 1]
+                                  [--images photos/*.jpg] [--output backends.json]
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+import pose_backends
+from benchmarks import fixtures
+from pose_extractor import DETECTION_ATTEMPTS, get_cv2
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_IMAGES = ["test.png", "test_output.png", "generated-icon.png"]
+# Torso-relative distance under which a landmark counts as matching
+PCK_THRESHOLD = 0.05
+# Landmarks compared (the visible body, as MediaPipe reports it)
+MIN_REFERENCE_VISIBILITY = 0.5
+
+def benchmark_frames(extra_images=()):
+    """
+    (name, RGB frame) pairs: bundled images, synthetic people and extra images
+    """
+    cv2 = get_cv2()
+    frames = [(name, np.array(Image.open(os.path.join(REPO_DIR, name)).convert("RGB")))
+              for name in BUNDLED_IMAGES if os.path.exists(os.path.join(REPO_DIR, name))]
+    for resolution, difficulty in itertools.product([512, 1024, 2048], ["clean", "noisy", "dark"]):
+        image = np.array(fixtures.person_image(resolution, difficulty))
+        height, width = image.shape[:2]
+        for angle, scale in [(0, 1.0), (15, 0.8), (-30, 0.6)]:
+            transform = cv2.getRotationMatrix2D((width / 2, height / 2), angle, scale)
+            frames.append((f"person-{resolution}-{difficulty}-rot{angle}",
+                           cv2.warpAffine(image, transform, (width, height), borderMode=cv2.BORDER_REFLECT)))
+    frames.extend((path, np.array(Image.open(path).convert("RGB"))) for path in extra_images)
+    return frames
+
+def torso_length(landmarks: np.ndarray, width: int, height: int) -> float:
+    points = landmarks[:, :2] * [width, height]
+    shoulders, hips = points[[11, 12]].mean(0), points[[23, 24]].mean(0)
+    return float(np.linalg.norm(shoulders - hips))
+
+def accuracy(reference, landmarks, frames):
+    """
+    Agreement with the reference landmarks: detection agreement, mean
+    landmark distance and PCK (relative to the reference torso length), and
+    mean visibility difference, over frames where both found a pose
+    """
+    distances, visibility_errors = [], []
+    agree = 0
+    for expected, found, (_, frame) in zip(reference, landmarks, frames):
+        agree += (expected is None) == (found is None)
+        if expected is None or found is None:
+            continue
+        height, width = frame.shape[:2]
+        visible = expected[:, 3] >= MIN_REFERENCE_VISIBILITY
+        offsets = (found[visible, :2] - expected[visible, :2]) * [width, height]
+        distances.extend(np.linalg.norm(offsets, axis=1) / torso_length(expected, width, height))
+        visibility_errors.append(np.abs(found[:, 3] - expected[:, 3]).mean())
+    distances = np.array(distances)
+    return {
+        "detection_agreement": agree / len(frames),
+        "compared_frames": len(visibility_errors),
+        "mean_error_torso": float(distances.mean()) if distances.size else None,
+        f"pck@{PCK_THRESHOLD}": float((distances < PCK_THRESHOLD).mean()) if distances.size else None,
+        "mean_visibility_error": float(np.mean(visibility_errors)) if visibility_errors else None,
+    }
+
+def run(backend, frames, confidence: float, rounds: int):
+    """
+    Per-frame latency of detect(), per-frame cost of detect_batch() and the
+    landmarks found
+    """
+    images = [frame for _, frame in frames]
+    landmarks = backend.detect_batch(images, confidence)  # warm-up, and the batched result
+
+    latencies = []
+    for _ in range(rounds):
+        for image in images:
+            start = time.perf_counter()
+            backend.detect(image, confidence)
+            latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        backend.detect_batch(images, confidence)
+    batched = (time.perf_counter() - start) / (rounds * len(images))
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "batched_ms_per_frame": batched * 1000.0,
+    }, landmarks
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pose backends with the MediaPipe path")
+    parser.add_argument("--backends", nargs="+", default=["tflite", "onnx"], choices=sorted(pose_backends.RUNNERS))
+    parser.add_argument("--precisions", nargs="+", default=list(pose_backends.PRECISIONS),
+                        choices=pose_backends.PRECISIONS)
+    parser.add_argument("--threads", nargs="+", type=int,
+                        default=sorted({1, pose_backends.POSE_BACKEND_THREADS}))
+    parser.add_argument("--batch", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--model-complexity", type=int, default=1, choices=sorted(pose_backends.LANDMARK_MODELS))
+    parser.add_argument("--confidence", type=float, default=DETECTION_ATTEMPTS[0]["min_detection_confidence"])
+    parser.add_argument("--rounds", type=int, default=3, help="Timing passes over all frames")
+    parser.add_argument("--images", nargs="*", default=[], help="Extra images (ideally with people)")
+    parser.add_argument("--model-dir", default=pose_backends.POSE_MODEL_DIR)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    frames = benchmark_frames(args.images)
+    mediapipe = pose_backends.MediaPipeBackend(args.model_complexity)
+    timing, reference = run(mediapipe, frames, args.confidence, args.rounds)
+    report = {
+        "frames": [name for name, _ in frames],
+        "cpu_count": os.cpu_count(),
+        "model_complexity": args.model_complexity,
+        "mediapipe": {**timing, "poses_found": sum(r is not None for r in reference)},
+        "backends": [],
+    }
+    print(f"{len(frames)} frames, MediaPipe found {report['mediapipe']['poses_found']} poses")
+    print(f"{'mediapipe':28s} p50 {timing['p50_ms']:7.1f} ms  p95 {timing['p95_ms']:7.1f} ms  "
+          f"batched {timing['batched_ms_per_frame']:7.1f} ms/frame")
+
+    for runtime, precision, threads, batch_size in itertools.product(
+            args.backends, args.precisions, args.threads, args.batch):
+        name = f"{runtime}/{precision}/t{threads}/b{batch_size}"
+        entry = {"runtime": runtime, "precision": precision, "threads": threads, "batch_size": batch_size}
+        try:
+            backend = pose_backends.BlazePoseBackend(runtime, threads, batch_size, precision,
+                                                     args.model_complexity, model_dir=args.model_dir)
+        except (RuntimeError, FileNotFoundError) as e:
+            entry["skipped"] = str(e)
+            report["backends"].append(entry)
+            print(f"{name:28s} skipped: {str(e)}")
+            continue
+        timing, landmarks = run(backend, frames, args.confidence, args.rounds)
+        entry.update(timing, accuracy=accuracy(reference, landmarks, frames))
+        report["backends"].append(entry)
+        backend.close()
+        error = entry["accuracy"]["mean_error_torso"]
+        print(f"{name:28s} p50 {timing['p50_ms']:7.1f} ms  p95 {timing['p95_ms']:7.1f} ms  "
+              f"batched {timing['batched_ms_per_frame']:7.1f} ms/frame  "
+              f"agree {entry['accuracy']['detection_agreement']:.0%}  "
+              f"error {'-' if error is None else f'{error:.3f}'} torso")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Request payload encoding in image_generator.
+"""
+import base64
+import io
+
+from benchmarks import fixtures
+from benchmarks.common import parametrize
+
+import image_generator
+from gemini_client import StreamingJSONBody, image_part, text_part
+from image_budget import GEMINI_IMAGE_MAX_SIDE, encode_image
+
+
+def _image(resolution):
+    return fixtures.person_image(resolution, "noisy")
+
+
+@parametrize(["resolution"], [fixtures.RESOLUTIONS], setup=_image)
+def time_pose_image_to_bytes(image):
+    image_generator.pose_image_to_bytes(image)
+
+
+@parametrize(["resolution"], [fixtures.RESOLUTIONS], setup=_image)
+def time_gemini_request_body(image):
+    # What analyze_images_with_llm does per image: a bounded PNG working copy,
+    # base64-encoded chunk by chunk while the request body is streamed
+    data = encode_image(image, 'PNG', GEMINI_IMAGE_MAX_SIDE)
+    for _ in StreamingJSONBody([text_part("pose"), image_part(data, "image/png")]):
+        pass
+
+
+@parametrize(["resolution"], [fixtures.RESOLUTIONS], setup=_image)
+def time_gemini_inline_png_legacy(image):
+    # Legacy baseline: full-resolution PNG and an in-memory base64 string
+    buf = io.BytesIO()
+    image.save(buf, format='PNG')
+    base64.b64encode(buf.getvalue()).decode('utf-8')
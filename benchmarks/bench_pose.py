@@ -0,0 +1,115 @@
+"""
+Pose extraction and analysis hot paths.
+"""
+import tempfile
+
+from benchmarks import fixtures
+from benchmarks.common import parametrize
+
+import pose_batch
+import pose_descriptions
+import pose_extractor
+from pose_disk_cache import PoseDiskCache
+
+_pose_cache = None
+
+
+def _detectable_image(resolution, difficulty):
+    # Refuse to time the error path (e.g. when MediaPipe cannot load its model)
+    image = fixtures.person_image(resolution, difficulty)
+    result = pose_extractor.extract_pose(image, cache=False)
+    if difficulty == "empty":
+        # No person to find: the timed path is the low-confidence fallback
+        assert result[0] is not None and result[0].info.get("low_confidence"), \
+            "extract_pose did not fall back for the empty fixture"
+    else:
+        assert result[2] is not None, "extract_pose returned no landmarks for the fixture"
+    return image
+
+
+@parametrize(["resolution", "difficulty"], [fixtures.RESOLUTIONS, fixtures.DIFFICULTIES],
+             setup=_detectable_image, threshold=0.35)
+def time_extract_pose(image):
+    pose_extractor.extract_pose(image, cache=False)
+
+
+def _get_pose_cache():
+    global _pose_cache
+    if _pose_cache is None:
+        _pose_cache = PoseDiskCache(tempfile.mkdtemp(prefix="pose-cache-bench-"))
+    return _pose_cache
+
+
+def _cached_image(resolution):
+    # Warm the cache so the benchmark measures hits only
+    cache = _get_pose_cache()
+    image = fixtures.person_image(resolution, "clean")
+    result = pose_extractor.extract_pose(image, cache=cache)
+    assert result[2] is not None, "extract_pose returned no landmarks for the fixture"
+    hits = cache.report()["hits"]
+    pose_extractor.extract_pose(image, cache=cache)
+    assert cache.report()["hits"] > hits, "extract_pose did not hit the warmed pose cache"
+    return image
+
+
+@parametrize(["resolution"], [fixtures.RESOLUTIONS], setup=_cached_image)
+def time_extract_pose_cached(image):
+    pose_extractor.extract_pose(image, cache=_get_pose_cache())
+
+
+@parametrize(["seed"], [[0]], setup=fixtures.landmark_list)
+def time_calculate_joint_angles(landmarks):
+    pose_extractor.calculate_joint_angles(landmarks)
+
+
+@parametrize(["seed"], [[0]], setup=fixtures.landmark_list)
+def time_analyze_pose_balance(landmarks):
+    pose_extractor.analyze_pose_balance(landmarks)
+
+
+def _angles(seed):
+    return pose_extractor.calculate_joint_angles(fixtures.landmark_list(seed))
+
+
+@parametrize(["seed"], [[0]], setup=_angles)
+def time_get_pose_description(angles):
+    pose_extractor.get_pose_description(angles)
+
+
+def _angle_batch(n):
+    return pose_batch.batch_joint_angles(fixtures.landmark_batch(n, jitter=0.05))
+
+
+@parametrize(["frames"], [[100, 10000]], setup=_angle_batch)
+def time_describe_batch(angles):
+    pose_descriptions.describe_batch(angles)
+
+
+def _stick_figure_inputs(resolution):
+    return fixtures.pose_results(0), fixtures.image_shape(resolution)
+
+
+@parametrize(["resolution"], [fixtures.RESOLUTIONS], setup=_stick_figure_inputs)
+def time_create_enhanced_stick_figure(inputs):
+    results, shape = inputs
+    pose_extractor.create_enhanced_stick_figure(results, shape)
+
+
+def _landmark_batch(n):
+    return fixtures.landmark_batch(n, jitter=0.05)
+
+
+@parametrize(["frames"], [[1, 100, 10000]], setup=_landmark_batch)
+def time_analyze_pose_batch(landmarks):
+    pose_batch.analyze_pose_batch(landmarks)
+
+
+def _landmark_lists(n):
+    return [fixtures.landmark_list(seed) for seed in range(n)]
+
+
+@parametrize(["frames"], [[100]], setup=_landmark_lists)
+def time_per_frame_refinement(landmark_lists):
+    # Per-frame Python path that analyze_pose_batch replaces
+    for landmarks in landmark_lists:
+        pose_extractor.get_pose_refinement_suggestions(landmarks)
@@ -0,0 +1,73 @@
+"""
+Frame handoff to a worker process: shared-memory frame ring vs. pickling
+the array through a pipe (what a multiprocessing pool would do).
+
+Each round trip sends one frame and waits for a (33, 4) landmark-sized reply.
+"""
+import atexit
+import math
+import multiprocessing
+import threading
+
+import numpy as np
+
+from benchmarks.common import parametrize
+
+from frame_transport import FrameRing, view_frame
+
+MEGAPIXELS = [1, 2, 4, 8, 12]
+
+_worker = None
+_worker_lock = threading.Lock()
+_ring = None
+
+def _consume(conn):
+    reply = np.zeros((33, 4), dtype=np.float32)
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        frame = view_frame(message) if isinstance(message, dict) else message
+        # Touch the frame the way a detector would start reading it
+        int(frame[0, 0, 0]) + int(frame[-1, -1, -1])
+        del frame
+        conn.send(reply)
+
+def _get_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            parent, child = multiprocessing.get_context("spawn").Pipe()
+            process = multiprocessing.get_context("spawn").Process(target=_consume, args=(child,), daemon=True)
+            process.start()
+            _worker = parent
+        return _worker
+
+def _get_ring() -> FrameRing:
+    global _ring
+    if _ring is None:
+        _ring = FrameRing(slots=2, slot_bytes=max(MEGAPIXELS) * 1_000_000 * 3)
+        atexit.register(_ring.close)
+    return _ring
+
+def _frame(megapixels):
+    # 4:3 RGB frame of about this many megapixels
+    width = int(math.sqrt(megapixels * 1_000_000 * 4 / 3))
+    height = megapixels * 1_000_000 // width
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return frame, _get_worker(), _get_ring()
+
+@parametrize(["megapixels"], [MEGAPIXELS], setup=_frame)
+def time_transport_pickle(case):
+    frame, conn, _ = case
+    conn.send(frame)
+    conn.recv()
+
+@parametrize(["megapixels"], [MEGAPIXELS], setup=_frame)
+def time_transport_frame_ring(case):
+    frame, conn, ring = case
+    with ring.frame(frame.shape, frame.dtype) as handle:
+        handle.array[...] = frame
+        conn.send(handle.to_message())
+        conn.recv()
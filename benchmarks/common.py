@@ -0,0 +1,148 @@
+"""
+Minimal asv-style benchmark runner.
+
+Benchmark modules define `time_*` functions. A function may carry `params`
+(list of lists) and `param_names` attributes to run over a parameter grid,
+a `setup(*params)` attribute that returns the function's first argument,
+and a `threshold` attribute overriding the default regression threshold.
+"""
+import importlib
+import itertools
+import platform
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.25
+
+def parametrize(names: List[str], values: List[List], setup: Optional[Callable] = None,
+                threshold: Optional[float] = None):
+    """
+    Attach asv-style params (and an optional per-case setup) to a benchmark
+    """
+    def decorator(fn):
+        fn.param_names = names
+        fn.params = values
+        if setup is not None:
+            fn.setup = setup
+        if threshold is not None:
+            fn.threshold = threshold
+        return fn
+    return decorator
+
+def measure(fn: Callable, *args, repeat: int = 7, min_time: float = 0.05) -> Dict[str, float]:
+    """
+    Time fn(*args): calibrate the number of calls per round so each round
+    lasts at least min_time, then report per-call statistics in milliseconds
+    """
+    fn(*args)  # warm-up
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 16:
+            break
+        number *= 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        samples.append((time.perf_counter() - start) / number)
+
+    samples_ms = [s * 1000.0 for s in samples]
+    return {
+        "median_ms": statistics.median(samples_ms),
+        "mean_ms": statistics.mean(samples_ms),
+        "min_ms": min(samples_ms),
+        "max_ms": max(samples_ms),
+        "stdev_ms": statistics.stdev(samples_ms) if len(samples_ms) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+def discover(module_names: List[str], pattern: str = ""):
+    """
+    Yield (name, fn, params) for every benchmark case matching pattern
+    """
+    for module_name in module_names:
+        module = importlib.import_module(module_name)
+        short = module_name.rsplit(".", 1)[-1]
+        for attr in sorted(dir(module)):
+            fn = getattr(module, attr)
+            if not attr.startswith("time_") or not callable(fn):
+                continue
+            grid = list(itertools.product(*fn.params)) if hasattr(fn, "params") else [()]
+            for case in grid:
+                name = f"{short}.{attr}"
+                if case:
+                    name += "(" + ", ".join(f"{k}={v}" for k, v in zip(fn.param_names, case)) + ")"
+                if pattern in name:
+                    yield name, fn, case
+
+def run_benchmarks(module_names: List[str], pattern: str = "", repeat: int = 7) -> Dict:
+    """
+    Run all matching benchmarks and return a JSON-serializable report
+    """
+    results = {}
+    for name, fn, case in discover(module_names, pattern):
+        try:
+            args = case
+            if hasattr(fn, "setup"):
+                args = (fn.setup(*case),)
+            stats = measure(fn, *args, repeat=repeat)
+            stats["threshold"] = getattr(fn, "threshold", DEFAULT_THRESHOLD)
+            results[name] = stats
+            print(f"{name:70s} {stats['median_ms']:10.3f} ms")
+        except Exception as e:
+            results[name] = {"error": f"{e.__class__.__name__}: {str(e)}"}
+            print(f"{name:70s}     failed: {str(e)}")
+
+    return {"environment": environment(), "results": results}
+
+def environment() -> Dict[str, str]:
+    """
+    Commit and machine info recorded with every result file
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def compare(baseline: Dict, current: Dict, threshold: Optional[float] = None) -> List[str]:
+    """
+    Return failures: benchmarks that errored, that have no baseline to compare
+    against, or whose median grew by more than their threshold (or the given
+    global threshold) relative to the baseline
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        if "median_ms" not in stats:
+            regressions.append(f"{name}: failed ({stats.get('error', 'no timing')})")
+            continue
+        base = baseline["results"].get(name)
+        if not base or "median_ms" not in base:
+            regressions.append(f"{name}: no baseline timing in the compared result file")
+            continue
+        limit = threshold if threshold is not None else stats.get("threshold", DEFAULT_THRESHOLD)
+        ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] > 0 else 1.0
+        if ratio > 1.0 + limit:
+            regressions.append(
+                f"{name}: {base['median_ms']:.3f} ms -> {stats['median_ms']:.3f} ms "
+                f"({(ratio - 1.0) * 100:+.0f}%, limit +{limit * 100:.0f}%)"
+            )
+    return regressions
@@ -0,0 +1,121 @@
+"""
+Synthetic, deterministic benchmark inputs (no network or external files).
+"""
+from types import SimpleNamespace
+from typing import Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+RESOLUTIONS = [512, 1024, 2048, 4096]
+DIFFICULTIES = ["clean", "noisy", "dark", "empty"]
+
+# Normalized (x, y) of the 33 BlazePose landmarks for a relaxed standing pose
+STANDING_POSE = np.array([
+    [0.500, 0.150], [0.510, 0.130], [0.520, 0.130], [0.530, 0.130],
+    [0.490, 0.130], [0.480, 0.130], [0.470, 0.130], [0.550, 0.140],
+    [0.450, 0.140], [0.515, 0.170], [0.485, 0.170], [0.600, 0.250],
+    [0.400, 0.250], [0.650, 0.380], [0.350, 0.380], [0.670, 0.500],
+    [0.330, 0.500], [0.680, 0.530], [0.320, 0.530], [0.675, 0.540],
+    [0.325, 0.540], [0.660, 0.520], [0.340, 0.520], [0.560, 0.550],
+    [0.440, 0.550], [0.570, 0.720], [0.430, 0.720], [0.570, 0.900],
+    [0.430, 0.900], [0.565, 0.920], [0.435, 0.920], [0.590, 0.940],
+    [0.410, 0.940],
+], dtype=np.float32)
+
+# Limbs drawn for the synthetic person: (start, end, width as fraction of height)
+_LIMBS = [
+    (11, 12, 0.05), (11, 23, 0.08), (12, 24, 0.08), (23, 24, 0.08),
+    (11, 13, 0.035), (13, 15, 0.03), (12, 14, 0.035), (14, 16, 0.03),
+    (23, 25, 0.05), (25, 27, 0.04), (24, 26, 0.05), (26, 28, 0.04),
+    (27, 31, 0.025), (28, 32, 0.025),
+]
+
+def landmark_array(seed: int = 0, jitter: float = 0.02) -> np.ndarray:
+    """
+    (33, 4) landmark array (x, y, z, visibility) around the standing pose
+    """
+    rng = np.random.default_rng(seed)
+    landmarks = np.zeros((33, 4), dtype=np.float32)
+    landmarks[:, :2] = STANDING_POSE + rng.normal(0, jitter, (33, 2))
+    landmarks[:, 2] = rng.normal(0, 0.05, 33)
+    landmarks[:, 3] = rng.uniform(0.7, 1.0, 33)
+    return landmarks
+
+def landmark_batch(n: int, seed: int = 0, jitter: float = 0.02) -> np.ndarray:
+    """
+    (n, 33, 4) batch of jittered landmark arrays
+    """
+    return np.stack([landmark_array(seed + i, jitter) for i in range(n)])
+
+def landmark_list(seed: int = 0):
+    """
+    Landmark list in the shape MediaPipe returns (pose_landmarks).
+    Uses MediaPipe's protobuf when available so drawing utilities accept it.
+    """
+    landmarks = landmark_array(seed)
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        proto = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility in landmarks:
+            proto.landmark.add(x=float(x), y=float(y), z=float(z), visibility=float(visibility))
+        return proto
+    except ImportError:
+        return SimpleNamespace(landmark=[
+            SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v))
+            for x, y, z, v in landmarks
+        ])
+
+def pose_results(seed: int = 0):
+    """
+    Object with a pose_landmarks attribute, like pose.process() results
+    """
+    return SimpleNamespace(pose_landmarks=landmark_list(seed))
+
+def person_image(resolution: int, difficulty: str = "clean", seed: int = 0) -> Image.Image:
+    """
+    Synthetic portrait-orientation photo of a standing person.
+
+    clean: flat background, high contrast
+    noisy: cluttered background and sensor noise
+    dark:  underexposed, low contrast
+    empty: background only (no person)
+    """
+    rng = np.random.default_rng(seed)
+    height = resolution
+    width = int(resolution * 0.75)
+    image = Image.new("RGB", (width, height), (200, 205, 210))
+    draw = ImageDraw.Draw(image)
+
+    if difficulty in ("noisy", "empty"):
+        for _ in range(40):
+            x0, y0 = rng.integers(0, width), rng.integers(0, height)
+            x1, y1 = x0 + rng.integers(10, width // 3), y0 + rng.integers(10, height // 3)
+            draw.rectangle([x0, y0, x1, y1], fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+
+    if difficulty != "empty":
+        points = STANDING_POSE * [width, height]
+        for start, end, limb_width in _LIMBS:
+            draw.line([tuple(points[start]), tuple(points[end])],
+                      fill=(40, 60, 120), width=max(1, int(limb_width * height)))
+        head_r = 0.06 * height
+        nx, ny = points[0]
+        draw.ellipse([nx - head_r * 0.8, ny - head_r, nx + head_r * 0.8, ny + head_r], fill=(224, 172, 140))
+        for wrist in (15, 16):
+            wx, wy = points[wrist]
+            r = 0.02 * height
+            draw.ellipse([wx - r, wy - r, wx + r, wy + r], fill=(224, 172, 140))
+        image = image.filter(ImageFilter.GaussianBlur(radius=max(1, resolution // 512)))
+
+    pixels = np.asarray(image, dtype=np.float32)
+    if difficulty == "noisy":
+        pixels = pixels + rng.normal(0, 25, pixels.shape)
+    elif difficulty == "dark":
+        pixels = pixels * 0.25 + 10
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+def image_shape(resolution: int) -> Tuple[int, int]:
+    """
+    (height, width) of person_image at the given resolution
+    """
+    return resolution, int(resolution * 0.75)
@@ -0,0 +1,62 @@
+"""
+Tail latency of Gemini calls with and without hedged requests, against the
+local mock backend with a heavy-tailed latency profile.
+
+Usage:
+    python -m benchmarks.hedging [--requests 300] [--median 0.02] [--p99 0.8]
+                                 [--budget 0.1] [--output hedging.json]
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+import gemini_client
+from mock_backends import LatencyProfile, MockBackends
+
+def run(requests: int, hedge: bool, budget: float):
+    policy = gemini_client.HedgePolicy(initial_delay=0.1, budget=budget)
+    parts = [gemini_client.text_part("benchmark"), gemini_client.image_part(b"\x89PNG", "image/png")]
+    latencies = []
+    for _ in range(requests):
+        start = time.monotonic()
+        gemini_client.generate_content(parts, hedge=hedge, policy=policy)
+        latencies.append(time.monotonic() - start)
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "policy": policy.report(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Gemini tail latency with hedging")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--median", type=float, default=0.02, help="Mock median latency (s)")
+    parser.add_argument("--p99", type=float, default=0.8, help="Mock p99 latency (s)")
+    parser.add_argument("--budget", type=float, default=gemini_client.GEMINI_HEDGE_BUDGET)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    report = {}
+    with MockBackends(gemini=LatencyProfile(args.median, args.p99, seed=0)) as mock:
+        gemini_client.GEMINI_API_BASE = mock.url
+        for hedge in (False, True):
+            name = "hedged" if hedge else "baseline"
+            report[name] = run(args.requests, hedge, args.budget)
+            print(f"{name:9s} p50 {report[name]['p50_ms']:8.1f} ms  p99 {report[name]['p99_ms']:8.1f} ms  "
+                  f"max {report[name]['max_ms']:8.1f} ms")
+        print(json.dumps(report["hedged"]["policy"], indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
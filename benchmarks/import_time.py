@@ -0,0 +1,114 @@
+"""
+Import-time profile of the app's modules (python -X importtime).
+
+Usage:
+    python -m benchmarks.import_time [--repeat 5] [--output import_time.json]
+
+Fails (exit code 1) when a module exceeds its cumulative import budget or
+when a dependency that must stay lazy is imported eagerly.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported by app.py at startup, with cumulative budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "pose_extractor": 400.0,
+    "image_generator": 400.0,
+    "pose_analysis": 400.0,
+}
+
+# Dependencies that must only be imported on first use
+LAZY_MODULES = ["mediapipe", "cv2"]
+
+def profile_imports(modules: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Import the given modules in a fresh interpreter and return the
+    self/cumulative import time (microseconds) of every imported package
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed: {proc.stderr[-2000:]}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = {
+            "self_us": float(self_us),
+            "cumulative_us": float(cumulative_us),
+        }
+    return timings
+
+def run(repeat: int) -> Dict:
+    """
+    Profile each budgeted module `repeat` times and summarize the median
+    """
+    report = {"modules": {}, "eager_lazy_imports": [], "violations": []}
+
+    for module in IMPORT_BUDGETS_MS:
+        samples = []
+        slowest = {}
+        for _ in range(repeat):
+            timings = profile_imports([module])
+            samples.append(timings[module]["cumulative_us"] / 1000.0)
+            slowest = timings
+            for lazy in LAZY_MODULES:
+                if lazy in timings and lazy not in report["eager_lazy_imports"]:
+                    report["eager_lazy_imports"].append(lazy)
+
+        top = sorted(slowest.items(), key=lambda kv: kv[1]["self_us"], reverse=True)[:10]
+        median_ms = statistics.median(samples)
+        report["modules"][module] = {
+            "median_ms": round(median_ms, 2),
+            "min_ms": round(min(samples), 2),
+            "max_ms": round(max(samples), 2),
+            "budget_ms": IMPORT_BUDGETS_MS[module],
+            "slowest_self": [
+                {"name": name, "self_ms": round(t["self_us"] / 1000.0, 2)} for name, t in top
+            ],
+        }
+        if median_ms > IMPORT_BUDGETS_MS[module]:
+            report["violations"].append(
+                f"{module}: {median_ms:.1f} ms exceeds budget of {IMPORT_BUDGETS_MS[module]:.0f} ms"
+            )
+
+    for lazy in report["eager_lazy_imports"]:
+        report["violations"].append(f"{lazy} is imported eagerly")
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the app modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module (median is reported)")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+    if report["violations"]:
+        for violation in report["violations"]:
+            print(f"REGRESSION: {violation}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
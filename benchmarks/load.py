@@ -0,0 +1,230 @@
+"""
+Load test of the app's request path: N concurrent sessions uploading
+pose/style pairs against the local mock Gemini/Stability backends.
+
+Streamlit runs each session's script on its own thread inside the one
+`streamlit run app.py` process, so every simulated session here is a thread
+running pipeline.run_request (the stages app.py calls) in this process:
+pose inference, image budgets and upstream calls contend exactly as they
+would in the server. Each concurrency level reports throughput, per-stage
+latency percentiles, peak RSS and the error rate.
+
+Usage:
+    python -m benchmarks.load [--concurrency 1 2 4 8 16] [--requests-per-session 4]
+                              [--resolution 1024] [--gemini-median 0.5] [--gemini-p99 3]
+                              [--stability-median 4] [--stability-p99 12]
+                              [--error-rate 0.0] [--gemini-outage] [--pose-cache]
+                              [--output load.json]
+
+--gemini-outage makes every Gemini call fail, to check that the circuit
+breaker keeps latency bounded and requests complete in degraded mode.
+"""
+import argparse
+import io
+import json
+import logging
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import circuit_breaker
+import gemini_client
+import image_generator
+import pipeline
+from benchmarks import fixtures
+from mock_backends import LatencyProfile, MockBackends
+
+# Distinct pose uploads cycled through by the sessions
+UPLOAD_VARIANTS = 8
+RSS_SAMPLE_INTERVAL = 0.05
+
+class _Upload(io.BytesIO):
+    """
+    In-memory stand-in for Streamlit's UploadedFile
+    """
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+        self.file_id = name
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+class _RSSSampler(threading.Thread):
+    """
+    Samples the process RSS until stopped and keeps the peak
+    """
+
+    def __init__(self):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.peak_mb = _rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_INTERVAL):
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return self.peak_mb
+
+def _encode_uploads(resolution: int) -> Dict[str, List[bytes]]:
+    def jpeg(image):
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=90)
+        return buf.getvalue()
+
+    return {
+        "pose": [jpeg(fixtures.person_image(resolution, "noisy", seed)) for seed in range(UPLOAD_VARIANTS)],
+        "style": [jpeg(fixtures.person_image(512, "clean", seed=100))],
+    }
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ms = np.array(values) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+def _session(index: int, uploads: Dict[str, List[bytes]], requests: int, pose_cache, records: List[Dict]):
+    for i in range(requests):
+        variant = (index * requests + i) % len(uploads["pose"])
+        pose_file = _Upload(uploads["pose"][variant], f"pose-{variant}.jpg")
+        style_file = _Upload(uploads["style"][0], "style.jpg")
+        timer = pipeline.StageTimer()
+        record = {"session": index, "error": None}
+        start = time.perf_counter()
+        try:
+            result = pipeline.run_request(pose_file, style_file, timer, store=False, pose_cache=pose_cache)
+            record["low_confidence"] = result["low_confidence"]
+            record["degraded"] = result["degraded"]
+        except Exception as e:
+            record["error"] = f"{timer.failed or 'unknown'}: {e.__class__.__name__}"
+        record["total"] = time.perf_counter() - start
+        record["stages"] = timer.durations
+        records.append(record)
+
+def run_level(concurrency: int, requests: int, uploads: Dict[str, List[bytes]], profiles: Dict,
+              pose_cache) -> Dict:
+    """
+    Run `concurrency` sessions of `requests` sequential requests each against
+    fresh mock backends, with fresh circuit breakers and hedge policy so no
+    state carries over from the previous level
+    """
+    circuit_breaker.reset_all()
+    hedge_policy = gemini_client.reset_hedge_policy()
+    records: List[Dict] = []
+    with MockBackends(**profiles) as mock:
+        gemini_client.GEMINI_API_BASE = mock.url
+        image_generator.STABILITY_API_BASE = mock.url
+
+        rss_start = _rss_mb()
+        sampler = _RSSSampler()
+        sampler.start()
+        threads = [
+            threading.Thread(target=_session, args=(i, uploads, requests, pose_cache, records),
+                             name=f"session-{i}")
+            for i in range(concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        peak_rss = sampler.stop()
+        upstream = mock.stats()
+
+    errors = [r["error"] for r in records if r["error"]]
+    completed = len(records) - len(errors)
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "completed": completed,
+        "wall_s": wall,
+        "throughput_rps": completed / wall if wall else 0.0,
+        "error_rate": len(errors) / len(records) if records else 0.0,
+        "errors": {error: errors.count(error) for error in sorted(set(errors))},
+        "low_confidence": sum(1 for r in records if r.get("low_confidence")),
+        "degraded": sum(1 for r in records if r.get("degraded")),
+        "latency": {
+            "total": _percentiles([r["total"] for r in records if not r["error"]]),
+            **{stage: _percentiles([r["stages"][stage] for r in records if stage in r["stages"]])
+               for stage in pipeline.STAGES},
+        },
+        "rss_start_mb": rss_start,
+        "peak_rss_mb": peak_rss,
+        "upstream": upstream,
+        "circuits": circuit_breaker.report_all(),
+        "hedging": hedge_policy.report(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the app request path against mock backends")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests-per-session", type=int, default=4)
+    parser.add_argument("--resolution", type=int, default=1024, help="Pose upload size (px)")
+    parser.add_argument("--gemini-median", type=float, default=0.5, help="Mock Gemini median latency (s)")
+    parser.add_argument("--gemini-p99", type=float, default=3.0, help="Mock Gemini p99 latency (s)")
+    parser.add_argument("--stability-median", type=float, default=4.0, help="Mock Stability median latency (s)")
+    parser.add_argument("--stability-p99", type=float, default=12.0, help="Mock Stability p99 latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock error rate of both upstreams")
+    parser.add_argument("--gemini-outage", action="store_true", help="Fail every Gemini call")
+    parser.add_argument("--pose-cache", action="store_true",
+                        help="Use a (fresh, temporary) pose disk cache instead of bypassing it")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    pose_cache = False
+    if args.pose_cache:
+        from pose_disk_cache import PoseDiskCache
+        pose_cache = PoseDiskCache(tempfile.mkdtemp(prefix="pose-cache-load-"))
+
+    uploads = _encode_uploads(args.resolution)
+    profiles = {
+        "gemini": LatencyProfile(args.gemini_median, args.gemini_p99,
+                                 1.0 if args.gemini_outage else args.error_rate, seed=0),
+        "stability": LatencyProfile(args.stability_median, args.stability_p99, args.error_rate, seed=1),
+    }
+
+    # Load the pose models and warm the import caches outside the measurement
+    run_level(1, 1, uploads, profiles, pose_cache)
+
+    levels = []
+    print(f"{'users':>5} {'req/s':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'pose p95':>9} "
+          f"{'gen p95':>8} {'degraded':>8} {'peak MB':>8}")
+    for concurrency in args.concurrency:
+        level = run_level(concurrency, args.requests_per_session, uploads, profiles, pose_cache)
+        levels.append(level)
+        latency = level["latency"]
+        print(f"{concurrency:5d} {level['throughput_rps']:7.2f} {level['error_rate']:7.1%} "
+              f"{latency['total'].get('p50_ms', float('nan')):8.0f} "
+              f"{latency['total'].get('p95_ms', float('nan')):8.0f} "
+              f"{latency['pose'].get('p95_ms', float('nan')):9.0f} "
+              f"{latency['generate'].get('p95_ms', float('nan')):8.0f} "
+              f"{level['degraded']:8d} {level['peak_rss_mb']:8.0f}")
+
+    report = {
+        "config": vars(args),
+        "levels": levels,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
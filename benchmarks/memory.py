@@ -0,0 +1,177 @@
+"""
+Peak memory per request for the image path (upload -> pose -> Gemini body
+-> Stability control image), bounded working copies vs. the old full-resolution path.
+
+Usage:
+    python -m benchmarks.memory [--resolutions 1024 4096 8192] [--output memory.json]
+                                [--max-peak-mb 400]
+
+Each scenario runs in a fresh interpreter that reads a pre-encoded JPEG upload;
+the reported peak is the growth of the process's max RSS over its post-import
+baseline. No network access is needed:
+request bodies are built and consumed locally.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _max_rss_mb() -> float:
+    # VmHWM starts fresh at exec; ru_maxrss (kilobytes on Linux) keeps the
+    # parent's high-water mark from before the fork, so it is only a fallback
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def _write_upload(resolution: int, directory: str) -> str:
+    """
+    Encode the fixture upload in the parent so decoding it doesn't count
+    against the child's baseline
+    """
+    from benchmarks import fixtures
+    path = os.path.join(directory, f"upload-{resolution}.jpg")
+    fixtures.person_image(resolution, "noisy").save(path, format="JPEG", quality=90)
+    return path
+
+def _legacy_request(pose_upload: bytes, style_upload: bytes, inference: bool):
+    """
+    The request path before per-request budgets: full-resolution decodes,
+    base64 strings and a json.dumps body
+    """
+    import base64
+    from PIL import Image
+    import image_generator
+    import pose_extractor
+
+    pose_image = Image.open(io.BytesIO(pose_upload))
+    style_image = Image.open(io.BytesIO(style_upload))
+    if inference:
+        pose_extractor.extract_pose(pose_image, cache=False)
+
+    pose_bytes, style_bytes = io.BytesIO(), io.BytesIO()
+    pose_image.save(pose_bytes, format='PNG')
+    style_image.save(style_bytes, format='PNG')
+    body = json.dumps({"contents": [{"parts": [
+        {"text": "prompt"},
+        {"inlineData": {"mimeType": "image/png", "data": base64.b64encode(pose_bytes.getvalue()).decode('utf-8')}},
+        {"inlineData": {"mimeType": "image/png", "data": base64.b64encode(style_bytes.getvalue()).decode('utf-8')}},
+    ]}]})
+    control = image_generator.pose_image_to_bytes(pose_image)
+    return len(body) + len(control)
+
+def _bounded_request(pose_upload: bytes, style_upload: bytes, inference: bool):
+    """
+    The current request path: draft-decoded working copies, streamed base64
+    """
+    import gemini_client
+    import image_budget
+    import image_generator
+    import pose_extractor
+
+    pose_image, _ = image_budget.open_reduced(io.BytesIO(pose_upload), image_budget.CONTROL_IMAGE_MAX_SIDE)
+    style_image, _ = image_budget.open_reduced(io.BytesIO(style_upload), image_budget.GEMINI_IMAGE_MAX_SIDE)
+    if inference:
+        pose_extractor.extract_pose(pose_image, cache=False)
+
+    body = gemini_client.StreamingJSONBody([
+        gemini_client.text_part("prompt"),
+        gemini_client.image_part(image_budget.encode_image(pose_image, 'PNG'), "image/png"),
+        gemini_client.image_part(image_budget.encode_image(style_image, 'PNG'), "image/png"),
+    ])
+    sent = sum(len(chunk) for chunk in body)
+    control = image_generator.pose_image_to_bytes(
+        image_budget.working_copy(pose_image, image_budget.CONTROL_IMAGE_MAX_SIDE))
+    return sent + len(control)
+
+def run_child(mode: str, upload_path: str, inference: bool):
+    """
+    Run one request in this process and print its memory usage as JSON
+    """
+    import logging
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, REPO_ROOT)
+
+    with open(upload_path, "rb") as f:
+        pose_upload = f.read()
+    style_upload = pose_upload
+    # Import everything up front so the baseline excludes module memory
+    import gemini_client, image_budget, image_generator, pose_extractor  # noqa: F401
+    if inference:
+        pose_extractor.get_mediapipe()
+        pose_extractor.get_cv2()
+
+    baseline = _max_rss_mb()
+    tracemalloc.start()
+    request = _legacy_request if mode == "legacy" else _bounded_request
+    payload = request(pose_upload, style_upload, inference)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        "peak_rss_growth_mb": round(max(0.0, _max_rss_mb() - baseline), 1),
+        "python_peak_mb": round(traced_peak / 2 ** 20, 1),
+        "payload_mb": round(payload / 2 ** 20, 2),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure peak memory per request")
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[1024, 2048, 4096, 8192])
+    parser.add_argument("--no-inference", action="store_true", help="Skip MediaPipe inference")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--max-peak-mb", type=float,
+                        help="Fail if a bounded request grows RSS by more than this")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "UPLOAD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], not args.no_inference)
+        return
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for resolution in args.resolutions:
+            upload = _write_upload(resolution, tmp)
+            for mode in ("legacy", "bounded"):
+                name = f"{mode}@{resolution}"
+                cmd = [sys.executable, "-m", "benchmarks.memory", "--child", mode, upload]
+                if args.no_inference:
+                    cmd.append("--no-inference")
+                proc = subprocess.run(cmd, cwd=REPO_ROOT, capture_output=True, text=True)
+                lines = proc.stdout.strip().splitlines()
+                if proc.returncode != 0 or not lines:
+                    report[name] = {"error": proc.stderr.strip()[-500:]}
+                else:
+                    report[name] = json.loads(lines[-1])
+                print(f"{mode:8s} {resolution:5d}px  {report[name]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_peak_mb is not None:
+        bounded = {name: r for name, r in report.items() if name.startswith("bounded")}
+        # A run without a measurement (e.g. it crashed) fails the check too
+        unmeasured = [name for name, r in bounded.items() if "peak_rss_growth_mb" not in r]
+        over = [name for name, r in bounded.items()
+                if name not in unmeasured and r["peak_rss_growth_mb"] > args.max_peak_mb]
+        for name in unmeasured:
+            print(f"REGRESSION: {name} has no measurement", file=sys.stderr)
+        for name in over:
+            print(f"REGRESSION: {name} exceeds {args.max_peak_mb} MB", file=sys.stderr)
+        if over or unmeasured:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Run the benchmark suite and compare against a previous run.
+
+Usage:
+    python -m benchmarks.run                         # writes benchmarks/results/<commit>.json
+    python -m benchmarks.run -k extract_pose         # only matching benchmarks
+    python -m benchmarks.run --compare benchmarks/results/<base>.json [--threshold 0.25]
+
+Exits with code 1 when a benchmark regressed beyond its threshold, failed,
+or is missing from the baseline.
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.common import compare, run_benchmarks
+
+BENCHMARK_MODULES = [
+    "benchmarks.bench_pose",
+    "benchmarks.bench_payload",
+    "benchmarks.bench_transport",
+]
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pose/payload benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7, help="Timing rounds per benchmark")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float,
+                        help="Override every benchmark's allowed slowdown (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(BENCHMARK_MODULES, args.filter, args.repeat)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{report['environment']['commit'][:12]}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Per-upstream circuit breakers.
+
+A breaker watches the outcome of recent calls to one upstream (Gemini,
+Stability). Once the failure rate over the window crosses the threshold it
+opens and calls fail immediately with CircuitOpenError instead of waiting for
+their timeouts. After CIRCUIT_OPEN_SECONDS one probe call is let through
+(half-open): success closes the circuit, failure reopens it. Outcomes are
+reported with the token acquire() returned, so a call admitted before the
+circuit opened cannot decide the probe's outcome.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Open when at least this fraction of the last CIRCUIT_WINDOW calls failed...
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+# ...once at least this many calls are in the window
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+# Seconds to fail fast before letting a probe call through
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_breakers_lock = threading.Lock()
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling an upstream whose circuit is open
+    """
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one upstream. Callers call acquire()
+    before the upstream call and record_success()/record_failure() with the
+    returned token after it.
+    """
+
+    def __init__(self, name: str, failure_rate: float = CIRCUIT_FAILURE_RATE,
+                 window: int = CIRCUIT_WINDOW, min_calls: int = CIRCUIT_MIN_CALLS,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._clock = clock
+        # True for each failed call
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        # Bumped every time the circuit opens; tokens from older epochs are stale
+        self._epoch = 0
+        self.calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def acquire(self) -> Tuple[int, bool]:
+        """
+        Admit a call or raise CircuitOpenError. While half-open only one
+        probe call is admitted at a time. Returns the token to pass to
+        record_success()/record_failure().
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if self._clock() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self.state = HALF_OPEN
+                self._probing = False
+                logger.info(f"{self.name} circuit half-open, probing")
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open")
+                self._probing = True
+                self.calls += 1
+                return self._epoch, True
+            self.calls += 1
+            return self._epoch, False
+
+    def available(self) -> bool:
+        """
+        Whether acquire() would admit a call right now (without admitting one)
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return self._clock() - self._opened_at >= self.open_seconds
+            return not (self.state == HALF_OPEN and self._probing)
+
+    def _stale(self, token: Optional[Tuple[int, bool]]) -> bool:
+        """
+        Whether an outcome must not change the state: it belongs to a call
+        admitted before the circuit last opened, or it is not the probe's
+        while half-open. Calls without a token are taken as current.
+        """
+        if token is None:
+            return False
+        epoch, probe = token
+        return epoch != self._epoch or (self.state == HALF_OPEN and not probe)
+
+    def record_success(self, token: Optional[Tuple[int, bool]] = None):
+        with self._lock:
+            if self._stale(token):
+                return
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info(f"{self.name} circuit closed")
+            self._probing = False
+            self._outcomes.append(False)
+
+    def record_failure(self, token: Optional[Tuple[int, bool]] = None):
+        with self._lock:
+            if self._stale(token):
+                return
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) >= self.failure_rate * len(self._outcomes)):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+        self._epoch += 1
+        self.times_opened += 1
+        logger.warning(f"{self.name} circuit opened for {self.open_seconds:.0f}s")
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "window_failure_rate": sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0,
+            }
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Return the process-wide breaker for an upstream
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+def reset_all():
+    """
+    Forget every process-wide breaker; the next get_breaker() starts closed
+    with an empty window
+    """
+    with _breakers_lock:
+        _breakers.clear()
+
+def report_all() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.report() for breaker in breakers}
@@ -0,0 +1,219 @@
+"""
+Shared-memory frame transport between UI processes and pose workers.
+
+The producer owns a FrameRing: one shared-memory segment split into
+preallocated slots. A frame is written straight into a free slot and only a
+small handle (ring name, slot, shape, dtype) is sent to the worker, which
+maps the same segment and reads the frame in place. When all slots are in
+use, producers block (backpressure) instead of allocating more memory.
+"""
+import atexit
+import logging
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+# CPython's private shm_open wrapper (what SharedMemory itself uses on POSIX).
+# Checked on CPython 3.11.7; from 3.13 SharedMemory(track=False) is used instead.
+try:
+    import _posixshmem
+except ImportError:
+    _posixshmem = None
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+FRAME_RING_SLOTS = int(os.getenv("FRAME_RING_SLOTS", "8"))
+# Default slot size fits a 1024x1024 RGB frame (extract_pose's working size)
+FRAME_RING_SLOT_BYTES = int(os.getenv("FRAME_RING_SLOT_BYTES", str(1024 * 1024 * 3)))
+# Rings a worker process keeps mapped
+ATTACHED_RINGS = 16
+
+_default_ring = None
+_default_ring_lock = threading.Lock()
+
+_attached = OrderedDict()
+_attached_lock = threading.Lock()
+
+class RingFullError(TimeoutError):
+    """
+    No slot became free within the timeout
+    """
+
+class _UntrackedSegment:
+    """
+    Read/write mapping of an existing POSIX segment that never touches the
+    resource tracker (what SharedMemory(track=False) does from Python 3.13)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        fd = _posixshmem.shm_open("/" + name, os.O_RDWR, mode=0o600)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+def attach_shared_memory(name: str):
+    """
+    Attach to a segment owned by another process without registering it
+    with the resource tracker, which would otherwise unlink it when this
+    process exits. Unregistering afterwards is not an option: a tracker
+    shared with the owner (e.g. in a spawned child) would drop the owner's
+    registration too. Returns an object with .buf and .close().
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    if os.name != "posix":
+        return shared_memory.SharedMemory(name=name)  # Only POSIX segments are tracked
+    if _posixshmem is not None:
+        return _UntrackedSegment(name)
+    # No private module on this interpreter: register, then unregister. Safe
+    # as long as this process does not share the owner's tracker.
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+class FrameHandle:
+    """
+    A frame stored in one ring slot. `array` is a writable view of the slot.
+    """
+
+    def __init__(self, ring: "FrameRing", slot: int, shape: Tuple[int, ...], dtype: np.dtype):
+        self.ring = ring
+        self.slot = slot
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=ring.shm.buf,
+                                offset=slot * ring.slot_bytes)
+
+    def to_message(self) -> Dict:
+        """
+        JSON-serializable handle for the consumer (see view_frame)
+        """
+        return {
+            "ring": self.ring.name,
+            "offset": self.slot * self.ring.slot_bytes,
+            "slot": self.slot,
+            "shape": list(self.shape),
+            "dtype": self.dtype.str,
+        }
+
+class FrameRing:
+    """
+    Ring of preallocated shared-memory frame slots, owned by the producer process
+    """
+
+    def __init__(self, slots: int = FRAME_RING_SLOTS, slot_bytes: int = FRAME_RING_SLOT_BYTES):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.name = self.shm.name
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+        self._available = threading.Semaphore(slots)
+        self.waits = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8,
+                timeout: Optional[float] = None) -> FrameHandle:
+        """
+        Reserve a slot for a frame, blocking while the ring is full
+        """
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {nbytes} bytes exceeds the ring's {self.slot_bytes}-byte slots")
+
+        if not self._available.acquire(blocking=False):
+            self.waits += 1
+            if not self._available.acquire(timeout=timeout):
+                raise RingFullError(f"No free frame slot after {timeout}s")
+        with self._lock:
+            slot = self._free.pop()
+        return FrameHandle(self, slot, shape, dtype)
+
+    def release(self, handle: FrameHandle):
+        """
+        Return a slot to the ring
+        """
+        handle.array = None
+        with self._lock:
+            self._free.append(handle.slot)
+        self._available.release()
+
+    def put(self, frame: np.ndarray, timeout: Optional[float] = None) -> FrameHandle:
+        """
+        Copy a frame into a free slot (caller releases the handle)
+        """
+        handle = self.acquire(frame.shape, frame.dtype, timeout)
+        handle.array[...] = frame
+        return handle
+
+    @contextmanager
+    def frame(self, shape: Tuple[int, ...], dtype=np.uint8,
+              timeout: Optional[float] = None) -> Iterator[FrameHandle]:
+        """
+        Context manager around acquire/release
+        """
+        handle = self.acquire(shape, dtype, timeout)
+        try:
+            yield handle
+        finally:
+            self.release(handle)
+
+    def close(self):
+        """
+        Unmap and remove the segment
+        """
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+def get_frame_ring() -> FrameRing:
+    """
+    Return this process's frame ring, creating it on first use
+    """
+    global _default_ring
+    with _default_ring_lock:
+        if _default_ring is None:
+            _default_ring = FrameRing()
+            atexit.register(_default_ring.close)
+        return _default_ring
+
+def view_frame(message: Dict) -> np.ndarray:
+    """
+    Consumer side: read-only view of the frame a handle message points to.
+    Rings are mapped once per process and kept for later frames.
+    """
+    name = message["ring"]
+    with _attached_lock:
+        shm = _attached.get(name)
+        if shm is None:
+            shm = attach_shared_memory(name)
+            _attached[name] = shm
+            while len(_attached) > ATTACHED_RINGS:
+                try:
+                    _attached.popitem(last=False)[1].close()
+                except BufferError:
+                    # A frame view is still alive; the mapping goes with it
+                    pass
+        _attached.move_to_end(name)
+
+    frame = np.ndarray(tuple(message["shape"]), dtype=np.dtype(message["dtype"]),
+                       buffer=shm.buf, offset=message["offset"])
+    frame.flags.writeable = False
+    return frame
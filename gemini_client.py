@@ -0,0 +1,399 @@
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from circuit_breaker import CircuitBreaker, get_breaker
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+# Raw bytes base64-encoded per chunk while streaming (multiple of 3)
+BASE64_CHUNK_BYTES = 3 * 16 * 1024
+
+# (connect, read) timeout in seconds for every Gemini request
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "60"))
+
+# A duplicate request is sent when the first has not answered by this
+# percentile of recent latencies...
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+# ...or by this delay until enough latencies have been observed
+GEMINI_HEDGE_INITIAL_DELAY = float(os.getenv("GEMINI_HEDGE_INITIAL_DELAY", "8"))
+GEMINI_HEDGE_MIN_SAMPLES = 20
+GEMINI_HEDGE_WINDOW = 200
+# Hedges may add at most this fraction of extra requests (0 disables hedging)
+GEMINI_HEDGE_BUDGET = float(os.getenv("GEMINI_HEDGE_BUDGET", "0.1"))
+# Hedges in flight at once; they run on their own pool so that abandoned
+# attempts cannot hold up primary requests
+GEMINI_HEDGE_WORKERS = int(os.getenv("GEMINI_HEDGE_WORKERS", "4"))
+
+def gemini_url() -> str:
+    return f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:generateContent?key={GOOGLE_API_KEY}"
+
+def text_part(text: str) -> Dict:
+    return {"text": text}
+
+def image_part(data: Union[bytes, str], mime_type: str) -> Dict:
+    """
+    Inline image part. data is raw image bytes (base64-encoded while the
+    body streams) or an already base64-encoded string.
+    """
+    return {"inlineData": {"mimeType": mime_type, "data": data}}
+
+class StreamingJSONBody:
+    """
+    generateContent request body that base64-encodes inline images chunk by
+    chunk while it is sent, so neither the base64 strings nor the full JSON
+    document are ever built in memory. len() gives the exact Content-Length.
+    """
+
+    def __init__(self, parts: List[Dict]):
+        self._segments = []
+        self._length = 0
+
+        self._add(b'{"contents":[{"parts":[')
+        for i, part in enumerate(parts):
+            if i:
+                self._add(b",")
+            inline = part.get("inlineData")
+            if inline is not None and isinstance(inline["data"], (bytes, bytearray, memoryview)):
+                self._add(b'{"inlineData":{"mimeType":' + json.dumps(inline["mimeType"]).encode() + b',"data":"')
+                data = memoryview(inline["data"])
+                self._segments.append(data)
+                self._length += 4 * ((len(data) + 2) // 3)
+                self._add(b'"}}')
+            else:
+                self._add(json.dumps(part, ensure_ascii=False).encode("utf-8"))
+        self._add(b"]}]}")
+
+    def _add(self, chunk: bytes):
+        self._segments.append(chunk)
+        self._length += len(chunk)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for segment in self._segments:
+            if isinstance(segment, memoryview):
+                for offset in range(0, len(segment), BASE64_CHUNK_BYTES):
+                    yield base64.b64encode(segment[offset:offset + BASE64_CHUNK_BYTES])
+            else:
+                yield segment
+
+class HedgePolicy:
+    """
+    Decides when to hedge a Gemini call and keeps hedging metrics.
+
+    The hedge delay tracks a percentile of recent successful latencies, and
+    hedges are limited to a fraction of all requests so a slow upstream
+    does not get twice the load.
+    """
+
+    def __init__(self, percentile: float = GEMINI_HEDGE_PERCENTILE,
+                 initial_delay: float = GEMINI_HEDGE_INITIAL_DELAY,
+                 budget: float = GEMINI_HEDGE_BUDGET,
+                 window: int = GEMINI_HEDGE_WINDOW,
+                 min_samples: int = GEMINI_HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.errors = 0
+
+    def delay(self) -> float:
+        """
+        Seconds to wait for the first attempt before hedging
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            return float(np.percentile(self._latencies, self.percentile))
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def start_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_hedge(self) -> bool:
+        """
+        Spend hedge budget if any is left
+        """
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                self.budget_denied += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def record_outcome(self, hedge_won: bool = False, error: bool = False):
+        with self._lock:
+            self.hedge_wins += int(hedge_won)
+            self.errors += int(error)
+
+    def report(self) -> Dict[str, float]:
+        """
+        Hedging metrics
+        """
+        delay = self.delay()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+                "extra_load": self.hedges / self.requests if self.requests else 0.0,
+                "budget_denied": self.budget_denied,
+                "errors": self.errors,
+                "hedge_delay_seconds": delay,
+                "latency_samples": len(self._latencies),
+            }
+
+class _Attempt:
+    """
+    One generateContent attempt that another thread can abort: cancel()
+    shuts down the attempt's sockets, so its blocked request fails at once
+    and the upstream sees the connection close
+    """
+
+    def __init__(self):
+        self._sockets = []
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def track(self, sock):
+        with self._lock:
+            self._sockets.append(sock)
+            cancelled = self._cancelled
+        if cancelled:
+            _shutdown(sock)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            sockets = list(self._sockets)
+        for sock in sockets:
+            _shutdown(sock)
+
+def _shutdown(sock):
+    try:
+        sock.shutdown(2)  # SHUT_RDWR
+    except OSError:
+        pass
+
+# The attempt whose request the current thread is sending (see _post)
+_attempt_state = threading.local()
+
+class _TrackedConnectionMixin:
+    def _new_conn(self):
+        sock = super()._new_conn()
+        attempt = getattr(_attempt_state, "attempt", None)
+        if attempt is not None:
+            attempt.track(sock)
+        return sock
+
+class _TrackedHTTPConnection(_TrackedConnectionMixin, HTTPConnection):
+    pass
+
+class _TrackedHTTPSConnection(_TrackedConnectionMixin, HTTPSConnection):
+    pass
+
+class _TrackedHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+class _TrackedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+class _AttemptAdapter(HTTPAdapter):
+    """
+    Transport adapter whose new sockets are registered with the current attempt
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TrackedHTTPPool, "https": _TrackedHTTPSPool}
+
+_hedge_policy = HedgePolicy()
+_executor = None
+_hedge_executor = None
+_hedge_slots = threading.BoundedSemaphore(GEMINI_HEDGE_WORKERS)
+_executor_lock = threading.Lock()
+
+def get_hedge_policy() -> HedgePolicy:
+    """
+    Return the process-wide hedge policy (metrics are shared by all sessions)
+    """
+    return _hedge_policy
+
+def reset_hedge_policy() -> HedgePolicy:
+    """
+    Replace the process-wide hedge policy with a fresh one (no latency
+    samples, initial hedge delay, zeroed metrics) and return it
+    """
+    global _hedge_policy
+    _hedge_policy = HedgePolicy()
+    return _hedge_policy
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="gemini")
+        return _executor
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=GEMINI_HEDGE_WORKERS,
+                                                 thread_name_prefix="gemini-hedge")
+        return _hedge_executor
+
+def _submit_hedge(body: StreamingJSONBody, timeout, policy: "HedgePolicy", attempt: _Attempt):
+    """
+    Send a hedged attempt on the hedge pool, or return None when all
+    GEMINI_HEDGE_WORKERS slots are busy or the policy's budget is spent
+    """
+    if not _hedge_slots.acquire(blocking=False):
+        logger.debug("All hedge slots are busy, not hedging")
+        return None
+    if not policy.try_hedge():
+        _hedge_slots.release()
+        return None
+    future = _get_hedge_executor().submit(_post, body, timeout, policy, attempt)
+    future.add_done_callback(lambda _: _hedge_slots.release())
+    return future
+
+def _post(body: StreamingJSONBody, timeout, policy: HedgePolicy,
+          attempt: Optional[_Attempt] = None) -> str:
+    """
+    One generateContent attempt: returns the first candidate's text
+    (raises on HTTP errors or empty responses). Successful attempts feed
+    their own latency into the policy, whether or not they win. Each attempt
+    has its own session and connection, which attempt.cancel() aborts.
+    """
+    start = time.monotonic()
+    _attempt_state.attempt = attempt
+    try:
+        with requests.Session() as session:
+            if attempt is not None:
+                session.mount("http://", _AttemptAdapter())
+                session.mount("https://", _AttemptAdapter())
+            response = session.post(
+                gemini_url(),
+                headers={'Content-Type': 'application/json'},
+                data=body,
+                timeout=timeout
+            )
+    finally:
+        _attempt_state.attempt = None
+
+    if not response.ok:
+        logger.error(f"Gemini API Response: {response.text}")
+        raise Exception(f"Gemini API error: {response.status_code}")
+
+    result = response.json()
+    if not result.get("candidates"):
+        raise Exception("No candidates in Gemini response")
+
+    text = result["candidates"][0]["content"]["parts"][0]["text"]
+    policy.record_latency(time.monotonic() - start)
+    return text
+
+def generate_content(parts: List[Dict], timeout=None, hedge: bool = True,
+                     policy: Optional[HedgePolicy] = None,
+                     breaker: Optional[CircuitBreaker] = None) -> str:
+    """
+    Call Gemini generateContent and return the first candidate's text
+    (raises on HTTP errors or empty responses).
+
+    If the call has not answered by the policy's hedge delay, a duplicate is
+    sent on the hedge pool (at most GEMINI_HEDGE_WORKERS in flight) and the
+    first valid response wins. The losing attempt's connection is shut down,
+    which ends its upstream request and frees its hedge slot. Every attempt is bounded by `timeout` (default:
+    GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT).
+
+    While the Gemini circuit breaker is open this raises CircuitOpenError
+    without sending anything.
+    """
+    breaker = breaker or get_breaker("gemini")
+    token = breaker.acquire()
+    try:
+        text = _generate_hedged(parts, timeout, hedge, policy)
+    except Exception:
+        breaker.record_failure(token)
+        raise
+    breaker.record_success(token)
+    return text
+
+def _generate_hedged(parts: List[Dict], timeout, hedge: bool, policy: Optional[HedgePolicy]) -> str:
+    body = StreamingJSONBody(parts)
+    timeout = timeout or (GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT)
+    policy = policy or _hedge_policy
+    policy.start_request()
+
+    if not hedge or policy.budget <= 0:
+        try:
+            return _post(body, timeout, policy)
+        except Exception:
+            policy.record_outcome(error=True)
+            raise
+
+    executor = _get_executor()
+    primary_attempt = _Attempt()
+    primary = executor.submit(_post, body, timeout, policy, primary_attempt)
+    attempts = {primary: primary_attempt}
+    pending = {primary}
+    hedged = False
+    done, _ = wait(pending, timeout=policy.delay())
+    if not done:
+        hedge_attempt = _Attempt()
+        hedge_future = _submit_hedge(body, timeout, policy, hedge_attempt)
+        if hedge_future is not None:
+            logger.debug("Gemini call is slow, sending a hedged request")
+            attempts[hedge_future] = hedge_attempt
+            pending.add(hedge_future)
+            hedged = True
+
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                text = future.result()
+            except Exception as e:
+                error = e
+                continue
+            policy.record_outcome(hedge_won=hedged and future is not primary)
+            for loser in pending:
+                attempts[loser].cancel()
+            return text
+
+    policy.record_outcome(error=True)
+    raise error
@@ -0,0 +1,83 @@
+import io
+import logging
+import math
+import os
+from typing import Tuple
+
+from PIL import Image
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Per-request image memory budget: every stage works on a copy no larger than
+# its limit, so a request never holds more than a few working copies
+# regardless of the upload's resolution.
+# Pose detection (extract_pose resizes to this anyway)
+POSE_WORKING_MAX_SIDE = 1024
+# Images sent to Gemini for analysis
+GEMINI_IMAGE_MAX_SIDE = int(os.getenv("GEMINI_IMAGE_MAX_SIDE", "1024"))
+# Control image sent to Stability AI (the output resolution does not depend on it)
+CONTROL_IMAGE_MAX_SIDE = int(os.getenv("CONTROL_IMAGE_MAX_SIDE", "2048"))
+# Upload previews
+PREVIEW_MAX_SIDE = 160
+
+def open_source(source) -> Tuple[Image.Image, bool]:
+    """
+    Open a path or file-like object; PIL images are returned as-is.
+    The flag tells whether the image was opened here (and may be drafted).
+    """
+    if isinstance(source, Image.Image):
+        return source, False
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return Image.open(source), True
+
+def open_reduced(source, max_side: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Decode an image at roughly max_side without decoding the full resolution
+    when avoidable. JPEGs use draft mode (DCT scaling at decode time),
+    other formats are shrunk with reduce().
+
+    Returns the RGB image and the (width, height) of the original.
+    """
+    image, owned = open_source(source)
+    full_size = image.size
+    ratio = max_side / max(full_size)
+
+    if owned and ratio < 1.0 and image.format == "JPEG":
+        image.draft("RGB", (math.ceil(full_size[0] * ratio), math.ceil(full_size[1] * ratio)))
+    image = image.convert("RGB")
+
+    factor = int(max(image.size) // max_side)
+    if factor >= 2:
+        image = image.reduce(factor)
+    if max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                             Image.BILINEAR)
+    return image, full_size
+
+def working_copy(image: Image.Image, max_side: int) -> Image.Image:
+    """
+    Return image unchanged if it fits in max_side, otherwise a downscaled RGB copy
+    """
+    if max(image.size) <= max_side and image.mode == "RGB":
+        return image
+    return open_reduced(image, max_side)[0]
+
+def encode_image(image: Image.Image, format: str = "PNG", max_side: int = GEMINI_IMAGE_MAX_SIDE,
+                 **save_kwargs) -> bytes:
+    """
+    Encode a working copy of image (at most max_side) and release the
+    intermediate buffer immediately
+    """
+    copy = working_copy(image, max_side)
+    if format == "JPEG" and copy.mode != "RGB":
+        copy = copy.convert("RGB")
+    buf = io.BytesIO()
+    copy.save(buf, format=format, **save_kwargs)
+    del copy
+    data = buf.getvalue()
+    buf.close()
+    return data
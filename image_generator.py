@@ -1,10 +1,17 @@
 import os
-import base64
+import hashlib
 import logging
 import io
 import json
 import requests
 from PIL import Image
+from circuit_breaker import get_breaker
+from gemini_client import generate_content, image_part, text_part
+from image_budget import CONTROL_IMAGE_MAX_SIDE, GEMINI_IMAGE_MAX_SIDE, encode_image, working_copy
+from local_prompt import compose_prompt
+from pose_descriptions import PoseDescriptions
+from result_store import generation_key, get_default_store, request_key, request_seed
+from style_cache import get_default_style_cache, style_digest
 
 # Initialize logging
 logging.basicConfig(level=logging.DEBUG)
@@ -12,7 +19,13 @@ logger = logging.getLogger(__name__)
 
 # API configuration
 STABILITY_KEY = os.getenv("STABILITY_KEY")
+STABILITY_API_BASE = os.getenv("STABILITY_API_BASE", "https://api.stability.ai")
+# (connect, read) timeout in seconds for Stability requests
+STABILITY_CONNECT_TIMEOUT = float(os.getenv("STABILITY_CONNECT_TIMEOUT", "5"))
+STABILITY_READ_TIMEOUT = float(os.getenv("STABILITY_READ_TIMEOUT", "120"))
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+# Weight of the sketch control image in Stability requests
+CONTROL_STRENGTH = 0.8
 
 def parse_gemini_response(response_text: str) -> dict:
     """
@@ -48,37 +61,39 @@ def parse_gemini_response(response_text: str) -> dict:
         logger.error(f"Response text: {response_text}")
         raise Exception(f"Failed to parse Gemini response: {str(e)}")
 
-def analyze_images_with_llm(pose_image: Image.Image, style_image: Image.Image):
+def analyze_images_with_llm(pose_image: Image.Image, style_image: Image.Image, pose_descriptions=None):
     """
     Use Gemini to analyze both images and provide detailed descriptions
+
+    pose_descriptions (from extract_pose) puts the measured joint angles in
+    the prompt in compact form, in place of asking Gemini to describe them.
     """
     try:
-        # Convert images to base64
-        pose_bytes = io.BytesIO()
-        style_bytes = io.BytesIO()
-        pose_image.save(pose_bytes, format='PNG')
-        style_image.save(style_bytes, format='PNG')
-
-        pose_base64 = base64.b64encode(pose_bytes.getvalue()).decode('utf-8')
-        style_base64 = base64.b64encode(style_bytes.getvalue()).decode('utf-8')
-
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GOOGLE_API_KEY}"
-
-        headers = {
-            'Content-Type': 'application/json'
-        }
+        # Downscaled PNG working copies; base64 is streamed into the request body
+        pose_png = encode_image(pose_image, 'PNG', GEMINI_IMAGE_MAX_SIDE)
+        style_png = encode_image(style_image, 'PNG', GEMINI_IMAGE_MAX_SIDE)
+
+        if isinstance(pose_descriptions, PoseDescriptions):
+            # The measured angles replace Gemini's own description of them
+            pose_section = f"""Joint angles are already measured (degrees): {pose_descriptions.compact()}
+Do not restate them. Describe only:
+- Body position and orientation
+- Gestures the angles do not capture"""
+            key_points = ""
+        else:
+            pose_section = """Describe:
+- Exact body position and orientation
+- Specific pose details and gestures
+- Key pose points and angles"""
+            key_points = ''',
+    "key_points": ["important angles and positions"]'''
 
-        data = {
-            "contents": [{
-                "parts":[{
-                    "text": """Please analyze these two images:
+        parts = [
+            text_part(f"""Please analyze these two images:
 
 FIRST IMAGE - POSE ONLY:
 Focus exclusively on body positioning and pose, ignore style and clothing.
-Describe:
-- Exact body position and orientation
-- Specific pose details and gestures
-- Key pose points and angles
+{pose_section}
 
 SECOND IMAGE - STYLE AND CLOTHING:
 Analyze complete visual style and clothing details.
@@ -100,57 +115,38 @@ Describe:
    - Background treatment
 
 Format response EXACTLY as follows:
-{
-  "pose_reference": {
+{{
+  "pose_reference": {{
     "body_position": "detailed position description",
-    "gestures": ["specific pose elements"],
-    "key_points": ["important angles and positions"]
-  },
-  "style_reference": {
-    "art_style": {
+    "gestures": ["specific pose elements"]{key_points}
+  }},
+  "style_reference": {{
+    "art_style": {{
       "type": "main style (anime/realistic/etc)",
       "technique": "artistic approach",
       "effects": ["visual effects"]
-    },
-    "clothing": {
+    }},
+    "clothing": {{
       "garments": ["all clothing items"],
       "colors": ["color details"],
       "materials": ["fabric and texture"],
       "accessories": ["decorative elements"]
-    },
-    "visuals": {
+    }},
+    "visuals": {{
       "lighting": "lighting description",
       "color_scheme": "overall color treatment",
       "background": "background style"
-    }
-  }
-}"""
-                }, {
-                    "inlineData": {
-                        "mimeType": "image/png",
-                        "data": pose_base64
-                    }
-                }, {
-                    "inlineData": {
-                        "mimeType": "image/png",
-                        "data": style_base64
-                    }
-                }]
-            }]
-        }
+    }}
+  }}
+}}"""),
+            image_part(pose_png, "image/png"),
+            image_part(style_png, "image/png")
+        ]
 
         logger.debug("Sending request to Gemini API")
-        response = requests.post(url, headers=headers, json=data)
-
-        if not response.ok:
-            logger.error(f"Gemini API Response: {response.text}")
-            raise Exception(f"Gemini API error: {response.status_code}")
-
-        result = response.json()
-        if not result.get("candidates"):
-            raise Exception("No candidates in Gemini response")
-
-        text_response = result["candidates"][0]["content"]["parts"][0]["text"]
+        text_response = generate_content(parts)
+        # Release the encoded images before parsing
+        del parts, pose_png, style_png
 
         # Extract JSON content
         start = text_response.find('{')
@@ -168,29 +164,20 @@ Format response EXACTLY as follows:
         logger.error(f"Full error context: {str(e.__class__.__name__)}")
         return None
 
-def generate_enhanced_prompt(analysis):
+def generate_enhanced_prompt(analysis, pose_descriptions=None):
     """
     Generate a detailed prompt based on the analysis
+
+    If Gemini fails, the prompt is composed locally from the analysis and the
+    pose descriptions; the result then has "source": "local".
     """
     try:
         if not analysis:
             logger.error("Analysis result is None")
-            return {
-                "main_prompt": "masterpiece, best quality, highly detailed, maintain exact pose",
-                "negative_prompt": "wrong pose, low quality, blurry, distorted",
-                "parameters": {"cfg_scale": 7, "steps": 20}
-            }
-
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GOOGLE_API_KEY}"
+            return dict(compose_prompt(None, pose_descriptions), source="local")
 
-        headers = {
-            'Content-Type': 'application/json'
-        }
-
-        data = {
-            "contents": [{
-                "parts":[{
-                    "text": f"""Create a detailed Stable Diffusion prompt combining the EXACT pose from first image with the COMPLETE style from second image.
+        parts = [
+            text_part(f"""Create a detailed Stable Diffusion prompt combining the EXACT pose from first image with the COMPLETE style from second image.
 
 Analysis:
 {json.dumps(analysis, indent=2)}
@@ -203,23 +190,11 @@ Return only this JSON structure:
     "cfg_scale": 7,
     "steps": 20
   }}
-}}"""
-                }]
-            }]
-        }
+}}""")
+        ]
 
         logger.debug("Sending prompt generation request to Gemini")
-        response = requests.post(url, headers=headers, json=data)
-
-        if not response.ok:
-            logger.error(f"Gemini API Response: {response.text}")
-            raise Exception(f"Gemini API error: {response.status_code}")
-
-        result = response.json()
-        if not result.get("candidates"):
-            raise Exception("No candidates in Gemini response")
-
-        text_response = result["candidates"][0]["content"]["parts"][0]["text"]
+        text_response = generate_content(parts)
 
         # Extract JSON content
         start = text_response.find('{')
@@ -241,72 +216,323 @@ Return only this JSON structure:
             raise
     except Exception as e:
         logger.error(f"Error generating enhanced prompt: {str(e)}")
-        # Return default prompt as fallback
-        return {
-            "main_prompt": "masterpiece, best quality, highly detailed, maintain exact pose, anime style",
-            "negative_prompt": "wrong pose, low quality, blurry, distorted",
-            "parameters": {"cfg_scale": 7, "steps": 20}
-        }
+        style_reference = analysis.get("style_reference") if isinstance(analysis, dict) else None
+        return dict(compose_prompt(style_reference, pose_descriptions), source="local")
 
-def generate_image_with_style(pose_image, style_image):
+def _response_json(text_response: str):
     """
-    Generate a new image that combines the pose from pose_image with the style from style_image
+    Parse the outermost JSON object in a Gemini response (raises if there is none)
+    """
+    start = text_response.find('{')
+    end = text_response.rfind('}') + 1
+    if start == -1 or end == 0:
+        raise Exception("No JSON content found in response")
+    return json.loads(text_response[start:end])
+
+def analyze_style_with_llm(style_image: Image.Image):
+    """
+    Style-only variant of analyze_images_with_llm: returns the
+    "style_reference" object for one style image, or None on failure
     """
     try:
-        # Get detailed analysis from Gemini
-        logger.info("Analyzing images with Gemini...")
-        analysis = analyze_images_with_llm(pose_image, style_image)
-        if not analysis:
-            raise Exception("Failed to analyze images")
+        style_png = encode_image(style_image, 'PNG', GEMINI_IMAGE_MAX_SIDE)
+        parts = [
+            text_part("""Analyze the complete visual style and clothing of this image.
+
+Format response EXACTLY as follows:
+{
+  "style_reference": {
+    "art_style": {
+      "type": "main style (anime/realistic/etc)",
+      "technique": "artistic approach",
+      "effects": ["visual effects"]
+    },
+    "clothing": {
+      "garments": ["all clothing items"],
+      "colors": ["color details"],
+      "materials": ["fabric and texture"],
+      "accessories": ["decorative elements"]
+    },
+    "visuals": {
+      "lighting": "lighting description",
+      "color_scheme": "overall color treatment",
+      "background": "background style"
+    }
+  }
+}"""),
+            image_part(style_png, "image/png")
+        ]
+        return _response_json(generate_content(parts))["style_reference"]
+    except Exception as e:
+        logger.error(f"Error in analyze_style_with_llm: {str(e)}")
+        return None
 
-        # Generate enhanced prompt
-        logger.info("Generating enhanced prompt...")
-        prompt_data = generate_enhanced_prompt(analysis)
-        if not prompt_data:
-            raise Exception("Failed to generate enhanced prompt")
+POSE_ONLY_PROMPT = """Describe only the body position and pose in this image, ignore style and clothing.
 
-        # API endpoint for generation
-        host = "https://api.stability.ai/v2beta/stable-image/control/sketch"
+Format response EXACTLY as follows:
+{
+  "pose_reference": {
+    "body_position": "detailed position description",
+    "gestures": ["specific pose elements"],
+    "key_points": ["important angles and positions"]
+  }
+}"""
 
-        # Prepare headers
-        headers = {
-            "Accept": "image/*",
-            "Authorization": f"Bearer {STABILITY_KEY}"
-        }
+# With measured angles the prompt asks for what they do not capture
+POSE_ONLY_MEASURED_PROMPT = """Describe only the body position and pose in this image, ignore style and clothing.
+Joint angles are already measured (degrees): {angles}
+Do not restate them.
 
-        # Send request with enhanced parameters
-        logger.info("Sending request to Stability AI...")
-        response = requests.post(
-            host,
-            headers=headers,
-            files={
-                "image": ("pose.png", pose_image_to_bytes(pose_image), "image/png")
-            },
-            data={
-                "prompt": prompt_data["main_prompt"],
-                "negative_prompt": prompt_data["negative_prompt"],
-                "cfg_scale": prompt_data["parameters"]["cfg_scale"],
-                "steps": prompt_data["parameters"]["steps"],
-                "control_strength": 0.8,
-                "seed": 0,
-                "output_format": "png"
-            }
-        )
+Format response EXACTLY as follows:
+{{
+  "pose_reference": {{
+    "body_position": "detailed position description",
+    "gestures": ["gestures the angles do not capture"]
+  }}
+}}"""
 
-        if not response.ok:
-            logger.error(f"API Response: {response.text}")
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+def analyze_pose_with_llm(pose_image: Image.Image, pose_descriptions=None):
+    """
+    Pose-only variant of analyze_images_with_llm: returns the
+    "pose_reference" object for one pose image, or None on failure
+    """
+    try:
+        pose_png = encode_image(pose_image, 'PNG', GEMINI_IMAGE_MAX_SIDE)
+        parts = [
+            text_part(POSE_ONLY_MEASURED_PROMPT.format(angles=pose_descriptions.compact())
+                      if isinstance(pose_descriptions, PoseDescriptions) else POSE_ONLY_PROMPT),
+            image_part(pose_png, "image/png")
+        ]
+        return _response_json(generate_content(parts))["pose_reference"]
+    except Exception as e:
+        logger.error(f"Error in analyze_pose_with_llm: {str(e)}")
+        return None
 
-        # Process response
-        img = Image.open(io.BytesIO(response.content))
-        logger.info("Successfully generated styled image")
+def generate_batch_prompts(style_reference, poses):
+    """
+    Compose prompts for several poses sharing one style in a single Gemini
+    call. poses is a list of (pose_reference, pose_descriptions). Returns
+    one prompt data dict per pose, or None if the call or its answer fails.
+    """
+    try:
+        pose_lines = []
+        for i, (pose_reference, pose_descriptions) in enumerate(poses):
+            measured = pose_descriptions.compact() if isinstance(pose_descriptions, PoseDescriptions) else ""
+            pose_lines.append(f"{i}: {json.dumps(pose_reference or {}, ensure_ascii=False)} {measured}".rstrip())
 
-        return img
+        parts = [
+            text_part(f"""Create one Stable Diffusion prompt per pose below, each combining that EXACT pose with the COMPLETE shared style.
+
+Style:
+{json.dumps(style_reference or {}, ensure_ascii=False)}
+
+Poses (index: analysis, measured joint angles in degrees):
+{chr(10).join(pose_lines)}
+
+Return only this JSON structure, with exactly {len(poses)} prompts in pose order:
+{{
+  "prompts": [
+    {{
+      "main_prompt": "masterpiece, best quality, highly detailed, (exact art style), [detailed clothing], [precise pose], [visual effects]",
+      "negative_prompt": "wrong pose, wrong style, low quality, blurry, distorted"
+    }}
+  ],
+  "parameters": {{
+    "cfg_scale": 7,
+    "steps": 20
+  }}
+}}""")
+        ]
+        result = _response_json(generate_content(parts))
+        prompts = result["prompts"]
+        if len(prompts) != len(poses):
+            raise Exception(f"Expected {len(poses)} prompts, got {len(prompts)}")
+        parameters = result.get("parameters") or {"cfg_scale": 7, "steps": 20}
+        return [
+            {"main_prompt": prompt["main_prompt"], "negative_prompt": prompt["negative_prompt"],
+             "parameters": dict(parameters)}
+            for prompt in prompts
+        ]
+    except Exception as e:
+        logger.error(f"Error in generate_batch_prompts: {str(e)}")
+        return None
+
+def post_stability(host: str, **kwargs) -> requests.Response:
+    """
+    POST to a Stability endpoint through its circuit breaker, bounded by
+    STABILITY_CONNECT_TIMEOUT/STABILITY_READ_TIMEOUT. Any exception (connection
+    errors, timeouts, ...), 429 and 5xx count as upstream failures, so a probe
+    call always reports its outcome; while the circuit is open this raises
+    CircuitOpenError without sending anything.
+    """
+    breaker = get_breaker("stability")
+    token = breaker.acquire()
+    try:
+        response = requests.post(host, timeout=(STABILITY_CONNECT_TIMEOUT, STABILITY_READ_TIMEOUT), **kwargs)
+    except Exception:
+        breaker.record_failure(token)
+        raise
+    if response.status_code == 429 or response.status_code >= 500:
+        breaker.record_failure(token)
+    else:
+        breaker.record_success(token)
+    return response
+
+def generate_image_with_style(pose_image, style_image, seed=0, store=None, pose_descriptions=None):
+    """
+    Generate a new image that combines the pose from pose_image with the style from style_image
+
+    seed=None derives a fixed seed from the two images, so that identical
+    uploads are reproducible. With a non-zero seed, a request already
+    generated from the same control image, style image and seed is served
+    from the result store before any Gemini call (store=False bypasses it).
+    Seed 0 asks Stability for a random seed and is never stored.
+    The returned image's info carries generation_key, seed and finish_reason,
+    and degraded=True when the prompt was composed locally.
+
+    Degraded mode: if Gemini is down (or its circuit is open) the prompt is
+    composed locally from the last cached analysis of this style image and
+    the pose descriptions, instead of failing the request.
+    """
+    try:
+        if store is None:
+            store = get_default_store()
+        style_cache = get_default_style_cache()
+        style_key = style_digest(style_image)
+
+        control_image = pose_image_to_bytes(working_copy(pose_image, CONTROL_IMAGE_MAX_SIDE))
+        if seed is None:
+            seed = request_seed(hashlib.sha256(control_image).hexdigest(), style_key)
+        request = request_key(control_image, style_key, CONTROL_STRENGTH, seed) if store and seed else None
+        if request:
+            stored = store.get_request(request)
+            if stored:
+                img, metadata = stored
+                logger.info(f"Returning stored result {metadata.get('key')} for request {request}")
+                img.info.update(generation_key=metadata.get("key"), seed=metadata.get("seed"),
+                                finish_reason=metadata.get("finish_reason"), degraded=False)
+                return img
+
+        # Get detailed analysis from Gemini
+        logger.info("Analyzing images with Gemini...")
+        analysis = analyze_images_with_llm(pose_image, style_image, pose_descriptions)
+        if analysis:
+            if analysis.get("style_reference"):
+                style_cache.put(style_key, analysis["style_reference"])
+
+            # Generate enhanced prompt
+            logger.info("Generating enhanced prompt...")
+            prompt_data = generate_enhanced_prompt(analysis, pose_descriptions)
+        else:
+            logger.warning("Gemini analysis unavailable, composing the prompt locally")
+            prompt_data = dict(compose_prompt(style_cache.get(style_key), pose_descriptions), source="local")
+
+        return generate_from_prompt(pose_image, prompt_data, seed, store,
+                                    request=request, control_image=control_image)
 
     except Exception as e:
         logger.error(f"Error in generate_image_with_style: {str(e)}")
         raise Exception(f"Failed to generate styled image: {str(e)}")
 
+def generate_from_prompt(pose_image, prompt_data, seed=0, store=None, request=None, control_image=None):
+    """
+    Generate with Stability AI from composed prompt data, using pose_image as
+    the sketch control image. Raises on failure.
+
+    Identical requests with a non-zero seed are served from the result store
+    (store=False bypasses it). A non-degraded result is also linked to the
+    request key, if given. Prompt data with "source": "local" marks the
+    result degraded.
+    """
+    if store is None:
+        store = get_default_store()
+    if not seed:
+        store = False  # Stability picks a random seed: the output is not reproducible
+    degraded = prompt_data.get("source") == "local"
+
+    if control_image is None:
+        control_image = pose_image_to_bytes(working_copy(pose_image, CONTROL_IMAGE_MAX_SIDE))
+    control_strength = CONTROL_STRENGTH
+    key = generation_key(
+        control_image,
+        prompt_data["main_prompt"],
+        prompt_data["negative_prompt"],
+        prompt_data["parameters"]["cfg_scale"],
+        prompt_data["parameters"]["steps"],
+        control_strength,
+        seed
+    )
+    if store:
+        stored = store.get(key)
+        if stored:
+            img, metadata = stored
+            logger.info(f"Returning stored result {key}")
+            img.info.update(generation_key=key, seed=metadata.get("seed"),
+                            finish_reason=metadata.get("finish_reason"), degraded=degraded)
+            return img
+
+    # API endpoint for generation
+    host = f"{STABILITY_API_BASE}/v2beta/stable-image/control/sketch"
+
+    # Prepare headers
+    headers = {
+        "Accept": "image/*",
+        "Authorization": f"Bearer {STABILITY_KEY}"
+    }
+
+    # Send request with enhanced parameters
+    logger.info("Sending request to Stability AI...")
+    response = post_stability(
+        host,
+        headers=headers,
+        files={
+            "image": ("pose.png", control_image, "image/png")
+        },
+        data={
+            "prompt": prompt_data["main_prompt"],
+            "negative_prompt": prompt_data["negative_prompt"],
+            "cfg_scale": prompt_data["parameters"]["cfg_scale"],
+            "steps": prompt_data["parameters"]["steps"],
+            "control_strength": control_strength,
+            "seed": seed,
+            "output_format": "png"
+        }
+    )
+
+    if not response.ok:
+        logger.error(f"API Response: {response.text}")
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    finish_reason = response.headers.get("finish-reason")
+    response_seed = response.headers.get("seed")
+    if finish_reason == 'CONTENT_FILTERED':
+        raise Warning("Generation failed NSFW classifier")
+
+    # Process response
+    img = Image.open(io.BytesIO(response.content))
+    logger.info("Successfully generated styled image")
+
+    if store:
+        store.put(key, response.content, {
+            "endpoint": host,
+            "control_sha256": hashlib.sha256(control_image).hexdigest(),
+            "prompt": prompt_data["main_prompt"],
+            "negative_prompt": prompt_data["negative_prompt"],
+            "cfg_scale": prompt_data["parameters"]["cfg_scale"],
+            "steps": prompt_data["parameters"]["steps"],
+            "control_strength": control_strength,
+            "requested_seed": seed,
+            "seed": response_seed,
+            "finish_reason": finish_reason,
+            "degraded": degraded,
+        })
+        if request and not degraded:
+            store.link_request(request, key)
+    img.info.update(generation_key=key, seed=response_seed, finish_reason=finish_reason,
+                    degraded=degraded)
+
+    return img
+
 def pose_image_to_bytes(image):
     """Convert PIL Image to bytes for API request"""
     buf = io.BytesIO()
@@ -323,7 +549,7 @@ def generate_controlnet_openpose(pose_image, style_prompt):
             pose_image.save(tmp_file.name, format='PNG')
 
         # API endpoint for ultra generation
-        host = "https://api.stability.ai/v2beta/stable-image/generate/ultra"
+        host = f"{STABILITY_API_BASE}/v2beta/stable-image/generate/ultra"
 
         headers = {
             "Accept": "image/*",
@@ -337,7 +563,7 @@ def generate_controlnet_openpose(pose_image, style_prompt):
         }
 
         # Send request
-        response = requests.post(
+        response = post_stability(
             host,
             headers=headers,
             files={"none": ""},
@@ -383,7 +609,7 @@ def generate_image(pose_image, style_prompt, system_prompt):
             logger.debug(f"Input pose image saved to temporary file: {tmp_file.name}")
 
         # Prepare request parameters
-        host = "https://api.stability.ai/v2beta/stable-image/control/sketch"
+        host = f"{STABILITY_API_BASE}/v2beta/stable-image/control/sketch"
 
         files = {}
         params = {
@@ -407,7 +633,7 @@ def generate_image(pose_image, style_prompt, system_prompt):
             files["image"] = open(params["image"], "rb")
             params.pop("image")
 
-        response = requests.post(
+        response = post_stability(
             host,
             headers=headers,
             files=files,
@@ -0,0 +1,64 @@
+"""
+Stable Diffusion prompts composed locally from a style analysis and the
+measured pose, in the shape generate_enhanced_prompt returns. Used when
+Gemini is unavailable and for batches that share one style analysis.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from pose_descriptions import PoseDescriptions
+
+BASE_TERMS = ["masterpiece", "best quality", "highly detailed", "maintain exact pose"]
+NEGATIVE_PROMPT = "wrong pose, wrong style, low quality, blurry, distorted"
+DEFAULT_PARAMETERS = {"cfg_scale": 7, "steps": 20}
+
+def _terms(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [term for item in value.values() for term in _terms(item)]
+    if isinstance(value, Iterable):
+        return [term for item in value for term in _terms(item)]
+    return [str(value)]
+
+def style_terms(style_reference: Optional[Dict]) -> List[str]:
+    """
+    Prompt terms from a Gemini "style_reference" object: art style first,
+    then clothing, then lighting and background
+    """
+    if not style_reference:
+        return []
+    return (_terms(style_reference.get("art_style"))
+            + _terms(style_reference.get("clothing"))
+            + _terms(style_reference.get("visuals")))
+
+def pose_terms(pose_descriptions) -> List[str]:
+    """
+    Prompt terms for the limbs whose bend was classified, e.g. "left knee slightly bent"
+    """
+    if not isinstance(pose_descriptions, PoseDescriptions):
+        return []
+    return [
+        f"{joint.replace('_', ' ')} {category.replace('_', ' ')}"
+        for joint, category, _ in pose_descriptions.records
+        if category in ("straight", "slightly_bent", "bent")
+    ]
+
+def compose_prompt(style_reference: Optional[Dict] = None, pose_descriptions=None,
+                   pose_reference: Optional[Dict] = None) -> Dict:
+    """
+    Prompt data ({"main_prompt", "negative_prompt", "parameters"}) without a
+    Gemini call. pose_reference is a Gemini "pose_reference" object, if any.
+    """
+    terms = []
+    for term in (BASE_TERMS + style_terms(style_reference) + _terms(pose_reference)
+                 + pose_terms(pose_descriptions)):
+        term = term.strip()
+        if term and term.lower() not in (t.lower() for t in terms):
+            terms.append(term)
+    return {
+        "main_prompt": ", ".join(terms),
+        "negative_prompt": NEGATIVE_PROMPT,
+        "parameters": dict(DEFAULT_PARAMETERS),
+    }
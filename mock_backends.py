@@ -0,0 +1,241 @@
+"""
+Local stand-ins for the upstream APIs with configurable latency and errors,
+for exercising hedging, timeouts and load without network access.
+
+Run it with:
+    python -m mock_backends --port 8765 --median 0.5 --p99 6 --error-rate 0.01
+
+and point the app at it with GEMINI_API_BASE=http://127.0.0.1:8765 and
+STABILITY_API_BASE=http://127.0.0.1:8765.
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z99 = 2.326
+
+# Canned Gemini answer covering the JSON shapes the app parses
+MOCK_GEMINI_RESPONSE = {
+    "pose_reference": {
+        "body_position": "standing, facing the viewer",
+        "gestures": ["arms relaxed at the sides"],
+        "key_points": ["weight evenly on both feet"]
+    },
+    "style_reference": {
+        "art_style": {"type": "anime", "technique": "cel shading", "effects": ["soft glow"]},
+        "clothing": {
+            "garments": ["school uniform"],
+            "colors": ["navy", "white"],
+            "materials": ["cotton"],
+            "accessories": ["red ribbon"]
+        },
+        "visuals": {
+            "lighting": "soft daylight",
+            "color_scheme": "pastel",
+            "background": "plain"
+        }
+    },
+    "pose_analysis": {
+        "current_pose": "自然な立ちポーズ",
+        "strong_points": ["安定した重心"],
+        "suggestions": []
+    },
+    "main_prompt": "masterpiece, best quality, highly detailed, anime, cel shading, school uniform, standing",
+    "negative_prompt": "wrong pose, wrong style, low quality, blurry, distorted",
+    "parameters": {"cfg_scale": 7, "steps": 20}
+}
+
+# Batched prompt requests ask for "exactly N prompts"
+_BATCH_PROMPTS = re.compile(rb"exactly (\d+) prompts")
+
+def mock_gemini_text(request_body: bytes) -> str:
+    """
+    Canned answer text; batched prompt requests get as many prompts as they ask for
+    """
+    response = MOCK_GEMINI_RESPONSE
+    match = _BATCH_PROMPTS.search(request_body)
+    if match:
+        prompt = {key: MOCK_GEMINI_RESPONSE[key] for key in ("main_prompt", "negative_prompt")}
+        response = dict(response, prompts=[prompt] * int(match.group(1)))
+    return json.dumps(response, ensure_ascii=False)
+
+@lru_cache(maxsize=1)
+def mock_generated_png() -> bytes:
+    """
+    Stand-in Stability result: a 1024x1024 PNG, encoded once
+    """
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (1024, 1024), (96, 96, 128)).save(buf, format="PNG")
+    return buf.getvalue()
+
+class LatencyProfile:
+    """
+    Log-normal response latency given its median and 99th percentile, plus
+    an error rate (errors answer 503 after the sampled latency)
+    """
+
+    def __init__(self, median: float = 0.2, p99: float = 1.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.median = median
+        self.sigma = math.log(max(p99, median) / median) / _Z99 if median > 0 else 0.0
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """
+        Return (latency_seconds, fail)
+        """
+        with self._lock:
+            latency = self.median * math.exp(self.sigma * self._random.gauss(0.0, 1.0))
+            return latency, self._random.random() < self.error_rate
+
+class _MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = self.rfile.read(length)
+
+        if ":generateContent" in self.path:
+            route = "gemini"
+        elif "/stable-image/" in self.path:
+            route = "stability"
+        else:
+            self._send(404, b'{"error": "unknown route"}', "application/json")
+            return
+
+        server = self.server
+        server.record(route, +1)
+        try:
+            latency, fail = server.profiles[route].sample()
+            time.sleep(latency)
+            if fail:
+                self._send(503, b'{"error": {"code": 503, "status": "UNAVAILABLE"}}', "application/json")
+                return
+            if route == "stability":
+                self._send(200, mock_generated_png(), "image/png",
+                           {"finish-reason": "SUCCESS", "seed": "0"})
+                return
+            text = mock_gemini_text(request_body)
+            body = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode("utf-8")
+            self._send(200, body, "application/json")
+        finally:
+            server.record(route, -1)
+
+class MockBackends(ThreadingHTTPServer):
+    """
+    Threaded HTTP server emulating the Gemini generateContent endpoint and
+    the Stability stable-image endpoints, each with its own latency profile.
+    Use as a context manager to serve from a background thread.
+    """
+    daemon_threads = True
+    # Concurrent sessions open many connections at once
+    request_queue_size = 128
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 gemini: Optional[LatencyProfile] = None,
+                 stability: Optional[LatencyProfile] = None):
+        super().__init__((host, port), _MockHandler)
+        self.profiles = {
+            "gemini": gemini or LatencyProfile(),
+            "stability": stability or LatencyProfile(),
+        }
+        self.requests = Counter()
+        self.in_flight = Counter()
+        self.max_in_flight = Counter()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out hang up before the answer; that is expected
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, route: str, delta: int):
+        with self._stats_lock:
+            if delta > 0:
+                self.requests[route] += 1
+            self.in_flight[route] += delta
+            self.max_in_flight[route] = max(self.max_in_flight[route], self.in_flight[route])
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._stats_lock:
+            return {
+                route: {"requests": self.requests[route], "max_in_flight": self.max_in_flight[route]}
+                for route in self.profiles
+            }
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-backends", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the upstream APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--median", type=float, default=0.5, help="Gemini median latency in seconds")
+    parser.add_argument("--p99", type=float, default=3.0, help="Gemini 99th percentile latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stability-median", type=float, default=4.0,
+                        help="Stability median latency in seconds")
+    parser.add_argument("--stability-p99", type=float, default=12.0,
+                        help="Stability 99th percentile latency in seconds")
+    parser.add_argument("--stability-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockBackends(
+        args.host, args.port,
+        gemini=LatencyProfile(args.median, args.p99, args.error_rate),
+        stability=LatencyProfile(args.stability_median, args.stability_p99, args.stability_error_rate)
+    )
+    logger.info(f"Mock backends on {server.url} "
+                f"(set GEMINI_API_BASE={server.url} and STABILITY_API_BASE={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
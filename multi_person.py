@@ -0,0 +1,254 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from pose_extractor import (
+    DETECTION_ATTEMPTS,
+    draw_landmark_array,
+    enhance_for_detection,
+    get_cv2,
+    get_mediapipe,
+    landmarks_to_array,
+)
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Person detection runs on a copy scaled down to this max side
+DETECTION_MAX_SIDE = 640
+# Fraction of the box size added on every side before cropping
+CROP_MARGIN = 0.15
+# Working resolution for the whole multi-person pipeline (same as extract_pose)
+WORKING_MAX_SIDE = 1024
+# Crops submitted to a worker together
+BATCH_SIZE = 4
+POSE_WORKERS = int(os.getenv("POSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+CROP_CACHE_SIZE = 256
+
+# One distinct color per person in the composite stick figure
+PERSON_COLORS = [
+    (50, 205, 50),
+    (255, 140, 0),
+    (30, 144, 255),
+    (220, 20, 60),
+    (186, 85, 211),
+    (255, 215, 0),
+]
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker_state = threading.local()
+
+_crop_cache = OrderedDict()
+_crop_cache_lock = threading.Lock()
+
+Box = Tuple[int, int, int, int]
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared pose worker pool, creating it on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=POSE_WORKERS, thread_name_prefix="pose-worker")
+        return _executor
+
+def _get_worker_pose():
+    """
+    Return this worker thread's warm Pose instance
+    """
+    pose = getattr(_worker_state, "pose", None)
+    if pose is None:
+        mp = get_mediapipe()
+        pose = mp.solutions.pose.Pose(
+            static_image_mode=True,
+            model_complexity=DETECTION_ATTEMPTS[0]["model_complexity"],
+            min_detection_confidence=DETECTION_ATTEMPTS[-1]["min_detection_confidence"]
+        )
+        _worker_state.pose = pose
+    return pose
+
+def _get_hog():
+    """
+    Return this thread's HOG people detector (loading its SVM is not free)
+    """
+    hog = getattr(_worker_state, "hog", None)
+    if hog is None:
+        cv2 = get_cv2()
+        hog = cv2.HOGDescriptor()
+        hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+        _worker_state.hog = hog
+    return hog
+
+def detect_people(image_np: np.ndarray, max_people: int = 6) -> List[Box]:
+    """
+    Find person bounding boxes (x0, y0, x1, y1) with OpenCV's HOG people detector
+    """
+    cv2 = get_cv2()
+
+    height, width = image_np.shape[:2]
+    scale = min(1.0, DETECTION_MAX_SIDE / max(height, width))
+    small = cv2.resize(image_np, (int(width * scale), int(height * scale))) if scale < 1.0 else image_np
+
+    rects, weights = _get_hog().detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+    if len(rects) == 0:
+        return []
+
+    scores = np.asarray(weights, dtype=np.float32).reshape(-1)
+    keep = cv2.dnn.NMSBoxes([list(map(int, r)) for r in rects], scores.tolist(), 0.0, 0.4)
+    keep = np.asarray(keep).reshape(-1)[:max_people]
+
+    boxes = []
+    for idx in keep:
+        x, y, w, h = rects[idx] / scale
+        mx, my = w * CROP_MARGIN, h * CROP_MARGIN
+        boxes.append((
+            max(0, int(x - mx)),
+            max(0, int(y - my)),
+            min(width, int(x + w + mx)),
+            min(height, int(y + h + my))
+        ))
+
+    # Left-to-right order so person indices are stable for the UI
+    return sorted(boxes, key=lambda b: b[0])
+
+def _crop_key(crop: np.ndarray) -> str:
+    """
+    Content hash of a crop plus the detector settings that produced its pose
+    """
+    digest = hashlib.sha1(crop.tobytes())
+    digest.update(f"{crop.shape}{DETECTION_ATTEMPTS[0]}{DETECTION_ATTEMPTS[-1]}".encode())
+    return digest.hexdigest()
+
+def _cache_get(key: str):
+    with _crop_cache_lock:
+        if key in _crop_cache:
+            _crop_cache.move_to_end(key)
+            return True, _crop_cache[key]
+    return False, None
+
+def _cache_put(key: str, value: Optional[np.ndarray]):
+    with _crop_cache_lock:
+        _crop_cache[key] = value
+        _crop_cache.move_to_end(key)
+        while len(_crop_cache) > CROP_CACHE_SIZE:
+            _crop_cache.popitem(last=False)
+
+def _infer_batch(crops: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+    """
+    Run pose inference on a batch of crops with this worker's Pose instance
+    """
+    pose = _get_worker_pose()
+    landmarks = []
+    for crop in crops:
+        try:
+            results = pose.process(enhance_for_detection(crop))
+            landmarks.append(landmarks_to_array(results.pose_landmarks) if results.pose_landmarks else None)
+        except Exception as e:
+            logger.error(f"Error in crop pose inference: {str(e)}")
+            landmarks.append(None)
+    return landmarks
+
+def infer_crops(crops: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+    """
+    Return crop-normalized (33, 4) landmarks for each crop, using the crop
+    cache and the worker pool for cache misses
+    """
+    keys = [_crop_key(crop) for crop in crops]
+    landmarks = [None] * len(crops)
+    pending = []
+    for idx, key in enumerate(keys):
+        hit, value = _cache_get(key)
+        if hit:
+            landmarks[idx] = value
+        else:
+            pending.append(idx)
+
+    logger.debug(f"Crop cache: {len(crops) - len(pending)} hits, {len(pending)} misses")
+
+    executor = _get_executor()
+    batches = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+    futures = [(batch, executor.submit(_infer_batch, [crops[i] for i in batch])) for batch in batches]
+    for batch, future in futures:
+        for idx, value in zip(batch, future.result()):
+            landmarks[idx] = value
+            _cache_put(keys[idx], value)
+
+    return landmarks
+
+def _to_image_coords(landmarks: np.ndarray, box: Box, image_shape) -> np.ndarray:
+    """
+    Map crop-normalized landmarks back to coordinates normalized to the full image
+    """
+    height, width = image_shape[:2]
+    x0, y0, x1, y1 = box
+    mapped = landmarks.copy()
+    mapped[:, 0] = (landmarks[:, 0] * (x1 - x0) + x0) / width
+    mapped[:, 1] = (landmarks[:, 1] * (y1 - y0) + y0) / height
+    # z is relative to the crop width
+    mapped[:, 2] = landmarks[:, 2] * (x1 - x0) / width
+    return mapped
+
+def render_people(image_shape, people: List[np.ndarray], selected: Optional[int] = None) -> np.ndarray:
+    """
+    Draw a composite stick figure; if selected is given only that person is drawn
+    """
+    canvas = np.zeros((image_shape[0], image_shape[1], 3), dtype=np.uint8)
+    for idx, landmarks in enumerate(people):
+        if selected is not None and idx != selected:
+            continue
+        draw_landmark_array(canvas, landmarks, landmark_color=PERSON_COLORS[idx % len(PERSON_COLORS)])
+    return canvas
+
+def extract_poses_multi(pil_image, max_people: int = 6) -> Tuple[Optional[Image.Image], List[np.ndarray], List[Box]]:
+    """
+    Extract the poses of every person in the image
+
+    Returns the composite stick figure, one (33, 4) landmark array per person
+    (normalized to the image size) and the matching person boxes in pixels
+    of the original image.
+    """
+    try:
+        cv2 = get_cv2()
+
+        image_np = np.array(pil_image.convert("RGB"))
+        h, w = image_np.shape[:2]
+        scale = 1.0
+        if max(h, w) > WORKING_MAX_SIDE:
+            scale = WORKING_MAX_SIDE / max(h, w)
+            image_np = cv2.resize(image_np, (int(w * scale), int(h * scale)))
+
+        boxes = detect_people(image_np, max_people=max_people)
+        if not boxes:
+            # Nobody found by the cheap detector: let the pose model look at the whole frame
+            logger.debug("No person boxes detected, falling back to full frame")
+            boxes = [(0, 0, image_np.shape[1], image_np.shape[0])]
+
+        crops = [np.ascontiguousarray(image_np[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes]
+        crop_landmarks = infer_crops(crops)
+
+        people, person_boxes = [], []
+        for box, landmarks in zip(boxes, crop_landmarks):
+            if landmarks is not None:
+                people.append(_to_image_coords(landmarks, box, image_np.shape))
+                person_boxes.append(tuple(int(round(v / scale)) for v in box))
+
+        if not people:
+            logger.error("Failed to detect any pose in multi-person mode")
+            return None, [], []
+
+        logger.debug(f"Detected {len(people)} people")
+        return Image.fromarray(render_people(image_np.shape, people)), people, person_boxes
+
+    except Exception as e:
+        logger.error(f"Error in multi-person pose extraction: {str(e)}")
+        return None, [], []
@@ -0,0 +1,111 @@
+"""
+The per-upload request path of app.py without the Streamlit UI.
+
+app.py calls these stages between its status widgets; run_request chains
+them the same way for a single-person upload so the load harness
+(benchmarks/load.py) exercises what a session runs. Heavy modules are
+imported on first use, as in app.py.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from image_budget import CONTROL_IMAGE_MAX_SIDE, GEMINI_IMAGE_MAX_SIDE, encode_image, open_reduced
+
+# Stage names in request order
+STAGES = ("decode", "pose", "generate", "advice")
+
+class StageTimer:
+    """
+    Wall-clock seconds per stage of one request, and the stage that raised
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.failed: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.failed = name
+            raise
+        finally:
+            self.durations[name] = time.perf_counter() - start
+
+def open_pose_upload(pose_file):
+    """
+    Bounded working copy of the pose upload (large JPEGs are never fully
+    decoded) and the upload's original size
+    """
+    return open_reduced(pose_file, CONTROL_IMAGE_MAX_SIDE)
+
+def open_style_upload(style_file):
+    """
+    Working copy of the style upload; it is only sent to Gemini, so it is smaller
+    """
+    style_image, _ = open_reduced(style_file, GEMINI_IMAGE_MAX_SIDE)
+    return style_image
+
+def extract_single_pose(pose_file, pose_image, pose_original_size, cache=None):
+    """
+    (pose_result, pose_descriptions, landmarks) for a single-person upload
+    """
+    from pose_roi import ROI_MIN_SIDE, extract_pose_roi
+
+    if max(pose_original_size) > ROI_MIN_SIDE:
+        # Large uploads: locate the person at low resolution, refine on a full-res crop
+        return extract_pose_roi(pose_file, cache=cache)
+
+    from pose_extractor import extract_pose
+    return extract_pose(pose_image, cache=cache)
+
+def pose_advice(landmarks, pose_image, escalate: bool = False) -> Dict:
+    """
+    Local rule-based advice; Gemini is only called when escalated or when the
+    local confidence is low (the pose JPEG is only encoded then)
+    """
+    from pose_advice import get_pose_advice
+
+    def encode_pose_image():
+        # Raw JPEG of a downscaled copy; base64 is streamed into the request
+        return encode_image(pose_image, 'JPEG')
+
+    return get_pose_advice(
+        landmarks.pose_landmarks if hasattr(landmarks, "pose_landmarks") else landmarks,
+        encode_pose_image,
+        escalate=escalate
+    )
+
+def run_request(pose_file, style_file, timer: Optional[StageTimer] = None,
+                store=None, pose_cache=None, seed: int = 0) -> Dict:
+    """
+    Run one pose/style upload pair through every stage, as app.py does for
+    a single-person upload. Exceptions propagate; the timer keeps the
+    durations of the stages that ran.
+    """
+    from image_generator import generate_image_with_style
+
+    timer = timer or StageTimer()
+    with timer.stage("decode"):
+        pose_image, pose_original_size = open_pose_upload(pose_file)
+        style_image = open_style_upload(style_file)
+    with timer.stage("pose"):
+        pose_result, pose_descriptions, landmarks = extract_single_pose(
+            pose_file, pose_image, pose_original_size, cache=pose_cache)
+        if pose_result is None:
+            raise RuntimeError("Pose detection failed")
+    with timer.stage("generate"):
+        result_image = generate_image_with_style(pose_image, style_image, seed=seed, store=store,
+                                                 pose_descriptions=pose_descriptions)
+    with timer.stage("advice"):
+        advice = pose_advice(landmarks, pose_image)
+    return {
+        "pose_result": pose_result,
+        "result_image": result_image,
+        "advice": advice,
+        "low_confidence": bool(pose_result.info.get("low_confidence")),
+        "degraded": bool(result_image.info.get("degraded")),
+    }
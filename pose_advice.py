@@ -0,0 +1,340 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from circuit_breaker import get_breaker
+from pose_batch import ANGLE_JOINTS, SYMMETRY_THRESHOLD, analyze_pose_batch, stack_landmarks
+from pose_topology import LANDMARK_INDEX, SYMMETRY_PARTS
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Below this confidence the local advice is escalated to Gemini automatically
+MIN_LOCAL_CONFIDENCE = 0.6
+# Landmarks below this visibility are not used by the rules
+VISIBILITY_THRESHOLD = 0.5
+
+# Left/right joint angles closer than this (degrees) read as a mirrored pose
+SYMMETRIC_ANGLE_DIFF = 10
+# Left/right joint angles further apart than this read as a varied pose
+VARIED_ANGLE_DIFF = 30
+
+# BlazePose landmark indices used by the rules
+NOSE, LEFT_EAR, RIGHT_EAR = (LANDMARK_INDEX[name] for name in ("nose", "left_ear", "right_ear"))
+LEFT_SHOULDER, RIGHT_SHOULDER = LANDMARK_INDEX["left_shoulder"], LANDMARK_INDEX["right_shoulder"]
+LEFT_ELBOW, RIGHT_ELBOW = LANDMARK_INDEX["left_elbow"], LANDMARK_INDEX["right_elbow"]
+LEFT_WRIST, RIGHT_WRIST = LANDMARK_INDEX["left_wrist"], LANDMARK_INDEX["right_wrist"]
+LEFT_HIP, RIGHT_HIP = LANDMARK_INDEX["left_hip"], LANDMARK_INDEX["right_hip"]
+LEFT_KNEE, RIGHT_KNEE = LANDMARK_INDEX["left_knee"], LANDMARK_INDEX["right_knee"]
+LEFT_ANKLE, RIGHT_ANKLE = LANDMARK_INDEX["left_ankle"], LANDMARK_INDEX["right_ankle"]
+
+# Landmarks whose visibility drives the confidence score
+KEY_LANDMARKS = [
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST,
+    LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE,
+]
+
+def _as_array(landmarks) -> np.ndarray:
+    """
+    (33, 4) array from a MediaPipe landmark list or an array
+    """
+    if hasattr(landmarks, "landmark"):
+        return stack_landmarks([landmarks])[0]
+    return np.asarray(landmarks, dtype=np.float32)
+
+def _suggestion(point: str, suggestion: str, reason: str) -> Dict[str, str]:
+    return {"point": point, "suggestion": suggestion, "reason": reason}
+
+class _RuleContext:
+    """
+    Landmarks, angles and visibility shared by the advice rules
+    """
+
+    def __init__(self, landmarks: np.ndarray):
+        self.points = landmarks[:, :3]
+        self.visible = landmarks[:, 3] >= VISIBILITY_THRESHOLD
+        analysis = analyze_pose_batch(landmarks[None])
+        self.angles = dict(zip(ANGLE_JOINTS, analysis["angles"][0]))
+        self.symmetry = dict(zip(SYMMETRY_PARTS, analysis["symmetry"][0]))
+        self.strong_points: List[str] = []
+        self.suggestions: List[Dict[str, str]] = []
+        self.descriptions: List[str] = []
+        self.evaluated = 0
+        self.total = 0
+
+    def can_use(self, *indices) -> bool:
+        self.total += 1
+        if all(self.visible[i] for i in indices):
+            self.evaluated += 1
+            return True
+        return False
+
+    def mid(self, a: int, b: int) -> np.ndarray:
+        return (self.points[a] + self.points[b]) / 2
+
+    def dist(self, a: int, b: int) -> float:
+        return float(np.linalg.norm(self.points[a, :2] - self.points[b, :2]))
+
+def _rule_overall_stance(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE):
+        return
+    knees = min(ctx.angles["left_knee"], ctx.angles["right_knee"])
+    if knees < 110:
+        ctx.descriptions.append("膝を深く曲げたしゃがみ・座りのポーズ")
+    elif knees < 160:
+        ctx.descriptions.append("膝を軽く曲げた立ちポーズ")
+        ctx.strong_points.append("膝に余裕があり、動きのある自然な立ち姿です")
+    else:
+        ctx.descriptions.append("脚をまっすぐ伸ばした立ちポーズ")
+        ctx.strong_points.append("脚がしっかり伸びていて安定感があります")
+
+    if ctx.angles["left_knee"] < 160 and ctx.angles["right_knee"] < 160 and knees >= 110:
+        ctx.suggestions.append(_suggestion(
+            "膝の曲げ",
+            "片脚に重心を乗せ、もう片方の膝だけを軽く曲げてみましょう",
+            "両膝を同時に曲げると中途半端な姿勢に見えやすく、片脚重心の方がメリハリが出ます"
+        ))
+
+def _rule_shoulder_line(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_SHOULDER, RIGHT_SHOULDER):
+        return
+    width = ctx.dist(LEFT_SHOULDER, RIGHT_SHOULDER)
+    tilt = abs(ctx.points[LEFT_SHOULDER, 1] - ctx.points[RIGHT_SHOULDER, 1]) / max(width, 1e-6)
+    if tilt > 0.2:
+        ctx.suggestions.append(_suggestion(
+            "肩のライン",
+            "肩の高さをそろえるか、傾けるなら首と頭の傾きも同じ方向に合わせましょう",
+            "肩だけが傾いていると不安定な印象になり、全身の流れと合わせると意図的なポーズに見えます"
+        ))
+    else:
+        ctx.strong_points.append("肩のラインが水平で、落ち着いた印象を与えています")
+
+def _rule_torso_lean(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP):
+        return
+    shoulders = ctx.mid(LEFT_SHOULDER, RIGHT_SHOULDER)
+    hips = ctx.mid(LEFT_HIP, RIGHT_HIP)
+    torso = max(float(np.linalg.norm(shoulders[:2] - hips[:2])), 1e-6)
+    lean = (shoulders[0] - hips[0]) / torso
+    if abs(lean) > 0.25:
+        ctx.descriptions.append("上体を横に大きく傾けている")
+        ctx.suggestions.append(_suggestion(
+            "上体の傾き",
+            "上体の傾きを少し抑え、頭が骨盤の真上に来るように意識しましょう",
+            "傾きが大きすぎると倒れそうに見え、画像生成でもバランスが崩れやすくなります"
+        ))
+    elif abs(lean) > 0.08:
+        ctx.descriptions.append("上体をわずかに傾けている")
+        ctx.strong_points.append("上体の軽い傾きがポーズに動きを与えています")
+
+    if ctx.angles["spine"] < 70:
+        ctx.suggestions.append(_suggestion(
+            "背筋",
+            "背筋を伸ばし、胸を少し開いてみましょう",
+            "前かがみの姿勢は自信がなさそうに見え、シルエットも崩れます"
+        ))
+
+def _rule_arms(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST):
+        return
+    raised = [ctx.points[w, 1] < ctx.points[s, 1]
+              for w, s in ((LEFT_WRIST, LEFT_SHOULDER), (RIGHT_WRIST, RIGHT_SHOULDER))]
+    elbows = (ctx.angles["left_elbow"], ctx.angles["right_elbow"])
+
+    if all(raised):
+        ctx.descriptions.append("両腕を肩より高く上げている")
+        ctx.strong_points.append("両腕を上げたダイナミックなポーズで、躍動感があります")
+    elif any(raised):
+        ctx.descriptions.append("片腕を上げている")
+        ctx.strong_points.append("片腕を上げることで左右に変化が生まれています")
+    elif min(elbows) > 150:
+        ctx.descriptions.append("両腕を体の横に下ろしている")
+        ctx.suggestions.append(_suggestion(
+            "腕の位置",
+            "腕を体から少し離すか、片手を腰やポケットに添えてみましょう",
+            "腕と胴体の間にすき間ができるとシルエットがすっきりし、体のラインが強調されます"
+        ))
+    else:
+        ctx.descriptions.append("腕を曲げて体の前や横に置いている")
+
+    if min(elbows) < 90:
+        ctx.suggestions.append(_suggestion(
+            "肘の角度",
+            "鋭く曲がった肘を少し開き、腕のラインをなめらかにしましょう",
+            "鋭角な肘は硬い印象になりやすく、少し開くと柔らかく見えます"
+        ))
+    elif 90 <= min(elbows) <= 150:
+        ctx.strong_points.append("肘の自然な曲がりで腕に柔らかさがあります")
+
+def _rule_weight_and_stance(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_HIP, RIGHT_HIP, LEFT_ANKLE, RIGHT_ANKLE):
+        return
+    hip_width = max(ctx.dist(LEFT_HIP, RIGHT_HIP), 1e-6)
+    stance = ctx.dist(LEFT_ANKLE, RIGHT_ANKLE) / hip_width
+    shift = (ctx.mid(LEFT_HIP, RIGHT_HIP)[0] - ctx.mid(LEFT_ANKLE, RIGHT_ANKLE)[0]) / hip_width
+
+    if stance < 0.6:
+        ctx.descriptions.append("足をそろえて立っている")
+        ctx.suggestions.append(_suggestion(
+            "足幅",
+            "片足を少し前か横に出して、足幅を腰幅程度に広げましょう",
+            "足をそろえすぎると直立不動に見え、足幅があると安定感と奥行きが出ます"
+        ))
+    elif stance > 2.5:
+        ctx.descriptions.append("足を大きく開いて立っている")
+        ctx.strong_points.append("大きく開いた足幅で力強さが出ています")
+    else:
+        ctx.strong_points.append("足幅が適度で、安定した立ち方です")
+
+    if abs(shift) > 0.6:
+        ctx.suggestions.append(_suggestion(
+            "重心",
+            "腰を足の中心の上に戻し、重心を安定させましょう",
+            "重心が足の外に出ていると不安定に見え、生成画像でも姿勢が崩れやすくなります"
+        ))
+
+def _rule_head(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_EAR, RIGHT_EAR):
+        return
+    ear_width = max(ctx.dist(LEFT_EAR, RIGHT_EAR), 1e-6)
+    tilt = abs(ctx.points[LEFT_EAR, 1] - ctx.points[RIGHT_EAR, 1]) / ear_width
+    if tilt > 0.35:
+        ctx.suggestions.append(_suggestion(
+            "頭の傾き",
+            "首の傾きを少し控えめにし、あごを軽く引きましょう",
+            "頭の傾きが大きいと首が不自然に見えやすく、控えめな傾きの方が表情が引き立ちます"
+        ))
+    elif tilt > 0.1:
+        ctx.strong_points.append("頭の軽い傾きが表情に柔らかさを加えています")
+
+def _rule_orientation(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_SHOULDER, RIGHT_SHOULDER):
+        return
+    depth = abs(ctx.points[LEFT_SHOULDER, 2] - ctx.points[RIGHT_SHOULDER, 2])
+    width = max(ctx.dist(LEFT_SHOULDER, RIGHT_SHOULDER), 1e-6)
+    if depth / width > 0.5:
+        ctx.descriptions.append("体を斜めに向けている")
+        ctx.strong_points.append("体を斜めに向けることで立体感が出ています")
+    else:
+        ctx.descriptions.append("正面を向いている")
+
+# Symmetry pairs: Japanese name, landmarks, joint angles compared
+SYMMETRY_RULE_PARTS = {
+    "shoulders": ("肩", (LEFT_SHOULDER, RIGHT_SHOULDER), ("left_shoulder", "right_shoulder")),
+    "elbows": ("肘", (LEFT_ELBOW, RIGHT_ELBOW), ("left_elbow", "right_elbow")),
+    "hips": ("腰", (LEFT_HIP, RIGHT_HIP), ("left_hip", "right_hip")),
+    "knees": ("膝", (LEFT_KNEE, RIGHT_KNEE), ("left_knee", "right_knee")),
+}
+
+def _rule_symmetry(ctx: _RuleContext):
+    if not ctx.can_use(LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP):
+        return
+    differences = []
+    for part, (name, indices, (left, right)) in SYMMETRY_RULE_PARTS.items():
+        if not all(ctx.visible[i] for i in indices):
+            continue
+        if ctx.symmetry[part] < SYMMETRY_THRESHOLD:
+            ctx.suggestions.append(_suggestion(
+                f"{name}の左右バランス",
+                f"左右の{name}の位置をそろえ、体の中心線を意識しましょう",
+                "左右の位置がずれていると体がねじれて見え、画像生成でも形が崩れやすくなります"
+            ))
+        differences.append(abs(ctx.angles[left] - ctx.angles[right]))
+
+    if len(differences) < 2:
+        return
+    if max(differences) < SYMMETRIC_ANGLE_DIFF:
+        ctx.descriptions.append("左右対称の姿勢")
+        ctx.suggestions.append(_suggestion(
+            "左右の変化",
+            "片方の腕や脚の角度を変えて、左右に少し差をつけてみましょう",
+            "完全に左右対称だと硬い印象になり、左右差があると自然な動きが出ます"
+        ))
+    elif max(differences) > VARIED_ANGLE_DIFF:
+        ctx.strong_points.append("左右の手足の角度に変化があり、動きが感じられます")
+
+ADVICE_RULES = [
+    _rule_overall_stance,
+    _rule_torso_lean,
+    _rule_shoulder_line,
+    _rule_arms,
+    _rule_weight_and_stance,
+    _rule_symmetry,
+    _rule_head,
+    _rule_orientation,
+]
+
+def local_pose_advice(landmarks) -> Dict:
+    """
+    Instant rule-based pose advice from joint angles, left/right symmetry and
+    landmark geometry.
+
+    Returns the same schema as analyze_pose_for_improvements (current_pose,
+    strong_points, suggestions) plus confidence (0-1) and source ("local").
+    """
+    try:
+        landmarks = _as_array(landmarks)
+        ctx = _RuleContext(landmarks)
+        for rule in ADVICE_RULES:
+            rule(ctx)
+
+        visibility = float(np.clip(landmarks[KEY_LANDMARKS, 3], 0.0, 1.0).mean())
+        coverage = ctx.evaluated / ctx.total if ctx.total else 0.0
+        current_pose = "、".join(ctx.descriptions) if ctx.descriptions else "ポーズの詳細を判定できませんでした"
+
+        if not ctx.suggestions and ctx.evaluated:
+            ctx.strong_points.append("全体のバランスが良く、完成度の高いポーズです")
+
+        return {
+            "current_pose": current_pose,
+            "strong_points": ctx.strong_points,
+            "suggestions": ctx.suggestions,
+            "confidence": round(visibility * coverage, 3),
+            "source": "local",
+        }
+    except Exception as e:
+        logger.error(f"Error in local pose advice: {str(e)}")
+        return {
+            "current_pose": "ポーズの詳細を判定できませんでした",
+            "strong_points": [],
+            "suggestions": [],
+            "confidence": 0.0,
+            "source": "local",
+        }
+
+def should_escalate(advice: Optional[Dict], min_confidence: float = MIN_LOCAL_CONFIDENCE) -> bool:
+    """
+    Whether local advice is too uncertain to show without the Gemini analysis
+    """
+    return advice is None or advice.get("source") == "local" and advice.get("confidence", 0.0) < min_confidence
+
+def get_pose_advice(landmarks, pose_image_base64, escalate: bool = False,
+                    min_confidence: float = MIN_LOCAL_CONFIDENCE) -> Dict:
+    """
+    Tiered pose advice: local rules first, Gemini only when escalate is set
+    or should_escalate says so (no landmarks, or local confidence below
+    min_confidence). While the Gemini circuit is open, or if the Gemini
+    analysis fails, the local advice is returned instead, marked degraded.
+
+    pose_image_base64 may be a callable; it is only evaluated for Gemini.
+    """
+    local = local_pose_advice(landmarks) if landmarks is not None else None
+    if not escalate and not should_escalate(local, min_confidence):
+        return local
+    if local is not None and not get_breaker("gemini").available():
+        logger.info("Gemini circuit is open, keeping the local pose advice")
+        return dict(local, degraded=True)
+
+    from pose_analysis import analyze_pose_with_cache
+    logger.info("Escalating pose advice to Gemini")
+    advice = dict(analyze_pose_with_cache(pose_image_base64, landmarks))
+    if advice.pop("failed", False):
+        if local is not None:
+            logger.warning("Gemini pose analysis failed, keeping the local pose advice")
+            return dict(local, degraded=True)
+        return dict(advice, confidence=0.0, source="gemini")
+    advice.setdefault("confidence", 1.0)
+    advice["source"] = "gemini"
+    return advice
@@ -1,7 +1,8 @@
 import os
 import logging
-import requests
 import json
+from advice_cache import get_default_cache
+from gemini_client import generate_content, image_part, text_part
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -14,16 +15,59 @@ def analyze_pose_for_improvements(pose_image_base64: str):
     Analyze pose using Gemini and generate improvement suggestions
     """
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GOOGLE_API_KEY}"
-        
-        headers = {
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            "contents": [{
-                "parts":[{
-                    "text": """あなたはプロのポーズ指導者です。以下の画像のポーズを分析し、改善点を提案してください。
+        return _request_pose_analysis(pose_image_base64)
+    except Exception as e:
+        logger.error(f"Error analyzing pose for improvements: {str(e)}")
+        return get_default_pose_analysis()
+
+def analyze_pose_with_cache(pose_image_base64, landmarks, cache=None):
+    """
+    Analyze pose like analyze_pose_for_improvements, reusing stored advice for
+    poses whose quantized joint angles match an earlier one.
+
+    pose_image_base64 may be a base64 string, raw JPEG bytes or a callable
+    returning either; it is only evaluated on a cache miss. Failed analyses
+    are not cached.
+    """
+    if landmarks is None:
+        image_base64 = pose_image_base64() if callable(pose_image_base64) else pose_image_base64
+        return analyze_pose_for_improvements(image_base64)
+
+    if cache is None:
+        cache = get_default_cache()
+
+    try:
+        advice = cache.get(landmarks)
+        if advice is not None:
+            logger.info(f"Pose advice cache hit ({cache.report()['hit_rate']:.0%} hit rate)")
+            return advice
+
+        image_base64 = pose_image_base64() if callable(pose_image_base64) else pose_image_base64
+        advice = _request_pose_analysis(image_base64)
+        cache.put(landmarks, advice)
+        return advice
+    except Exception as e:
+        logger.error(f"Error analyzing pose for improvements: {str(e)}")
+        return get_default_pose_analysis()
+
+def get_default_pose_analysis():
+    """
+    Fallback result when the pose analysis fails (marked "failed")
+    """
+    return {
+        "current_pose": "ポーズの分析中にエラーが発生しました",
+        "strong_points": [],
+        "suggestions": [],
+        "failed": True
+    }
+
+def _request_pose_analysis(pose_image):
+    """
+    Send the pose image to Gemini and return the parsed pose_analysis dict
+    (raises on any failure). pose_image is a base64 string or raw JPEG bytes.
+    """
+    parts = [
+        text_part("""あなたはプロのポーズ指導者です。以下の画像のポーズを分析し、改善点を提案してください。
 
 以下の形式でJSONを返してください:
 {
@@ -38,44 +82,21 @@ def analyze_pose_for_improvements(pose_image_base64: str):
             }
         ]
     }
-}"""
-                }, {
-                    "inlineData": {
-                        "mimeType": "image/jpeg",
-                        "data": pose_image_base64
-                    }
-                }]
-            }]
-        }
-        
-        response = requests.post(url, headers=headers, json=data)
-        
-        if not response.ok:
-            logger.error(f"Gemini API Response: {response.text}")
-            raise Exception(f"Gemini API error: {response.status_code}")
-            
-        result = response.json()
-        if not result.get("candidates"):
-            raise Exception("No candidates in Gemini response")
-            
-        text_response = result["candidates"][0]["content"]["parts"][0]["text"]
-        
-        # Extract JSON content
-        start = text_response.find('{')
-        end = text_response.rfind('}') + 1
-        
-        if start == -1 or end == 0:
-            raise Exception("No JSON content found in response")
-            
-        json_content = text_response[start:end]
-        analysis_result = json.loads(json_content)
-        
-        return analysis_result["pose_analysis"]
+}"""),
+        image_part(pose_image, "image/jpeg")
+    ]
+
+    text_response = generate_content(parts)
+    del parts
+    
+    # Extract JSON content
+    start = text_response.find('{')
+    end = text_response.rfind('}') + 1
+    
+    if start == -1 or end == 0:
+        raise Exception("No JSON content found in response")
         
-    except Exception as e:
-        logger.error(f"Error analyzing pose for improvements: {str(e)}")
-        return {
-            "current_pose": "ポーズの分析中にエラーが発生しました",
-            "strong_points": [],
-            "suggestions": []
-        }
+    json_content = text_response[start:end]
+    analysis_result = json.loads(json_content)
+    
+    return analysis_result["pose_analysis"]
@@ -0,0 +1,551 @@
+"""
+Pluggable pose backends.
+
+extract_pose runs MediaPipe's Pose solution by default, which picks its own
+threading and kernels. The BlazePose backends run the same two models
+directly on a CPU runtime instead: the pose detector on a letterboxed
+224x224 frame, then the landmark model on the rotated 256x256 person crop.
+The runtimes are TFLite with the XNNPACK delegate ("tflite") or ONNX
+Runtime ("onnx"). Thread count, batch size and model precision are explicit.
+
+Models are looked up in POSE_MODEL_DIR, then in the mediapipe package:
+    pose_detection[_<precision>].<tflite|onnx>
+    pose_landmark_<lite|full|heavy>[_<precision>].<tflite|onnx>
+fp32 has no suffix. MediaPipe only bundles fp32 .tflite models (their weights
+are stored as sparse fp16 and densified on load). ONNX exports and the
+fp16/int8 variants have to be placed in POSE_MODEL_DIR; the quantize command
+derives the ONNX fp16/int8 variants from fp32 ONNX exports:
+
+    python -m pose_backends quantize --calibration poses/*.jpg
+"""
+import argparse
+import logging
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# mediapipe (default), tflite or onnx
+POSE_BACKEND = os.getenv("POSE_BACKEND", "mediapipe")
+# Intra-op threads per model (XNNPACK thread pool / ONNX Runtime intra-op pool)
+POSE_BACKEND_THREADS = int(os.getenv("POSE_BACKEND_THREADS", str(min(4, os.cpu_count() or 1))))
+# Frames per detector/landmark invocation in detect_batch
+POSE_BACKEND_BATCH = int(os.getenv("POSE_BACKEND_BATCH", "1"))
+# fp32, fp16 or int8
+POSE_BACKEND_PRECISION = os.getenv("POSE_BACKEND_PRECISION", "fp32")
+POSE_MODEL_DIR = os.getenv(
+    "POSE_MODEL_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pose-to-image", "models")
+)
+
+PRECISIONS = ("fp32", "fp16", "int8")
+RUNTIME_EXTENSIONS = {"tflite": ".tflite", "onnx": ".onnx"}
+# MediaPipe's model_complexity -> landmark model
+LANDMARK_MODELS = {0: "lite", 1: "full", 2: "heavy"}
+
+# Pose detector (mediapipe/modules/pose_detection/pose_detection_cpu.pbtxt)
+DETECTOR_SIZE = 224
+DETECTOR_STRIDES = [8, 16, 32, 32, 32]
+DETECTOR_ANCHORS_PER_LAYER = 2
+DETECTOR_NMS_IOU = 0.3
+# Landmark model (mediapipe/modules/pose_landmark/pose_landmark_by_roi_cpu.pbtxt)
+LANDMARK_SIZE = 256
+LANDMARK_OUTPUTS = 39
+ROI_SCALE = 1.25
+HEATMAP_KERNEL = 7
+HEATMAP_MIN_CONFIDENCE = 0.5
+BODY_LANDMARKS = 33
+
+_backends: Dict[tuple, "PoseBackend"] = {}
+_backends_lock = threading.Lock()
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -80.0, 80.0)))
+
+def _tflite_interpreter():
+    """
+    The TFLite Interpreter class from whichever runtime is installed
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tensorflow.lite import Interpreter
+            except ImportError:
+                raise RuntimeError(
+                    "The tflite pose backend needs tflite-runtime, ai-edge-litert or tensorflow"
+                ) from None
+    return Interpreter
+
+def _onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("The onnx pose backend needs onnxruntime") from None
+    return onnxruntime
+
+def _mediapipe_modules_dir() -> Optional[str]:
+    try:
+        import mediapipe
+    except ImportError:
+        return None
+    return os.path.join(os.path.dirname(mediapipe.__file__), "modules")
+
+def model_path(model: str, runtime: str, precision: str = "fp32", model_dir: str = POSE_MODEL_DIR) -> str:
+    """
+    Path of a pose model ("pose_detection", "pose_landmark_full", ...) for a
+    runtime and precision. Raises FileNotFoundError if it is missing.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+    filename = model + ("" if precision == "fp32" else f"_{precision}") + RUNTIME_EXTENSIONS[runtime]
+    candidates = [os.path.join(model_dir, filename)]
+    modules_dir = _mediapipe_modules_dir() if runtime == "tflite" and precision == "fp32" else None
+    if modules_dir:
+        subdir = "pose_landmark" if model.startswith("pose_landmark") else model
+        candidates.append(os.path.join(modules_dir, subdir, filename))
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No {precision} {runtime} model {filename} (looked in {', '.join(candidates)})")
+
+class _TFLiteRunner:
+    """
+    One .tflite model on the TFLite interpreter, whose default CPU delegate
+    is XNNPACK; num_threads sizes its thread pool. Resizing an interpreter
+    re-plans the XNNPACK graph, so there is one interpreter per batch size
+    seen (at most the backend's batch size). Interpreters are not
+    thread-safe, so calls are serialized.
+    """
+
+    def __init__(self, path: str, threads: int):
+        self.path = path
+        self.threads = threads
+        self._interpreters = {}
+        self._lock = threading.Lock()
+        self._interpreter(1)
+
+    def _interpreter(self, batch: int):
+        if batch not in self._interpreters:
+            interpreter = _tflite_interpreter()(model_path=self.path, num_threads=self.threads)
+            if batch != 1:
+                interpreter.resize_tensor_input(interpreter.get_input_details()[0]["index"],
+                                                [batch, *interpreter.get_input_details()[0]["shape"][1:]])
+            interpreter.allocate_tensors()
+            self._interpreters[batch] = interpreter
+        return self._interpreters[batch]
+
+    def run(self, batch: np.ndarray) -> List[np.ndarray]:
+        with self._lock:
+            interpreter = self._interpreter(batch.shape[0])
+            model_input = interpreter.get_input_details()[0]
+            if model_input["dtype"] != np.float32:
+                scale, zero_point = model_input["quantization"]
+                batch = np.round(batch / scale + zero_point).astype(model_input["dtype"])
+            interpreter.set_tensor(model_input["index"], batch)
+            interpreter.invoke()
+            outputs = []
+            for detail in interpreter.get_output_details():
+                output = interpreter.get_tensor(detail["index"])
+                if detail["dtype"] != np.float32:
+                    scale, zero_point = detail["quantization"]
+                    output = (output.astype(np.float32) - zero_point) * scale
+                outputs.append(output.copy())
+            return outputs
+
+class _OnnxRunner:
+    """
+    One .onnx model on ONNX Runtime's CPU execution provider with a fixed
+    intra-op thread pool. Models exported with a fixed batch of 1 are run
+    frame by frame.
+    """
+
+    def __init__(self, path: str, threads: int):
+        ort = _onnxruntime()
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self._input = model_input.name
+        self._fixed_batch = isinstance(model_input.shape[0], int)
+
+    def run(self, batch: np.ndarray) -> List[np.ndarray]:
+        if not self._fixed_batch or batch.shape[0] == 1:
+            return self.session.run(None, {self._input: batch})
+        runs = [self.session.run(None, {self._input: frame[None]}) for frame in batch]
+        return [np.concatenate(outputs) for outputs in zip(*runs)]
+
+RUNNERS = {"tflite": _TFLiteRunner, "onnx": _OnnxRunner}
+
+def detector_anchors():
+    """
+    (anchor centers (N, 2), anchors per head) of the pose detector's SSD
+    anchors. Layers with the same stride share one output head; anchors
+    have a fixed size of 1.
+    """
+    centers, heads = [], []
+    layer = 0
+    while layer < len(DETECTOR_STRIDES):
+        stride = DETECTOR_STRIDES[layer]
+        same_stride = DETECTOR_STRIDES[layer:].count(stride)
+        per_cell = DETECTOR_ANCHORS_PER_LAYER * same_stride
+        cells = math.ceil(DETECTOR_SIZE / stride)
+        grid = (np.stack(np.meshgrid(np.arange(cells), np.arange(cells)), -1).reshape(-1, 2) + 0.5) / cells
+        centers.append(np.repeat(grid, per_cell, axis=0))
+        heads.append(cells * cells * per_cell)
+        layer += same_stride
+    return np.concatenate(centers).astype(np.float32), heads
+
+class PoseBackend:
+    """
+    Pose landmark backend. detect_batch returns, per RGB frame, a (33, 4)
+    array of normalized x, y, z and visibility (as landmarks_to_array
+    builds) or None when no pose was found.
+    """
+    name = "base"
+
+    def detect(self, image: np.ndarray, min_detection_confidence: float = 0.5) -> Optional[np.ndarray]:
+        return self.detect_batch([image], min_detection_confidence)[0]
+
+    def detect_batch(self, images: Sequence[np.ndarray],
+                     min_detection_confidence: float = 0.5) -> List[Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def config(self) -> Dict:
+        """
+        Settings that affect the landmarks (part of the pose disk cache key)
+        """
+        return {"backend": self.name}
+
+    def close(self):
+        pass
+
+class MediaPipeBackend(PoseBackend):
+    """
+    MediaPipe's Pose solution, one graph per detection threshold. Its
+    threading cannot be configured and frames are processed one at a time.
+    """
+    name = "mediapipe"
+
+    def __init__(self, model_complexity: int = 2):
+        self.model_complexity = model_complexity
+        self._poses = {}
+        self._lock = threading.Lock()
+
+    def detect_batch(self, images, min_detection_confidence=0.5):
+        import mediapipe as mp
+        from pose_extractor import landmarks_to_array
+
+        with self._lock:
+            pose = self._poses.get(min_detection_confidence)
+            if pose is None:
+                pose = self._poses[min_detection_confidence] = mp.solutions.pose.Pose(
+                    static_image_mode=True,
+                    model_complexity=self.model_complexity,
+                    min_detection_confidence=min_detection_confidence
+                )
+            results = [pose.process(image).pose_landmarks for image in images]
+        return [landmarks_to_array(landmarks) if landmarks else None for landmarks in results]
+
+    def config(self):
+        from pose_extractor import _mediapipe_version
+        return {"backend": self.name, "model_complexity": self.model_complexity,
+                "mediapipe": _mediapipe_version()}
+
+    def close(self):
+        with self._lock:
+            for pose in self._poses.values():
+                pose.close()
+            self._poses.clear()
+
+class BlazePoseBackend(PoseBackend):
+    """
+    MediaPipe's two-stage BlazePose pipeline on a CPU runtime: detection
+    with weighted NMS, a rotated crop around the hips, the landmark model
+    and heatmap refinement, projected back to the frame.
+    """
+
+    def __init__(self, runtime: str = "tflite", threads: int = POSE_BACKEND_THREADS,
+                 batch_size: int = POSE_BACKEND_BATCH, precision: str = POSE_BACKEND_PRECISION,
+                 model_complexity: int = 2, min_presence: float = 0.5, model_dir: str = POSE_MODEL_DIR):
+        if runtime not in RUNNERS:
+            raise ValueError(f"Unknown runtime {runtime!r}, expected one of {sorted(RUNNERS)}")
+        self.name = runtime
+        self.threads = threads
+        self.batch_size = max(1, batch_size)
+        self.precision = precision
+        self.model_complexity = model_complexity
+        self.min_presence = min_presence
+        self.detector_path = model_path("pose_detection", runtime, precision, model_dir)
+        self.landmark_path = model_path(f"pose_landmark_{LANDMARK_MODELS[model_complexity]}",
+                                        runtime, precision, model_dir)
+        self._detector = RUNNERS[runtime](self.detector_path, threads)
+        self._landmarker = RUNNERS[runtime](self.landmark_path, threads)
+        self._anchors, self._heads = detector_anchors()
+        logger.debug(f"Pose backend {runtime} ({precision}, {threads} threads, batch {self.batch_size}): "
+                     f"{self.detector_path}, {self.landmark_path}")
+
+    def config(self):
+        return {
+            "backend": self.name,
+            "precision": self.precision,
+            "models": [os.path.basename(self.detector_path), os.path.basename(self.landmark_path)],
+            "min_presence": self.min_presence,
+        }
+
+    def detect_batch(self, images, min_detection_confidence=0.5):
+        results = []
+        for start in range(0, len(images), self.batch_size):
+            results.extend(self._detect_chunk(images[start:start + self.batch_size], min_detection_confidence))
+        return results
+
+    def _detect_chunk(self, images, min_detection_confidence):
+        cv2 = _cv2()
+
+        # Letterbox every frame into the detector input, values in [-1, 1]
+        letterboxes, tensors = [], []
+        for image in images:
+            height, width = image.shape[:2]
+            side = max(height, width)
+            scale = DETECTOR_SIZE / side
+            pad = np.array([(side - width) / 2, (side - height) / 2])
+            transform = np.array([[scale, 0, pad[0] * scale], [0, scale, pad[1] * scale]])
+            tensors.append(cv2.warpAffine(image, transform, (DETECTOR_SIZE, DETECTOR_SIZE),
+                                          flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT))
+            letterboxes.append((side, pad))
+        batch = np.stack(tensors).astype(np.float32) / 127.5 - 1.0
+        raw_boxes, raw_scores = self._detector_outputs(self._detector.run(batch), len(images))
+
+        # One rotated region of interest per detected person
+        rois = []
+        for i, (side, pad) in enumerate(letterboxes):
+            keypoints = self._decode_detection(raw_boxes[i], raw_scores[i], min_detection_confidence)
+            rois.append(None if keypoints is None else self._roi(keypoints * side - pad))
+
+        detected = [i for i, roi in enumerate(rois) if roi is not None]
+        results = [None] * len(images)
+        if not detected:
+            return results
+
+        crops = np.stack([
+            cv2.warpAffine(images[i], rois[i], (LANDMARK_SIZE, LANDMARK_SIZE),
+                           flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+            for i in detected
+        ]).astype(np.float32) / 255.0
+        raw_landmarks, presence, heatmaps = self._landmark_outputs(self._landmarker.run(crops), len(detected))
+
+        for j, i in enumerate(detected):
+            if presence[j] < self.min_presence:
+                continue
+            height, width = images[i].shape[:2]
+            results[i] = self._project(raw_landmarks[j], heatmaps[j], rois[i], width, height)
+        return results
+
+    def _detector_outputs(self, outputs, n):
+        """
+        (boxes (n, anchors, 12), scores (n, anchors)) from the detector
+        outputs. The exported detector reshapes each head with a batch of 1,
+        so a batched run returns the heads' rows batch-major per head.
+        """
+        boxes = next(o for o in outputs if o.shape[-1] == 12)
+        scores = next(o for o in outputs if o.shape[-1] == 1)
+        if boxes.shape[0] == n:
+            return boxes, scores[..., 0]
+        boxes, scores = boxes.reshape(-1, 12), scores.reshape(-1)
+        split = np.cumsum([n * anchors for anchors in self._heads])[:-1]
+        return (np.concatenate([head.reshape(n, -1, 12) for head in np.split(boxes, split)], 1),
+                np.concatenate([head.reshape(n, -1) for head in np.split(scores, split)], 1))
+
+    def _landmark_outputs(self, outputs, n):
+        """
+        (landmarks (n, 39, 5), presence scores (n,), heatmaps (n, 64, 64, 39)).
+        Visibility and heatmaps are logits; the presence score is a probability.
+        """
+        by_size = {o[0].size if o.ndim > 1 else 1: o for o in outputs}
+        heatmaps = next(o for o in outputs if o.ndim == 4 and o.shape[-1] == LANDMARK_OUTPUTS)
+        return (by_size[LANDMARK_OUTPUTS * 5].reshape(n, LANDMARK_OUTPUTS, 5),
+                by_size[1].reshape(n), heatmaps)
+
+    def _decode_detection(self, raw_boxes, raw_scores, min_score):
+        """
+        Keypoints (4, 2) of the best detection, normalized to the letterbox,
+        averaged over the detections overlapping it (weighted NMS), or None
+        """
+        scores = _sigmoid(raw_scores)
+        best = int(np.argmax(scores))
+        if scores[best] < min_score:
+            return None
+
+        centers = raw_boxes[:, :2] / DETECTOR_SIZE + self._anchors
+        sizes = raw_boxes[:, 2:4] / DETECTOR_SIZE
+        lower, upper = centers - sizes / 2, centers + sizes / 2
+        overlap = np.clip(np.minimum(upper, upper[best]) - np.maximum(lower, lower[best]), 0, None).prod(1)
+        areas = sizes.prod(1)
+        iou = overlap / np.maximum(areas + areas[best] - overlap, 1e-12)
+        cluster = (scores >= min_score) & (iou > DETECTOR_NMS_IOU)
+
+        keypoints = raw_boxes[cluster, 4:].reshape(-1, 4, 2) / DETECTOR_SIZE + self._anchors[cluster, None]
+        weights = scores[cluster]
+        return (keypoints * weights[:, None, None]).sum(0) / weights.sum()
+
+    def _roi(self, keypoints: np.ndarray) -> np.ndarray:
+        """
+        2x3 affine map from landmark-crop pixels to frame pixels: a square
+        around the hip center (keypoint 0), rotated so that the body axis
+        towards keypoint 1 points up
+        """
+        center, end = keypoints[0], keypoints[1]
+        side = 2 * np.linalg.norm(end - center) * ROI_SCALE
+        rotation = math.pi / 2 - math.atan2(-(end[1] - center[1]), end[0] - center[0])
+        scale = side / LANDMARK_SIZE
+        cos, sin = math.cos(rotation) * scale, math.sin(rotation) * scale
+        roi = np.array([[cos, -sin, 0.0], [sin, cos, 0.0]])
+        roi[:, 2] = center - roi[:, :2] @ [LANDMARK_SIZE / 2, LANDMARK_SIZE / 2]
+        return roi
+
+    def _project(self, raw_landmarks, heatmap, roi, width, height) -> np.ndarray:
+        """
+        (33, 4) normalized frame landmarks from the crop landmarks, refined
+        on the heatmap
+        """
+        landmarks = raw_landmarks[:BODY_LANDMARKS]
+        xy = _refine_on_heatmap(landmarks[:, :2], heatmap[..., :BODY_LANDMARKS])
+        xy = xy @ roi[:, :2].T + roi[:, 2]
+        scale = math.hypot(roi[0, 0], roi[1, 0])
+
+        result = np.empty((BODY_LANDMARKS, 4), dtype=np.float32)
+        result[:, 0] = xy[:, 0] / width
+        result[:, 1] = xy[:, 1] / height
+        result[:, 2] = landmarks[:, 2] * scale / width
+        result[:, 3] = _sigmoid(landmarks[:, 3])
+        return result
+
+def _refine_on_heatmap(xy: np.ndarray, heatmap: np.ndarray) -> np.ndarray:
+    """
+    Replace crop landmark positions with the confidence-weighted mean of the
+    heatmap window around them, where the window is confident enough
+    """
+    size = heatmap.shape[0]
+    radius = HEATMAP_KERNEL // 2
+    cells = (xy / LANDMARK_SIZE * size).astype(np.int64)
+    inside = np.all((cells >= 0) & (cells < size), axis=1)
+
+    # Out-of-range window cells get zero confidence
+    confidence = np.pad(_sigmoid(heatmap), ((radius, radius), (radius, radius), (0, 0)))
+    offsets = np.arange(-radius, radius + 1)
+    clipped = np.clip(cells, 0, size - 1)
+    rows = clipped[:, 1, None, None] + offsets[None, :, None] + radius
+    cols = clipped[:, 0, None, None] + offsets[None, None, :] + radius
+    windows = confidence[rows, cols, np.arange(len(xy))[:, None, None]]
+
+    total = windows.sum(axis=(1, 2))
+    refine = inside & (windows.max(axis=(1, 2)) >= HEATMAP_MIN_CONFIDENCE) & (total > 0)
+    mean_row = (windows * (rows - radius)).sum(axis=(1, 2)) / np.maximum(total, 1e-12)
+    mean_col = (windows * (cols - radius)).sum(axis=(1, 2)) / np.maximum(total, 1e-12)
+
+    refined = xy.astype(np.float64)
+    refined[refine, 0] = mean_col[refine] / size * LANDMARK_SIZE
+    refined[refine, 1] = mean_row[refine] / size * LANDMARK_SIZE
+    return refined
+
+def _cv2():
+    from pose_extractor import get_cv2
+    return get_cv2()
+
+def create_backend(name: str, **kwargs) -> PoseBackend:
+    """
+    Build a backend by name: "mediapipe", "tflite" or "onnx"
+    """
+    if name == "mediapipe":
+        return MediaPipeBackend(kwargs.get("model_complexity", 2))
+    return BlazePoseBackend(name, **kwargs)
+
+def get_backend(name: str = POSE_BACKEND, **kwargs) -> PoseBackend:
+    """
+    Return the process-wide backend for a name and settings
+    """
+    key = (name, tuple(sorted(kwargs.items())))
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = create_backend(name, **kwargs)
+        return _backends[key]
+
+def quantize(model_dir: str = POSE_MODEL_DIR, calibration: Sequence[str] = (), model_complexity: int = 2):
+    """
+    Write fp16 and int8 ONNX variants next to the fp32 ONNX exports in
+    model_dir. int8 uses static QDQ quantization calibrated on the given
+    images: their detector inputs, and the landmark crops the fp32 backend
+    finds in them.
+    """
+    import onnx
+    from onnxconverter_common import float16
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from PIL import Image
+
+    fp32 = BlazePoseBackend("onnx", batch_size=1, precision="fp32",
+                            model_complexity=model_complexity, model_dir=model_dir)
+    cv2 = _cv2()
+    frames = [np.array(Image.open(path).convert("RGB")) for path in calibration]
+    if not frames:
+        raise ValueError("int8 quantization needs calibration images")
+
+    detector_inputs, landmark_inputs = [], []
+    for frame in frames:
+        side = max(frame.shape[:2])
+        scale = DETECTOR_SIZE / side
+        pad = ((side - frame.shape[1]) / 2, (side - frame.shape[0]) / 2)
+        transform = np.array([[scale, 0, pad[0] * scale], [0, scale, pad[1] * scale]])
+        tensor = cv2.warpAffine(frame, transform, (DETECTOR_SIZE, DETECTOR_SIZE))
+        detector_inputs.append(tensor.astype(np.float32)[None] / 127.5 - 1.0)
+
+        raw_boxes, raw_scores = fp32._detector_outputs(fp32._detector.run(detector_inputs[-1]), 1)
+        keypoints = fp32._decode_detection(raw_boxes[0], raw_scores[0], 0.5)
+        if keypoints is not None:
+            roi = fp32._roi(keypoints * side - pad)
+            crop = cv2.warpAffine(frame, roi, (LANDMARK_SIZE, LANDMARK_SIZE),
+                                  flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+            landmark_inputs.append(crop.astype(np.float32)[None] / 255.0)
+    if not landmark_inputs:
+        raise ValueError("No pose found in the calibration images")
+
+    class Reader(CalibrationDataReader):
+        def __init__(self, name, inputs):
+            self._feeds = iter({name: tensor} for tensor in inputs)
+
+        def get_next(self):
+            return next(self._feeds, None)
+
+    for path, inputs in ((fp32.detector_path, detector_inputs), (fp32.landmark_path, landmark_inputs)):
+        stem = os.path.splitext(path)[0]
+        model = onnx.load(path)
+        onnx.save(float16.convert_float_to_float16(model, keep_io_types=True), stem + "_fp16.onnx")
+        input_name = model.graph.input[0].name
+        quantize_static(path, stem + "_int8.onnx", Reader(input_name, inputs),
+                        quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        logger.info(f"Wrote {stem}_fp16.onnx and {stem}_int8.onnx ({len(inputs)} calibration inputs)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pose backend model tools")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    quantize_parser = subcommands.add_parser("quantize", help="Write fp16/int8 variants of the ONNX models")
+    quantize_parser.add_argument("--model-dir", default=POSE_MODEL_DIR)
+    quantize_parser.add_argument("--calibration", nargs="+", required=True, help="Images with people")
+    quantize_parser.add_argument("--model-complexity", type=int, choices=sorted(LANDMARK_MODELS), default=2)
+    args = parser.parse_args()
+    quantize(args.model_dir, args.calibration, args.model_complexity)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from pose_topology import (
+    ANGLE_JOINTS,
+    BODY,
+    NUM_POSE_LANDMARKS,
+    SYMMETRY_PARTS,
+    Skeleton,
+)
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Thresholds shared with generate_pose_suggestions
+SYMMETRY_THRESHOLD = 0.85
+SPINE_MIN_ANGLE = 70
+KNEE_BEND_ANGLE = 160
+ELBOW_BEND_ANGLE = 90
+
+# Suggestion bit flags: one bit per suggestion generate_pose_suggestions can emit
+SUGGESTION_SYMMETRY_BITS = {part: 1 << i for i, part in enumerate(SYMMETRY_PARTS)}
+SUGGESTION_SPINE = 1 << 4
+SUGGESTION_KNEES = 1 << 5
+SUGGESTION_ELBOWS = 1 << 6
+SUGGESTION_GENERAL = 1 << 7
+
+SUGGESTION_MESSAGES = [
+    *((bit, f"{part}_symmetry", f"Consider adjusting {part} alignment for better balance")
+      for part, bit in SUGGESTION_SYMMETRY_BITS.items()),
+    (SUGGESTION_SPINE, "spine", "Consider straightening your spine for better posture"),
+    (SUGGESTION_KNEES, "knees", "Deep knee bend detected - ensure stable balance"),
+    (SUGGESTION_ELBOWS, "elbows", "Sharp elbow bend - check arm positioning"),
+    (SUGGESTION_GENERAL, "general",
+     "Pose looks well balanced! Consider experimenting with different expressions or hand positions."),
+]
+
+# Score penalty per suggested fix when ranking poses
+ISSUE_PENALTY = 0.1
+
+def stack_landmarks(pose_landmarks_list: Iterable) -> np.ndarray:
+    """
+    Stack MediaPipe landmark lists into an (N, 33, 4) array; frames without
+    a pose (None) become rows of NaN
+    """
+    rows = []
+    for pose_landmarks in pose_landmarks_list:
+        if pose_landmarks is None:
+            rows.append(np.full((NUM_POSE_LANDMARKS, 4), np.nan, dtype=np.float32))
+        else:
+            rows.append(np.array(
+                [[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks.landmark],
+                dtype=np.float32
+            ))
+    return np.stack(rows) if rows else np.empty((0, NUM_POSE_LANDMARKS, 4), dtype=np.float32)
+
+def batch_joint_angles(landmarks: np.ndarray, skeleton: Skeleton = BODY) -> np.ndarray:
+    """
+    (N, L, >=3) landmarks -> (N, K) joint angles in degrees, columns in
+    skeleton.angle_names order (ANGLE_JOINTS for the body)
+    """
+    points = np.asarray(landmarks, dtype=np.float64)[..., :3]
+    triplets = skeleton.angle_triplets
+    a = points[:, triplets[:, 0]]
+    b = points[:, triplets[:, 1]]
+    c = points[:, triplets[:, 2]]
+    v1 = a - b
+    v2 = c - b
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = np.einsum("nkd,nkd->nk", v1, v2) / (
+            np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1)
+        )
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+def batch_symmetry(landmarks: np.ndarray, skeleton: Skeleton = BODY) -> np.ndarray:
+    """
+    (N, L, >=3) landmarks -> (N, K) symmetry scores, columns in
+    skeleton.pair_names order (SYMMETRY_PARTS for the body)
+    """
+    points = np.asarray(landmarks, dtype=np.float64)[..., :3]
+    right = points[:, skeleton.symmetry_pairs[:, 0]]
+    left = points[:, skeleton.symmetry_pairs[:, 1]]
+    center = (right + left) / 2
+    right_dist = np.linalg.norm(right - center, axis=-1)
+    left_dist = np.linalg.norm(left - center, axis=-1)
+    max_dist = np.maximum(right_dist, left_dist)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        symmetry = 1.0 - np.abs(right_dist - left_dist) / max_dist
+    return np.where(max_dist == 0, 1.0, symmetry)
+
+def batch_suggestion_codes(angles: np.ndarray, symmetry: np.ndarray) -> np.ndarray:
+    """
+    (N, 9) angles and (N, 4) symmetry -> (N,) uint16 bit flags of the
+    suggestions generate_pose_suggestions would emit for each row
+    """
+    codes = np.zeros(len(angles), dtype=np.uint16)
+    for i, part in enumerate(SYMMETRY_PARTS):
+        codes |= np.where(symmetry[:, i] < SYMMETRY_THRESHOLD, SUGGESTION_SYMMETRY_BITS[part], 0).astype(np.uint16)
+
+    col = {joint: i for i, joint in enumerate(ANGLE_JOINTS)}
+    with np.errstate(invalid="ignore"):
+        spine = angles[:, col["spine"]] < SPINE_MIN_ANGLE
+        knees = (angles[:, col["right_knee"]] < KNEE_BEND_ANGLE) & (angles[:, col["left_knee"]] < KNEE_BEND_ANGLE)
+        elbows = (angles[:, col["right_elbow"]] < ELBOW_BEND_ANGLE) | (angles[:, col["left_elbow"]] < ELBOW_BEND_ANGLE)
+    codes |= np.where(spine, SUGGESTION_SPINE, 0).astype(np.uint16)
+    codes |= np.where(knees, SUGGESTION_KNEES, 0).astype(np.uint16)
+    codes |= np.where(elbows, SUGGESTION_ELBOWS, 0).astype(np.uint16)
+
+    codes |= np.where(codes == 0, SUGGESTION_GENERAL, 0).astype(np.uint16)
+    return codes
+
+def analyze_pose_batch(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Score a whole batch of poses in one vectorized pass.
+
+    Returns arrays: angles (N, 9), symmetry (N, 4), codes (N,),
+    scores (N,) (higher is better, -inf for frames without a pose) and valid (N,).
+    """
+    landmarks = np.asarray(landmarks)
+    valid = ~np.isnan(landmarks[..., :3]).any(axis=(1, 2))
+    angles = batch_joint_angles(landmarks)
+    symmetry = batch_symmetry(landmarks)
+    codes = batch_suggestion_codes(angles, symmetry)
+    codes[~valid] = 0
+
+    issues = np.zeros(len(codes), dtype=np.int32)
+    for bit, _, _ in SUGGESTION_MESSAGES:
+        if bit != SUGGESTION_GENERAL:
+            issues += ((codes & bit) != 0).astype(np.int32)
+    mean_symmetry = np.nan_to_num(symmetry).mean(axis=1)
+    scores = np.where(valid, mean_symmetry - ISSUE_PENALTY * issues, -np.inf)
+
+    return {"angles": angles, "symmetry": symmetry, "codes": codes, "scores": scores, "valid": valid}
+
+def render_suggestions(codes: np.ndarray, rows: Optional[List[int]] = None) -> List[Dict[str, str]]:
+    """
+    Render suggestion dicts (same keys/messages as generate_pose_suggestions)
+    only for the requested rows
+    """
+    if rows is None:
+        rows = range(len(codes))
+    rendered = []
+    for row in rows:
+        code = int(codes[row])
+        rendered.append({key: message for bit, key, message in SUGGESTION_MESSAGES if code & bit})
+    return rendered
+
+def best_poses(scores: np.ndarray, top_k: int = 1) -> np.ndarray:
+    """
+    Indices of the top_k highest-scoring poses, best first
+    """
+    top_k = min(top_k, len(scores))
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -0,0 +1,152 @@
+"""
+Structured pose descriptions.
+
+Joint angles are classified into typed records (joint, category, angle) in
+one vectorized pass; text is only rendered when a consumer reads it, from
+templates compiled once per language. The compact form is what goes into
+Gemini prompts.
+"""
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from pose_topology import ANGLE_JOINTS
+
+class JointDescription(NamedTuple):
+    joint: str
+    category: str
+    angle: float
+
+# Category codes; "angle" (shoulders, hips) and "aligned" (spine) only report the angle
+CATEGORIES = ("angle", "straight", "slightly_bent", "bent", "aligned")
+ANGLE, STRAIGHT, SLIGHTLY_BENT, BENT, ALIGNED = range(len(CATEGORIES))
+
+# (straight above, slightly bent above) in degrees, per joint kind
+BEND_THRESHOLDS = {
+    "elbow": (150.0, 90.0),
+    "knee": (160.0, 110.0),
+}
+
+TEMPLATES = {
+    "en": {
+        "angle": "at {angle:.1f} degrees",
+        "straight": "straight",
+        "slightly_bent": "slightly bent at {angle:.1f} degrees",
+        "bent": "bent at {angle:.1f} degrees",
+        "aligned": "spine aligned at {angle:.1f} degrees",
+    },
+    "ja": {
+        "angle": "{angle:.1f}度",
+        "straight": "まっすぐ",
+        "slightly_bent": "{angle:.1f}度でやや曲がっている",
+        "bent": "{angle:.1f}度で曲がっている",
+        "aligned": "背筋は{angle:.1f}度",
+    },
+}
+
+# Bound str.format methods per language and category
+_FORMATTERS = {
+    lang: {category: template.format for category, template in templates.items()}
+    for lang, templates in TEMPLATES.items()
+}
+
+# Per-joint thresholds in ANGLE_JOINTS order; joints without bend
+# thresholds always get their fixed category
+_KINDS = [joint.rsplit("_", 1)[-1] for joint in ANGLE_JOINTS]
+_BENDS = np.array([kind in BEND_THRESHOLDS for kind in _KINDS])
+_STRAIGHT_ABOVE = np.array([BEND_THRESHOLDS.get(kind, (np.inf, np.inf))[0] for kind in _KINDS])
+_SLIGHTLY_BENT_ABOVE = np.array([BEND_THRESHOLDS.get(kind, (np.inf, np.inf))[1] for kind in _KINDS])
+_FIXED = np.array([ALIGNED if kind == "spine" else ANGLE for kind in _KINDS])
+
+# The same rules as plain tuples, for classifying a single pose without numpy overhead
+_RULES = tuple(zip(ANGLE_JOINTS, _BENDS.tolist(), _STRAIGHT_ABOVE.tolist(),
+                   _SLIGHTLY_BENT_ABOVE.tolist(), [CATEGORIES[code] for code in _FIXED]))
+
+# get_pose_description keys
+DESCRIPTION_KEYS = tuple(f"{joint}_desc" for joint in ANGLE_JOINTS)
+_KEY_INDEX = {key: i for i, key in enumerate(DESCRIPTION_KEYS)}
+
+def categorize(angles: np.ndarray) -> np.ndarray:
+    """
+    Category codes for (..., J) joint angles in ANGLE_JOINTS order
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    bend = np.where(angles > _STRAIGHT_ABOVE, STRAIGHT,
+                    np.where(angles > _SLIGHTLY_BENT_ABOVE, SLIGHTLY_BENT, BENT))
+    return np.where(_BENDS, bend, _FIXED)
+
+class PoseDescriptions(Mapping):
+    """
+    Read-only mapping of "<joint>_desc" -> text over JointDescription records.
+    Each value is formatted when it is read.
+    """
+
+    def __init__(self, records: Sequence[JointDescription], lang: str = "en"):
+        if lang not in _FORMATTERS:
+            raise ValueError(f"Unsupported language: {lang}")
+        self.records: Tuple[JointDescription, ...] = tuple(records)
+        self.lang = lang
+
+    def __getitem__(self, key: str) -> str:
+        record = self.records[_KEY_INDEX[key]]
+        return _FORMATTERS[self.lang][record.category](angle=record.angle)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(DESCRIPTION_KEYS[:len(self.records)])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f"PoseDescriptions({self.compact()!r}, lang={self.lang!r})"
+
+    def in_language(self, lang: str) -> "PoseDescriptions":
+        return PoseDescriptions(self.records, lang)
+
+    def render(self) -> Dict[str, str]:
+        """
+        Format every description
+        """
+        return dict(self.items())
+
+    def compact(self) -> str:
+        """
+        One-line summary for prompts, e.g. "right_elbow=165(straight) spine=172"
+        """
+        return " ".join(
+            f"{joint}={angle:.0f}" if category in ("angle", "aligned")
+            else f"{joint}={angle:.0f}({category})"
+            for joint, category, angle in self.records
+        )
+
+def describe_angles(angles: Sequence[float], lang: str = "en") -> PoseDescriptions:
+    """
+    Describe one pose's (J,) joint angles in ANGLE_JOINTS order
+    """
+    records = []
+    for (joint, bends, straight_above, slightly_bent_above, fixed), angle in zip(_RULES, angles):
+        angle = float(angle)
+        if not bends:
+            category = fixed
+        elif angle > straight_above:
+            category = "straight"
+        elif angle > slightly_bent_above:
+            category = "slightly_bent"
+        else:
+            category = "bent"
+        records.append(JointDescription(joint, category, angle))
+    return PoseDescriptions(records, lang)
+
+def describe_batch(angles: np.ndarray, lang: str = "en") -> List[PoseDescriptions]:
+    """
+    Describe (N, J) joint angles, classifying all poses at once
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    codes = categorize(angles)
+    return [
+        PoseDescriptions([JointDescription(joint, CATEGORIES[code], angle)
+                          for joint, code, angle in zip(ANGLE_JOINTS, row_codes.tolist(), row.tolist())],
+                         lang)
+        for row, row_codes in zip(angles, codes)
+    ]
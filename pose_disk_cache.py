@@ -0,0 +1,204 @@
+"""
+Pose detections cached on disk, keyed by the decoded image pixels and the
+detector configuration, so re-uploads and batch re-runs skip inference.
+Shared by every process on the machine and kept across restarts.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from atomic_io import atomic_write
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+POSE_CACHE_DIR = os.getenv(
+    "POSE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pose-to-image", "poses")
+)
+POSE_CACHE_MAX_BYTES = int(os.getenv("POSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Evict down to this fraction of the cap so eviction scans stay rare
+EVICT_TO_FRACTION = 0.9
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def image_digest(pil_image) -> str:
+    """
+    SHA-256 of the decoded pixels (plus mode and size), so re-encoded
+    uploads of the same image share a cache entry
+    """
+    digest = hashlib.sha256(f"{pil_image.mode}:{pil_image.size}:".encode("ascii"))
+    digest.update(pil_image.tobytes())
+    return digest.hexdigest()
+
+def pose_cache_key(digest: str, config: Dict) -> str:
+    """
+    Cache key: SHA-256 over the image digest and the canonical JSON of the
+    preprocessing version and detector configuration
+    """
+    canonical = json.dumps({"image_sha256": digest, "config": config},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class CachedPose:
+    """
+    Compact extract_pose result: landmarks ((33, 4) or None when no pose was
+    found), joint angles and the working image shape. Descriptions are
+    rebuilt from the angles on load.
+    """
+
+    def __init__(self, landmarks: Optional[np.ndarray], angles: Optional[np.ndarray],
+                 image_shape, prescreen: Optional[str] = None):
+        self.landmarks = landmarks
+        self.angles = angles
+        self.image_shape = tuple(image_shape)
+        self.prescreen = prescreen
+
+    def to_npz(self) -> bytes:
+        meta = {
+            "image_shape": list(self.image_shape),
+            "prescreen": self.prescreen,
+        }
+        arrays = {"meta": np.array(json.dumps(meta))}
+        if self.landmarks is not None:
+            arrays["landmarks"] = np.asarray(self.landmarks, dtype=np.float32)
+            arrays["angles"] = np.asarray(self.angles, dtype=np.float64)
+        buf = io.BytesIO()
+        np.savez_compressed(buf, **arrays)
+        return buf.getvalue()
+
+    @classmethod
+    def from_npz(cls, data: bytes) -> "CachedPose":
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            meta = json.loads(str(npz["meta"]))
+            landmarks = npz["landmarks"] if "landmarks" in npz.files else None
+            angles = npz["angles"] if "angles" in npz.files else None
+        return cls(landmarks, angles, meta["image_shape"], meta.get("prescreen"))
+
+class PoseDiskCache:
+    """
+    Disk-backed LRU cache of extract_pose results, safe to share between
+    processes: entries are written atomically, reads refresh the file's
+    mtime, and the oldest files are evicted once the cache exceeds max_bytes.
+
+    Layout:
+        <root>/<key[:2]>/<key>.npz
+    """
+
+    def __init__(self, root: str = POSE_CACHE_DIR, max_bytes: int = POSE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._written_since_scan = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".npz")
+
+    def get(self, key: str) -> Optional[CachedPose]:
+        """
+        Return the cached pose for key, or None
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = CachedPose.from_npz(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            entry = None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached pose {key}: {str(e)}")
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedPose):
+        """
+        Store an entry, evicting least recently used files if over the cap
+        """
+        data = entry.to_npz()
+        atomic_write(self._path(key), data)
+        with self._lock:
+            if self._written_since_scan is not None:
+                self._written_since_scan += len(data)
+            scan = (self._written_since_scan is None
+                    or self._written_since_scan > self.max_bytes * (1 - EVICT_TO_FRACTION))
+            if scan:
+                self._written_since_scan = 0
+        if scan:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete the least recently used entries until the cache is under
+        EVICT_TO_FRACTION of max_bytes. Returns the number of files removed.
+        """
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".npz"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        target = self.max_bytes * EVICT_TO_FRACTION
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # Evicted by another process
+            total -= size
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def report(self) -> Dict[str, float]:
+        """
+        Hit-rate report
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+def get_default_pose_cache() -> PoseDiskCache:
+    """
+    Return the process-wide pose cache rooted at POSE_CACHE_DIR
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PoseDiskCache(POSE_CACHE_DIR)
+        return _default_cache
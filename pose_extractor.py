@@ -1,14 +1,74 @@
-import mediapipe as mp
 import numpy as np
-import cv2
 from PIL import Image
+import importlib.metadata
 import logging
-from typing import Dict, Tuple
+import os
+import threading
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from pose_backends import POSE_BACKEND
+from pose_batch import batch_joint_angles, batch_symmetry
+from pose_descriptions import describe_angles
+from pose_topology import ANGLE_JOINTS, BODY, POSE_CONNECTIONS, SYMMETRY_PARTS
 
 # Initialize logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# MediaPipe and OpenCV are imported on first use (see get_mediapipe/get_cv2)
+# so that importing this module does not slow down the app's cold start.
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+def get_mediapipe():
+    """
+    Return the mediapipe module, importing it on first use
+    """
+    import mediapipe
+    return mediapipe
+
+def get_cv2():
+    """
+    Return the OpenCV module, importing it on first use
+    """
+    import cv2
+    return cv2
+
+def _warm_up_pose_models():
+    """
+    Import heavy dependencies and load the pose graph once so the first
+    real request does not pay for it
+    """
+    try:
+        get_cv2()
+        mp = get_mediapipe()
+        with mp.solutions.pose.Pose(
+            static_image_mode=True,
+            model_complexity=2,
+            enable_segmentation=True
+        ) as pose:
+            pose.process(np.zeros((64, 64, 3), dtype=np.uint8))
+        logger.debug("Pose models warmed up")
+    except Exception as e:
+        logger.warning(f"Pose model warm-up failed: {str(e)}")
+
+def start_background_warmup() -> threading.Thread:
+    """
+    Start warming up the pose models in a daemon thread (at most once per process)
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_warm_up_pose_models,
+                name="pose-warmup",
+                daemon=True
+            )
+            _warmup_thread.start()
+        return _warmup_thread
+
 def get_pose_refinement_suggestions(landmarks) -> Dict[str, str]:
     """
     Main function to analyze pose and provide refinement suggestions
@@ -29,11 +89,352 @@ def get_pose_refinement_suggestions(landmarks) -> Dict[str, str]:
         logger.error(f"Error in pose refinement analysis: {str(e)}")
         return {"error": "Failed to analyze pose"}
 
-def extract_pose(pil_image) -> Tuple[Image.Image, Dict[str, str], any]:
+# Pose detection settings, tried in order until a pose is found
+DETECTION_ATTEMPTS = [
+    # First attempt: Standard settings
+    {"model_complexity": 2, "min_detection_confidence": 0.3},
+    # Second attempt: Lower confidence threshold
+    {"model_complexity": 2, "min_detection_confidence": 0.2},
+    # Third attempt: Highest sensitivity
+    {"model_complexity": 2, "min_detection_confidence": 0.1}
+]
+
+# Pre-screen verdicts (see prescreen_person)
+PRESCREEN_PERSON = "person"
+PRESCREEN_BORDERLINE = "borderline"
+PRESCREEN_HOPELESS = "hopeless"
+# Set POSE_PRESCREEN=0 to always run the full detection attempts
+POSE_PRESCREEN = os.getenv("POSE_PRESCREEN", "1") != "0"
+# The lite pose model checks a thumbnail of this max side...
+PRESCREEN_MAX_SIDE = 256
+PRESCREEN_CONFIDENCE = 0.1
+# ...and the HOG people detector a copy of this max side (64x128 windows)
+PRESCREEN_HOG_MAX_SIDE = 320
+
+# Warm lite Pose graph and HOG detector per thread, so sessions do not take turns
+_prescreen_state = threading.local()
+
+def _get_prescreen_models():
+    """
+    Return this thread's (lite Pose, HOG people detector)
+    """
+    models = getattr(_prescreen_state, "models", None)
+    if models is None:
+        cv2 = get_cv2()
+        pose = get_mediapipe().solutions.pose.Pose(
+            static_image_mode=True,
+            model_complexity=0,
+            min_detection_confidence=PRESCREEN_CONFIDENCE
+        )
+        hog = cv2.HOGDescriptor()
+        hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+        models = _prescreen_state.models = (pose, hog)
+    return models
+
+def prescreen_person(image_np: np.ndarray) -> str:
+    """
+    Cheap person-presence check (a few milliseconds) before the heavy
+    detection attempts: the lite pose model on a thumbnail, then OpenCV's
+    HOG people detector. Returns PRESCREEN_PERSON if the lite model finds a
+    pose, PRESCREEN_BORDERLINE if only HOG finds a person and
+    PRESCREEN_HOPELESS if neither does. If the pre-screen itself fails
+    (e.g. the lite model cannot be downloaded) the frame is treated as
+    PRESCREEN_PERSON and gets the full detection attempts.
+    """
+    try:
+        cv2 = get_cv2()
+        pose, hog = _get_prescreen_models()
+    except Exception as e:
+        logger.warning(f"Pose pre-screen unavailable, running the full detection: {str(e)}")
+        return PRESCREEN_PERSON
+
+    def thumbnail(max_side):
+        h, w = image_np.shape[:2]
+        scale = min(1.0, max_side / max(h, w))
+        if scale == 1.0:
+            return image_np
+        return cv2.resize(image_np, (max(1, int(w * scale)), max(1, int(h * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    try:
+        if pose.process(thumbnail(PRESCREEN_MAX_SIDE)).pose_landmarks:
+            return PRESCREEN_PERSON
+        rects, _ = hog.detectMultiScale(thumbnail(PRESCREEN_HOG_MAX_SIDE),
+                                        winStride=(8, 8), padding=(8, 8), scale=1.2)
+    except Exception as e:
+        logger.warning(f"Pose pre-screen failed, running the full detection: {str(e)}")
+        return PRESCREEN_PERSON
+    return PRESCREEN_BORDERLINE if len(rects) else PRESCREEN_HOPELESS
+
+def detection_plan(image_np: np.ndarray):
     """
-    Extract pose from image with improved error handling and detection
+    Pre-screen an RGB frame and return (verdict, [(image, attempt index), ...]):
+    the images to run through DETECTION_ATTEMPTS[index], in order.
+    Hopeless frames get no attempts; borderline frames get one pass over
+    the adaptive-threshold preprocess_image output at the highest sensitivity.
     """
+    verdict = prescreen_person(image_np) if POSE_PRESCREEN else PRESCREEN_PERSON
+    if verdict == PRESCREEN_HOPELESS:
+        return verdict, []
+    if verdict == PRESCREEN_BORDERLINE:
+        return verdict, [(preprocess_image(image_np), len(DETECTION_ATTEMPTS) - 1)]
+    enhanced_image = enhance_for_detection(image_np)
+    return verdict, [(enhanced_image, i) for i in range(len(DETECTION_ATTEMPTS))]
+
+# Bump when preprocessing changes the detections, so disk-cached poses are recomputed
+POSE_PREPROCESS_VERSION = 1
+
+@lru_cache(maxsize=1)
+def _mediapipe_version():
     try:
+        return importlib.metadata.version("mediapipe")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def detector_config() -> Dict:
+    """
+    Everything besides the pixels that affects extract_pose's result
+    (part of the pose disk cache key)
+    """
+    backend = get_pose_backend()
+    return {
+        "preprocess_version": POSE_PREPROCESS_VERSION,
+        "working_max_side": 1024,
+        "attempts": DETECTION_ATTEMPTS,
+        "prescreen": {
+            "max_side": PRESCREEN_MAX_SIDE,
+            "confidence": PRESCREEN_CONFIDENCE,
+            "hog_max_side": PRESCREEN_HOG_MAX_SIDE,
+        } if POSE_PRESCREEN else None,
+        "mediapipe": _mediapipe_version(),
+        **({"backend": backend.config()} if backend is not None else {}),
+    }
+
+_pose_backend = None
+_pose_backend_resolved = False
+_pose_backend_lock = threading.Lock()
+
+def get_pose_backend():
+    """
+    The pluggable backend (see pose_backends.py) that replaces the MediaPipe
+    solution when POSE_BACKEND is not "mediapipe", with the landmark model
+    of the detection attempts. Built once per process; None for MediaPipe,
+    or if the backend's runtime or models are missing (logged once, and the
+    MediaPipe solution is used instead).
+    """
+    global _pose_backend, _pose_backend_resolved
+    if POSE_BACKEND == "mediapipe":
+        return None
+    with _pose_backend_lock:
+        if not _pose_backend_resolved:
+            from pose_backends import get_backend
+            try:
+                _pose_backend = get_backend(POSE_BACKEND,
+                                            model_complexity=DETECTION_ATTEMPTS[0]["model_complexity"])
+            except Exception as e:
+                logger.warning(f"Pose backend {POSE_BACKEND!r} unavailable, using MediaPipe: {str(e)}")
+            _pose_backend_resolved = True
+        return _pose_backend
+
+def detect_with_backend(backend, plan) -> Optional[np.ndarray]:
+    """
+    Run a detection_plan on a pose backend; (33, 4) landmarks of the first
+    attempt that finds a pose, or None. A failed attempt only runs the
+    detector, so retrying at a lower threshold is cheap.
+    """
+    for detection_image, attempt in plan:
+        landmarks = backend.detect(detection_image, DETECTION_ATTEMPTS[attempt]["min_detection_confidence"])
+        if landmarks is not None:
+            return landmarks
+    return None
+
+def fallback_pose(image_shape, verdict: str) -> Tuple[Image.Image, Dict[str, str], None]:
+    """
+    extract_pose result when no pose was found: the basic stick figure,
+    flagged with info["low_confidence"] and the pre-screen verdict
+    """
+    image = Image.fromarray(create_basic_stick_figure(image_shape))
+    image.info["low_confidence"] = True
+    image.info["prescreen"] = verdict
+    return image, get_default_pose_descriptions(), None
+
+def enhance_for_detection(image_np: np.ndarray) -> np.ndarray:
+    """
+    Apply the contrast/denoise/sharpen pipeline used before pose detection
+    """
+    cv2 = get_cv2()
+
+    # Convert color space
+    image_rgb = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+
+    # Image enhancement pipeline
+    # 1. Contrast enhancement
+    enhanced_image = cv2.convertScaleAbs(image_rgb, alpha=1.2, beta=10)
+    # 2. Noise reduction
+    enhanced_image = cv2.GaussianBlur(enhanced_image, (3,3), 0)
+    # 3. Sharpening
+    kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
+    enhanced_image = cv2.filter2D(enhanced_image, -1, kernel)
+
+    return enhanced_image
+
+def landmarks_to_array(pose_landmarks) -> np.ndarray:
+    """
+    Convert a MediaPipe landmark list to a (33, 4) array of x, y, z, visibility
+    """
+    return np.array(
+        [[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks.landmark],
+        dtype=np.float32
+    )
+
+def array_to_landmarks(landmarks: np.ndarray) -> SimpleNamespace:
+    """
+    Lightweight stand-in for a MediaPipe landmark list built from a (33, 4)
+    array, usable wherever `.landmark[i].x/y/z/visibility` is read
+    """
+    return SimpleNamespace(landmark=[
+        SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v))
+        for x, y, z, v in landmarks
+    ])
+
+def draw_landmark_array(canvas: np.ndarray, landmarks: np.ndarray,
+                        landmark_color=(50, 205, 50), connection_color=(30, 144, 255),
+                        thickness: int = 2, circle_radius: int = 4,
+                        visibility_threshold: float = 0.5,
+                        connections: np.ndarray = POSE_CONNECTIONS) -> np.ndarray:
+    """
+    Draw a stick figure from an (L, 4) normalized landmark array onto canvas
+    (body landmarks unless another skeleton's connections are given)
+    """
+    cv2 = get_cv2()
+
+    height, width = canvas.shape[:2]
+    pixels = np.round(landmarks[:, :2] * [width, height]).astype(np.int32)
+    visible = landmarks[:, 3] >= visibility_threshold
+
+    for start, end in connections:
+        if visible[start] and visible[end]:
+            cv2.line(canvas, tuple(pixels[start]), tuple(pixels[end]), connection_color, thickness)
+    for idx in np.flatnonzero(visible):
+        cv2.circle(canvas, tuple(pixels[idx]), circle_radius, landmark_color, -1)
+
+    return canvas
+
+def _extract_pose_remote(pil_image, socket_path: str) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    extract_pose through the local pose server (see pose_server.py).
+    Returns results as a lightweight object with a pose_landmarks attribute.
+    """
+    from pose_server import PoseServerClient
+
+    image_np = np.array(pil_image.convert("RGB"))
+    target_size = 1024
+    h, w = image_np.shape[:2]
+    if max(h, w) > target_size:
+        scale = target_size / max(h, w)
+        image_np = get_cv2().resize(image_np, (int(w * scale), int(h * scale)))
+
+    landmarks, verdict = PoseServerClient(socket_path).detect(image_np)
+    if landmarks is None:
+        logger.error(f"Failed to detect pose (pre-screen: {verdict})")
+        return fallback_pose(image_np.shape, verdict)
+    return result_from_landmarks(landmarks, image_np.shape)
+
+def result_from_landmarks(landmarks: np.ndarray, image_shape) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    extract_pose result for a (33, 4) landmark array found outside the
+    MediaPipe solution, with results as a lightweight object
+    """
+    canvas = draw_landmark_array(np.zeros(image_shape, dtype=np.uint8), landmarks)
+    results = SimpleNamespace(pose_landmarks=array_to_landmarks(landmarks))
+    pose_descriptions = get_pose_description(calculate_joint_angles(results.pose_landmarks))
+    return Image.fromarray(canvas), pose_descriptions, results
+
+def _cache_entry(result):
+    """
+    Compact disk-cache entry for an extract_pose result
+    """
+    from pose_disk_cache import CachedPose
+
+    image, _, results = result
+    landmarks = angles = None
+    if results is not None:
+        landmarks = landmarks_to_array(results.pose_landmarks)
+        angles = batch_joint_angles(landmarks[None])[0]
+    return CachedPose(landmarks, angles, (image.height, image.width, 3),
+                      image.info.get("prescreen"))
+
+def _result_from_cache(entry) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    Rebuild an extract_pose result from a cache entry (a detection),
+    re-rendering the stick figure
+    """
+    canvas = draw_landmark_array(np.zeros(entry.image_shape, dtype=np.uint8), entry.landmarks)
+    results = SimpleNamespace(pose_landmarks=array_to_landmarks(entry.landmarks))
+    return Image.fromarray(canvas), describe_angles(entry.angles), results
+
+def extract_pose(pil_image, cache=None) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    Extract pose from image with improved error handling and detection.
+
+    Detected poses are kept in the pose disk cache, keyed by the image
+    pixels and detector_config(); a hit skips inference entirely and returns
+    results as a lightweight object with pose_landmarks. Fallback results
+    (no pose found) are not cached, so a pre-screen miss or a transient
+    failure is retried on the next call. Set cache=False to bypass it.
+    """
+    return cached_pose(pil_image, lambda: detect_pose(pil_image), cache)
+
+def cached_pose(pil_image, detect: Callable[[], Tuple], cache=None,
+                settings: Optional[Dict] = None) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    Serve detect()'s extract_pose-style result from the pose disk cache,
+    keyed by image_digest(pil_image), detector_config() and any extra
+    settings of the caller's pipeline. Only detections are stored.
+    """
+    if cache is None:
+        from pose_disk_cache import get_default_pose_cache
+        cache = get_default_pose_cache()
+
+    key = None
+    if cache:
+        from pose_disk_cache import image_digest, pose_cache_key
+        config = detector_config()
+        if settings:
+            config = dict(config, pipeline=settings)
+        key = pose_cache_key(image_digest(pil_image), config)
+        entry = cache.get(key)
+        # Entries without landmarks (fallbacks stored by older versions) are misses
+        if entry is not None and entry.landmarks is not None:
+            logger.debug(f"Pose served from cache {key}")
+            return _result_from_cache(entry)
+
+    result = detect()
+    # Only detections are cached, not errors or fallback stick figures
+    if cache and result[2] is not None:
+        try:
+            cache.put(key, _cache_entry(result))
+        except OSError as e:
+            logger.warning(f"Could not cache pose {key}: {str(e)}")
+    return result
+
+def detect_pose(pil_image) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    extract_pose without the disk cache: pre-screen, then pose detection
+    (through the pose server if POSE_SERVER_SOCKET is set, on the
+    POSE_BACKEND backend if it is not MediaPipe and could be loaded)
+    """
+    socket_path = os.getenv("POSE_SERVER_SOCKET")
+    if socket_path:
+        try:
+            return _extract_pose_remote(pil_image, socket_path)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Pose server unavailable, running in-process: {str(e)}")
+
+    try:
+        mp = get_mediapipe()
+        cv2 = get_cv2()
+
         # Convert PIL Image to numpy array
         image_np = np.array(pil_image)
 
@@ -45,66 +446,49 @@ def extract_pose(pil_image) -> Tuple[Image.Image, Dict[str, str], any]:
             scale = target_size / max(h, w)
             image_np = cv2.resize(image_np, (int(w * scale), int(h * scale)))
 
-        # Convert color space
-        image_rgb = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        verdict, plan = detection_plan(image_np)
+        # Only the shape is needed from here on; free the working copy
+        image_shape = image_np.shape
+        del image_np
 
-        # Image enhancement pipeline
-        enhanced_image = image_rgb.copy()
-        # 1. Contrast enhancement
-        enhanced_image = cv2.convertScaleAbs(enhanced_image, alpha=1.2, beta=10)
-        # 2. Noise reduction
-        enhanced_image = cv2.GaussianBlur(enhanced_image, (3,3), 0)
-        # 3. Sharpening
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        enhanced_image = cv2.filter2D(enhanced_image, -1, kernel)
+        if verdict == PRESCREEN_HOPELESS:
+            logger.debug("Pre-screen found no person, skipping pose detection")
+            return fallback_pose(image_shape, verdict)
+
+        backend = get_pose_backend()
+        if backend is not None:
+            landmarks = detect_with_backend(backend, plan)
+            del plan
+            if landmarks is None:
+                logger.error(f"Failed to detect pose after all attempts (pre-screen: {verdict})")
+                return fallback_pose(image_shape, verdict)
+            return result_from_landmarks(landmarks, image_shape)
 
         # Initialize MediaPipe Pose with multiple detection attempts
         mp_pose = mp.solutions.pose
-        detection_attempts = [
-            # First attempt: Standard settings
-            {"model_complexity": 2, "min_detection_confidence": 0.3},
-            # Second attempt: Lower confidence threshold
-            {"model_complexity": 2, "min_detection_confidence": 0.2},
-            # Third attempt: Highest sensitivity
-            {"model_complexity": 2, "min_detection_confidence": 0.1}
-        ]
 
         results = None
-        for attempt_config in detection_attempts:
+        for detection_image, attempt in plan:
+            attempt_config = DETECTION_ATTEMPTS[attempt]
             logger.debug(f"Attempting pose detection with config: {attempt_config}")
             with mp_pose.Pose(
                 static_image_mode=True,
                 enable_segmentation=True,
                 **attempt_config
             ) as pose:
-                results = pose.process(enhanced_image)
+                results = pose.process(detection_image)
                 if results.pose_landmarks:
                     logger.debug(f"Pose detected successfully with config: {attempt_config}")
                     break
+        del plan, detection_image
 
         if not results or not results.pose_landmarks:
-            logger.error("Failed to detect pose after all attempts")
-            return None, get_default_pose_descriptions(), None
-
-        # Create visualization canvas
-        canvas = np.zeros(image_np.shape, dtype=np.uint8)
-
-        # Enhanced drawing settings
-        mp_drawing = mp.solutions.drawing_utils
-        mp_drawing.draw_landmarks(
-            canvas,
-            results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=mp_drawing.DrawingSpec(
-                color=(50, 205, 50),
-                thickness=4,
-                circle_radius=4
-            ),
-            connection_drawing_spec=mp_drawing.DrawingSpec(
-                color=(30, 144, 255),
-                thickness=2
-            )
-        )
+            logger.error(f"Failed to detect pose after all attempts (pre-screen: {verdict})")
+            return fallback_pose(image_shape, verdict)
+
+        # Same renderer as cached and backend results, so a pose always looks the same
+        canvas = draw_landmark_array(np.zeros(image_shape, dtype=np.uint8),
+                                     landmarks_to_array(results.pose_landmarks))
 
         # Calculate angles and get descriptions
         angles = calculate_joint_angles(results.pose_landmarks)
@@ -137,6 +521,7 @@ def create_basic_stick_figure(image_shape) -> np.ndarray:
     """
     Create a basic stick figure when pose detection fails
     """
+    cv2 = get_cv2()
     height, width = image_shape[:2] if len(image_shape) > 2 else image_shape
     canvas = np.zeros((height, width, 3), dtype=np.uint8)
 
@@ -177,68 +562,9 @@ def calculate_joint_angles(landmarks) -> Dict[str, float]:
     Calculate all relevant joint angles from pose landmarks
     """
     try:
-        # Convert landmarks to numpy arrays
-        points = {}
-        for idx, landmark in enumerate(landmarks.landmark):
-            points[idx] = np.array([landmark.x, landmark.y, landmark.z])
-
-        # Calculate angles for each joint
-        angles = {
-            # Right arm angles
-            "right_shoulder": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_ELBOW.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value]
-            ),
-            "right_elbow": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_WRIST.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_ELBOW.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value]
-            ),
-
-            # Left arm angles
-            "left_shoulder": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-            ),
-            "left_elbow": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.LEFT_WRIST.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value]
-            ),
-
-            # Right leg angles
-            "right_hip": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_KNEE.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value]
-            ),
-            "right_knee": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_ANKLE.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_KNEE.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value]
-            ),
-
-            # Left leg angles
-            "left_hip": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.LEFT_KNEE.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_HIP.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value]
-            ),
-            "left_knee": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.LEFT_ANKLE.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_KNEE.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-            ),
-
-            # Spine angle
-            "spine": calculate_angle(
-                points[mp.solutions.pose.PoseLandmark.NOSE.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value],
-                points[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value]
-            )
-        }
+        # Angle triplets come precompiled from the skeleton topology
+        points = landmarks_to_array(landmarks)
+        angles = dict(zip(ANGLE_JOINTS, batch_joint_angles(points[None])[0].tolist()))
 
         return angles
     except Exception as e:
@@ -256,40 +582,15 @@ def calculate_joint_angles(landmarks) -> Dict[str, float]:
             "spine": 90.0
         }
 
-def get_pose_description(angles: Dict[str, float]) -> Dict[str, str]:
+def get_pose_description(angles: Dict[str, float], lang: str = "en") -> Mapping[str, str]:
     """
-    Convert numerical angles to natural language descriptions
+    Convert numerical angles to natural language descriptions.
+
+    Returns a PoseDescriptions mapping: the (joint, category, angle) records
+    are classified up front, the text is formatted when it is read.
     """
     try:
-        def describe_angle(angle: float, joint_type: str) -> str:
-            if joint_type == "elbow":
-                if angle > 150:
-                    return "straight"
-                elif angle > 90:
-                    return f"slightly bent at {angle:.1f} degrees"
-                else:
-                    return f"bent at {angle:.1f} degrees"
-            elif joint_type == "knee":
-                if angle > 160:
-                    return "straight"
-                elif angle > 110:
-                    return f"slightly bent at {angle:.1f} degrees"
-                else:
-                    return f"bent at {angle:.1f} degrees"
-            else:  # shoulder, hip
-                return f"at {angle:.1f} degrees"
-
-        return {
-            "right_shoulder_desc": describe_angle(angles["right_shoulder"], "shoulder"),
-            "right_elbow_desc": describe_angle(angles["right_elbow"], "elbow"),
-            "left_shoulder_desc": describe_angle(angles["left_shoulder"], "shoulder"),
-            "left_elbow_desc": describe_angle(angles["left_elbow"], "elbow"),
-            "right_hip_desc": describe_angle(angles["right_hip"], "hip"),
-            "right_knee_desc": describe_angle(angles["right_knee"], "knee"),
-            "left_hip_desc": describe_angle(angles["left_hip"], "hip"),
-            "left_knee_desc": describe_angle(angles["left_knee"], "knee"),
-            "spine_desc": f"spine aligned at {angles['spine']:.1f} degrees"
-        }
+        return describe_angles([angles[joint] for joint in ANGLE_JOINTS], lang)
     except Exception as e:
         logger.error(f"Error creating pose descriptions: {str(e)}")
         return get_default_pose_descriptions()
@@ -298,6 +599,8 @@ def analyze_image_content(image):
     """
     First stage: Analyze the image content to understand the subject
     """
+    mp = get_mediapipe()
+    cv2 = get_cv2()
     mp_pose = mp.solutions.pose
     with mp_pose.Pose(
         static_image_mode=True,
@@ -335,6 +638,8 @@ def preprocess_image(image):
     """
     Preprocess the image to improve pose detection
     """
+    cv2 = get_cv2()
+
     # Convert to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
 
@@ -352,11 +657,11 @@ def create_enhanced_stick_figure(results, image_shape, thickness_multiplier=2.0)
     """
     Second stage: Create an enhanced stick figure representation
     """
+    mp = get_mediapipe()
     height, width = image_shape
     canvas = np.zeros((height, width, 3), dtype=np.uint8)
 
     mp_drawing = mp.solutions.drawing_utils
-    mp_pose = mp.solutions.pose
 
     # Customize drawing specs for better visibility
     landmark_drawing_spec = mp_drawing.DrawingSpec(
@@ -373,7 +678,7 @@ def create_enhanced_stick_figure(results, image_shape, thickness_multiplier=2.0)
     mp_drawing.draw_landmarks(
         canvas,
         results.pose_landmarks,
-        mp_pose.POSE_CONNECTIONS,
+        BODY.connection_pairs,
         landmark_drawing_spec,
         connection_drawing_spec
     )
@@ -386,30 +691,9 @@ def analyze_pose_balance(landmarks) -> Dict[str, float]:
     Analyze pose balance and symmetry
     """
     try:
-        # Convert landmarks to numpy arrays
-        points = {}
-        for idx, landmark in enumerate(landmarks.landmark):
-            points[idx] = np.array([landmark.x, landmark.y, landmark.z])
-
-        # Calculate symmetry scores
-        symmetry_scores = {
-            "shoulders": calculate_symmetry(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value]
-            ),
-            "elbows": calculate_symmetry(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_ELBOW.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value]
-            ),
-            "hips": calculate_symmetry(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-            ),
-            "knees": calculate_symmetry(
-                points[mp.solutions.pose.PoseLandmark.RIGHT_KNEE.value],
-                points[mp.solutions.pose.PoseLandmark.LEFT_KNEE.value]
-            )
-        }
+        # Left/right pairs come precompiled from the skeleton topology
+        points = landmarks_to_array(landmarks)
+        symmetry_scores = dict(zip(SYMMETRY_PARTS, batch_symmetry(points[None])[0].tolist()))
         return symmetry_scores
     except Exception as e:
         logger.error(f"Error analyzing pose balance: {str(e)}")
@@ -0,0 +1,155 @@
+import logging
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from image_budget import open_reduced, open_source, working_copy
+from pose_extractor import (
+    cached_pose,
+    detect_pose,
+    fallback_pose,
+    get_default_pose_descriptions,
+    landmarks_to_array,
+    result_from_landmarks,
+)
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Input size of the BlazePose landmark model
+POSE_MODEL_INPUT_SIZE = 256
+# Max side of the low-res pass used to locate the person
+DETECTION_PASS_MAX_SIDE = 512
+# Max side of the rendered stick figure (same as extract_pose's working size)
+RENDER_MAX_SIDE = 1024
+# Fraction of the person box added on every side before the refined crop
+ROI_MARGIN = 0.25
+# Images with a longer side above this go through the ROI pipeline in the app
+ROI_MIN_SIDE = 2048
+# Landmarks below this visibility do not count towards the person box
+BOX_VISIBILITY_THRESHOLD = 0.3
+
+def _crop_full_resolution(source, box: Tuple[float, float, float, float], out_size: int) -> Image.Image:
+    """
+    Crop a box given in normalized coordinates from the original image,
+    decoding only as much resolution as the crop needs
+    """
+    image, owned = open_source(source)
+    full_w, full_h = image.size
+    crop_w = (box[2] - box[0]) * full_w
+    crop_h = (box[3] - box[1]) * full_h
+    ratio = min(1.0, out_size / max(crop_w, crop_h))
+
+    if owned and ratio < 1.0 and image.format == "JPEG":
+        image.draft("RGB", (math.ceil(full_w * ratio), math.ceil(full_h * ratio)))
+    image = image.convert("RGB")
+
+    # Draft may have decoded at a reduced scale; express the box in its pixels
+    w, h = image.size
+    crop = image.crop((round(box[0] * w), round(box[1] * h), round(box[2] * w), round(box[3] * h)))
+    scale = out_size / max(crop.size)
+    return crop.resize((max(1, round(crop.width * scale)), max(1, round(crop.height * scale))),
+                       Image.LANCZOS)
+
+def _person_box(landmarks: np.ndarray, aspect: float) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Normalized, margin-expanded, roughly square box around the visible landmarks.
+    aspect is width / height of the image the landmarks are normalized to.
+    """
+    visible = landmarks[landmarks[:, 3] >= BOX_VISIBILITY_THRESHOLD]
+    if len(visible) == 0:
+        return None
+
+    x0, y0 = visible[:, 0].min(), visible[:, 1].min()
+    x1, y1 = visible[:, 0].max(), visible[:, 1].max()
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+
+    # Square in pixels: half side measured in height units
+    half = max((x1 - x0) * aspect, y1 - y0) / 2 * (1 + 2 * ROI_MARGIN)
+    half_x, half_y = half / aspect, half
+    return (
+        float(max(0.0, cx - half_x)),
+        float(max(0.0, cy - half_y)),
+        float(min(1.0, cx + half_x)),
+        float(min(1.0, cy + half_y))
+    )
+
+def roi_settings(full_size: Tuple[int, int], refine_size: int) -> Dict:
+    """
+    Everything besides the working copy's pixels and detector_config() that
+    affects extract_pose_roi's result (part of its pose cache key)
+    """
+    return {
+        "roi": {
+            "full_size": list(full_size),
+            "detection_max_side": DETECTION_PASS_MAX_SIDE,
+            "render_max_side": RENDER_MAX_SIDE,
+            "margin": ROI_MARGIN,
+            "refine_size": refine_size,
+            "box_visibility": BOX_VISIBILITY_THRESHOLD,
+        }
+    }
+
+def extract_pose_roi(source, refine_size: int = POSE_MODEL_INPUT_SIZE,
+                     cache=None) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    Extract pose from a (large) image with a two-pass ROI pipeline:
+    a low-res pass locates the person, then a crop of the full-resolution
+    original, scaled to refine_size, is used for the refined pass.
+
+    source may be a path, a file-like object or a PIL image. Returns the same
+    tuple as extract_pose, with landmarks in original-image coordinates.
+    Both passes run through extract_pose's detection path (pre-screen,
+    pose server, pose backend, low-confidence fallback), and detections are
+    kept in the pose disk cache like extract_pose's (cache=False bypasses it).
+    """
+    try:
+        working, full_size = open_reduced(source, RENDER_MAX_SIDE)
+    except Exception as e:
+        logger.error(f"Error in ROI pose extraction: {str(e)}")
+        return None, get_default_pose_descriptions(), None
+
+    return cached_pose(working, lambda: _detect_roi(source, working, full_size, refine_size),
+                       cache, roi_settings(full_size, refine_size))
+
+def _detect_roi(source, working: Image.Image, full_size: Tuple[int, int],
+                refine_size: int) -> Tuple[Image.Image, Dict[str, str], any]:
+    """
+    The two detection passes of extract_pose_roi, rendered at the working size
+    """
+    try:
+        render_shape = (working.height, working.width, 3)
+
+        # 1. Low-res detection pass
+        coarse_image, _, coarse = detect_pose(working_copy(working, DETECTION_PASS_MAX_SIDE))
+        if coarse_image is None:
+            return None, get_default_pose_descriptions(), None
+        if coarse is None:
+            logger.debug("ROI detection pass found no person")
+            return fallback_pose(render_shape, coarse_image.info.get("prescreen"))
+
+        landmarks = landmarks_to_array(coarse.pose_landmarks)
+        box = _person_box(landmarks, full_size[0] / full_size[1])
+        if box is not None:
+            logger.debug(f"ROI box (normalized): {box}")
+
+            # 2. Refined pass on the full-resolution crop
+            _, _, refined = detect_pose(_crop_full_resolution(source, box, refine_size))
+            if refined is not None:
+                # Map crop-normalized landmarks back to original-image coordinates
+                landmarks = landmarks_to_array(refined.pose_landmarks)
+                bw, bh = box[2] - box[0], box[3] - box[1]
+                landmarks[:, 0] = box[0] + landmarks[:, 0] * bw
+                landmarks[:, 1] = box[1] + landmarks[:, 1] * bh
+                landmarks[:, 2] = landmarks[:, 2] * bw
+
+        # 3. Render at the working resolution
+        logger.debug("Successfully processed pose with ROI pipeline")
+        return result_from_landmarks(landmarks, render_shape)
+
+    except Exception as e:
+        logger.error(f"Error in ROI pose extraction: {str(e)}")
+        return None, get_default_pose_descriptions(), None
@@ -0,0 +1,273 @@
+import logging
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from pose_batch import (
+    analyze_pose_batch,
+    render_suggestions,
+)
+from pose_topology import ANGLE_JOINTS, SYMMETRY_PARTS
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# A pose counts as changed when any joint angle moves more than this (degrees)...
+ANGLE_CHANGE_THRESHOLD = 12.0
+# ...or the mean landmark displacement exceeds this (normalized image units)
+POSITION_CHANGE_THRESHOLD = 0.03
+# Consecutive frames over threshold before a change is reported (debounce)
+CHANGE_DEBOUNCE_FRAMES = 2
+
+class OneEuroFilter:
+    """
+    One-Euro filter (Casiez et al.) applied element-wise to landmark arrays:
+    heavy smoothing when landmarks are still, little lag when they move fast.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.5, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        if self._x is None:
+            self._x, self._dx, self._t = x.copy(), np.zeros_like(x), t
+            return x.copy()
+
+        dt = max(t - self._t, 1e-6)
+        dx = (x - self._x) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx = a_d * dx + (1 - a_d) * self._dx
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        a = self._alpha(cutoff, dt)
+        self._x = a * x + (1 - a) * self._x
+        self._t = t
+        return self._x.copy()
+
+class KalmanFilter:
+    """
+    Constant-velocity Kalman filter run independently on every coordinate
+    """
+
+    def __init__(self, process_noise: float = 1e-2, measurement_noise: float = 1e-3):
+        self.q = process_noise
+        self.r = measurement_noise
+        self._x = None   # position estimate
+        self._v = None   # velocity estimate
+        self._p = None   # 2x2 covariance per element: [p00, p01, p11]
+        self._t = None
+
+    def __call__(self, z: np.ndarray, t: float) -> np.ndarray:
+        if self._x is None:
+            self._x, self._v, self._t = z.copy(), np.zeros_like(z), t
+            self._p = [np.full_like(z, self.r), np.zeros_like(z), np.full_like(z, 1.0)]
+            return z.copy()
+
+        dt = max(t - self._t, 1e-6)
+        self._t = t
+        p00, p01, p11 = self._p
+
+        # Predict
+        x = self._x + dt * self._v
+        p00 = p00 + dt * (2 * p01 + dt * p11) + self.q * dt ** 3 / 3
+        p01 = p01 + dt * p11 + self.q * dt ** 2 / 2
+        p11 = p11 + self.q * dt
+
+        # Update
+        k0 = p00 / (p00 + self.r)
+        k1 = p01 / (p00 + self.r)
+        innovation = z - x
+        self._x = x + k0 * innovation
+        self._v = self._v + k1 * innovation
+        self._p = [(1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01]
+        return self._x.copy()
+
+class RunningStats:
+    """
+    Welford running mean/variance/min/max over fixed-size vectors
+    """
+
+    def __init__(self, size: int):
+        self.count = 0
+        self.mean = np.zeros(size)
+        self._m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+
+    def update(self, values: np.ndarray):
+        if np.isnan(values).any():
+            return
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (values - self.mean)
+        self.min = np.minimum(self.min, values)
+        self.max = np.maximum(self.max, values)
+
+    @property
+    def std(self) -> np.ndarray:
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self._m2 / (self.count - 1))
+
+    def summary(self) -> Dict[str, List[float]]:
+        return {
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "min": self.min.tolist(),
+            "max": self.max.tolist(),
+        }
+
+class PoseSequenceAnalyzer:
+    """
+    Incremental analysis of a pose sequence (video or burst).
+
+    Each update() smooths the landmarks, updates running angle/symmetry
+    statistics and checks whether the pose changed beyond the thresholds
+    since the last committed pose. Suggestions are only recomputed, and
+    on_change callbacks (re-render, re-describe, Gemini) only fired, when
+    the pose actually changed.
+    """
+
+    def __init__(self, smoothing: str = "one_euro",
+                 angle_threshold: float = ANGLE_CHANGE_THRESHOLD,
+                 position_threshold: float = POSITION_CHANGE_THRESHOLD,
+                 debounce_frames: int = CHANGE_DEBOUNCE_FRAMES,
+                 on_change: Optional[Callable[[Dict], None]] = None,
+                 **filter_kwargs):
+        if smoothing == "one_euro":
+            self._filter = OneEuroFilter(**filter_kwargs)
+        elif smoothing == "kalman":
+            self._filter = KalmanFilter(**filter_kwargs)
+        elif smoothing == "none":
+            self._filter = None
+        else:
+            raise ValueError(f"Unknown smoothing method: {smoothing}")
+
+        self.angle_threshold = angle_threshold
+        self.position_threshold = position_threshold
+        self.debounce_frames = debounce_frames
+        self.on_change = on_change
+
+        self.angle_stats = RunningStats(len(ANGLE_JOINTS))
+        self.symmetry_stats = RunningStats(len(SYMMETRY_PARTS))
+        self.frames = 0
+        self.changes = 0
+        self._pending = 0
+        self._committed = None
+
+    def _changed(self, landmarks: np.ndarray, angles: np.ndarray) -> bool:
+        if self._committed is None:
+            return True
+        angle_delta = np.nanmax(np.abs(angles - self._committed["angles"]))
+        position_delta = np.nanmean(np.linalg.norm(
+            landmarks[:, :2] - self._committed["landmarks"][:, :2], axis=-1
+        ))
+        return angle_delta > self.angle_threshold or position_delta > self.position_threshold
+
+    def update(self, landmarks: Optional[np.ndarray], timestamp: float) -> Dict:
+        """
+        Feed one frame's (33, 4) landmarks (None if no pose was found).
+
+        Returns a dict with the smoothed landmarks, angles and symmetry of this
+        frame, the committed suggestion code/texts and whether the pose changed.
+        """
+        self.frames += 1
+        if landmarks is None or np.isnan(landmarks[:, :3]).any():
+            return self._frame_result(None, None, None, changed=False)
+
+        smoothed = np.array(landmarks, dtype=np.float64)
+        if self._filter is not None:
+            smoothed[:, :3] = self._filter(smoothed[:, :3], timestamp)
+
+        analysis = analyze_pose_batch(smoothed[None])
+        angles = analysis["angles"][0]
+        symmetry = analysis["symmetry"][0]
+        self.angle_stats.update(angles)
+        self.symmetry_stats.update(symmetry)
+
+        changed = False
+        if self._changed(smoothed, angles):
+            self._pending += 1
+            if self._committed is None or self._pending >= self.debounce_frames:
+                changed = True
+        else:
+            self._pending = 0
+
+        if changed:
+            self._pending = 0
+            self.changes += 1
+            self._committed = {
+                "landmarks": smoothed,
+                "angles": angles,
+                "symmetry": symmetry,
+                "code": int(analysis["codes"][0]),
+                "suggestions": None,
+                "timestamp": timestamp,
+            }
+
+        result = self._frame_result(smoothed, angles, symmetry, changed)
+        if changed and self.on_change is not None:
+            try:
+                self.on_change(result)
+            except Exception as e:
+                logger.error(f"Error in pose change callback: {str(e)}")
+        return result
+
+    def _frame_result(self, landmarks, angles, symmetry, changed: bool) -> Dict:
+        return {
+            "frame": self.frames - 1,
+            "landmarks": landmarks,
+            "angles": angles,
+            "symmetry": symmetry,
+            "changed": changed,
+            "code": self._committed["code"] if self._committed else None,
+        }
+
+    def suggestions(self) -> Dict[str, str]:
+        """
+        Suggestions for the committed pose, rendered once per change
+        """
+        if self._committed is None:
+            return {}
+        if self._committed["suggestions"] is None:
+            self._committed["suggestions"] = render_suggestions(
+                np.array([self._committed["code"]]), [0]
+            )[0]
+        return self._committed["suggestions"]
+
+    def report(self) -> Dict:
+        """
+        Running statistics and how much downstream work was skipped
+        """
+        return {
+            "frames": self.frames,
+            "changes": self.changes,
+            "skipped_ratio": 1.0 - self.changes / self.frames if self.frames else 0.0,
+            "angles": self.angle_stats.summary(),
+            "symmetry": self.symmetry_stats.summary(),
+        }
+
+def analyze_sequence(landmark_frames: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                     **kwargs) -> List[Dict]:
+    """
+    Run a PoseSequenceAnalyzer over an (N, 33, 4) array (NaN rows = no pose).
+    Timestamps default to 30 fps.
+    """
+    if timestamps is None:
+        timestamps = np.arange(len(landmark_frames)) / 30.0
+    analyzer = PoseSequenceAnalyzer(**kwargs)
+    return [analyzer.update(frame, float(t)) for frame, t in zip(landmark_frames, timestamps)]
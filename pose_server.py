@@ -0,0 +1,210 @@
+"""
+Local pose-inference server.
+
+Owns a pool of worker processes, each holding warm MediaPipe Pose graphs,
+and serves detection requests over a Unix socket. Frames are handed over in
+the client's shared-memory frame ring (see frame_transport.py); only a small
+JSON handle crosses the socket, so UI processes never pickle image arrays and
+inference scales across cores independently of the Streamlit workers.
+
+Run it with:
+    python -m pose_server --socket /tmp/pose.sock --workers 4
+
+and point the app at it with POSE_SERVER_SOCKET=/tmp/pose.sock.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from frame_transport import get_frame_ring, view_frame
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+POSE_SERVER_SOCKET = os.getenv("POSE_SERVER_SOCKET")
+POSE_SERVER_WORKERS = int(os.getenv("POSE_SERVER_WORKERS", str(os.cpu_count() or 1)))
+# Seconds a client waits for a detection before falling back to in-process inference
+POSE_SERVER_TIMEOUT = float(os.getenv("POSE_SERVER_TIMEOUT", "30"))
+
+_HEADER = struct.Struct("!I")
+
+# Warm Pose instances of this worker process, one per detection attempt
+_worker_poses = None
+
+def send_message(sock: socket.socket, message: Dict):
+    """
+    Send one length-prefixed JSON message
+    """
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Pose server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def recv_message(sock: socket.socket) -> Dict:
+    """
+    Receive one length-prefixed JSON message
+    """
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+def _init_worker():
+    """
+    Load one Pose graph per detection attempt (or the POSE_BACKEND backend)
+    so requests never pay for it
+    """
+    global _worker_poses
+    from pose_extractor import DETECTION_ATTEMPTS, get_cv2, get_mediapipe, get_pose_backend, prescreen_person
+
+    get_cv2()
+    backend = get_pose_backend()
+    if backend is not None:
+        backend.detect(np.zeros((64, 64, 3), dtype=np.uint8))
+    else:
+        mp = get_mediapipe()
+        _worker_poses = [
+            mp.solutions.pose.Pose(static_image_mode=True, enable_segmentation=True, **attempt_config)
+            for attempt_config in DETECTION_ATTEMPTS
+        ]
+        for pose in _worker_poses:
+            pose.process(np.zeros((64, 64, 3), dtype=np.uint8))
+    prescreen_person(np.zeros((64, 64, 3), dtype=np.uint8))
+    logger.debug(f"Pose worker {os.getpid()} ready")
+
+def _detect_in_worker(frame_message: Dict) -> Tuple[Optional[np.ndarray], str]:
+    """
+    Run the extract_pose pre-screen and detection attempts on a frame in a
+    client's ring. Returns ((33, 4) landmarks or None, pre-screen verdict).
+    """
+    from pose_extractor import detect_with_backend, detection_plan, get_pose_backend, landmarks_to_array
+
+    frame = view_frame(frame_message)
+    verdict, plan = detection_plan(frame)
+    del frame
+
+    if _worker_poses is None:
+        return detect_with_backend(get_pose_backend(), plan), verdict
+    for detection_image, attempt in plan:
+        results = _worker_poses[attempt].process(detection_image)
+        if results.pose_landmarks:
+            return landmarks_to_array(results.pose_landmarks), verdict
+    return None, verdict
+
+class PoseServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Unix-socket front end dispatching detection requests to the worker pool
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, workers: int = POSE_SERVER_WORKERS):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.workers = workers
+        self.pool = multiprocessing.get_context("spawn").Pool(workers, initializer=_init_worker)
+        super().__init__(socket_path, PoseRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        self.pool.join()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+class PoseRequestHandler(socketserver.BaseRequestHandler):
+    """
+    Serve requests on one client connection until it closes
+    """
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except ConnectionError:
+                return
+            send_message(self.request, self._dispatch(request))
+
+    def _dispatch(self, request: Dict) -> Dict:
+        try:
+            if request.get("op") == "ping":
+                return {"ok": True, "workers": self.server.workers}
+            if request.get("op") == "detect":
+                landmarks, verdict = self.server.pool.apply(_detect_in_worker, (request["frame"],))
+                return {
+                    "ok": True,
+                    "landmarks": None if landmarks is None else landmarks.tolist(),
+                    "prescreen": verdict,
+                }
+            return {"ok": False, "error": f"Unknown op: {request.get('op')}"}
+        except Exception as e:
+            logger.error(f"Error serving pose request: {str(e)}")
+            return {"ok": False, "error": str(e)}
+
+class PoseServerClient:
+    """
+    Client side of the pose server: frames go through this process's frame
+    ring and landmarks come back over the socket
+    """
+
+    def __init__(self, socket_path: str = POSE_SERVER_SOCKET, timeout: float = POSE_SERVER_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _request(self, message: Dict) -> Dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            send_message(sock, message)
+            response = recv_message(sock)
+        if not response.get("ok"):
+            raise RuntimeError(f"Pose server error: {response.get('error')}")
+        return response
+
+    def ping(self) -> Dict:
+        return self._request({"op": "ping"})
+
+    def detect(self, image_np: np.ndarray) -> Tuple[Optional[np.ndarray], str]:
+        """
+        Detect a pose in an RGB frame.
+        Returns ((33, 4) landmarks or None, pre-screen verdict).
+        """
+        with get_frame_ring().frame(image_np.shape, image_np.dtype, self.timeout) as handle:
+            handle.array[...] = image_np
+            response = self._request({"op": "detect", "frame": handle.to_message()})
+
+        if response["landmarks"] is None:
+            return None, response["prescreen"]
+        return np.array(response["landmarks"], dtype=np.float32), response["prescreen"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Local pose-inference server")
+    parser.add_argument("--socket", default=POSE_SERVER_SOCKET or "/tmp/pose-server.sock")
+    parser.add_argument("--workers", type=int, default=POSE_SERVER_WORKERS)
+    args = parser.parse_args()
+
+    server = PoseServer(args.socket, args.workers)
+    logger.info(f"Pose server listening on {args.socket} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Skeleton topology compiled once into index arrays.
+
+A Skeleton is declared as data (landmark names, connections, angle triplets
+and left/right pairs, all by name) and compiled at import into integer index
+arrays. Those arrays drive the vectorized analytics in pose_batch and the
+stick-figure drawing, so adding a landmark set (hands, face) is a matter of
+declaring another Skeleton, not writing per-joint code.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+class Skeleton:
+    """
+    Compiled landmark topology: name -> index map plus (K, 2) connection,
+    (K, 3) angle-triplet and (K, 2) left/right pair index arrays
+    """
+
+    def __init__(self, name: str, landmarks: Sequence[str],
+                 connections: Iterable[Tuple[str, str]],
+                 angles: Iterable[Tuple[str, Tuple[str, str, str]]] = (),
+                 pairs: Iterable[Tuple[str, Tuple[str, str]]] = ()):
+        self.name = name
+        self.landmarks = tuple(landmarks)
+        self.index: Dict[str, int] = {landmark: i for i, landmark in enumerate(self.landmarks)}
+
+        angles = list(angles)
+        pairs = list(pairs)
+        self.connections = self._compile(list(connections), 2)
+        # Plain tuples for APIs that want (start, end) pairs (mediapipe drawing)
+        self.connection_pairs = tuple(tuple(int(i) for i in c) for c in self.connections)
+        self.angle_names: List[str] = [joint for joint, _ in angles]
+        # Each triplet is (end point, vertex, end point)
+        self.angle_triplets = self._compile([triplet for _, triplet in angles], 3)
+        self.pair_names: List[str] = [part for part, _ in pairs]
+        # Each pair is (right, left)
+        self.symmetry_pairs = self._compile([pair for _, pair in pairs], 2)
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    def __repr__(self) -> str:
+        return f"Skeleton({self.name!r}, {len(self)} landmarks)"
+
+    def _compile(self, rows: List[Sequence[str]], width: int) -> np.ndarray:
+        array = np.array([[self.index[name] for name in row] for row in rows], dtype=np.intp)
+        return array.reshape(len(rows), width)
+
+def combine(name: str, parts: Sequence[Tuple[str, Skeleton]]) -> Skeleton:
+    """
+    Concatenate skeletons into one landmark array layout, e.g. body + both
+    hands. Each part's names get its prefix; indices are offset accordingly.
+    """
+    landmarks, connections, angles, pairs = [], [], [], []
+    for prefix, skeleton in parts:
+        names = [prefix + landmark for landmark in skeleton.landmarks]
+        landmarks += names
+        connections += [(names[a], names[b]) for a, b in skeleton.connections]
+        angles += [(prefix + joint, tuple(names[i] for i in triplet))
+                   for joint, triplet in zip(skeleton.angle_names, skeleton.angle_triplets)]
+        pairs += [(prefix + part, (names[r], names[l]))
+                  for part, (r, l) in zip(skeleton.pair_names, skeleton.symmetry_pairs)]
+    return Skeleton(name, landmarks, connections, angles, pairs)
+
+# BlazePose body: 33 landmarks in model output order
+BODY = Skeleton(
+    "body",
+    landmarks=[
+        "nose", "left_eye_inner", "left_eye", "left_eye_outer",
+        "right_eye_inner", "right_eye", "right_eye_outer", "left_ear", "right_ear",
+        "mouth_left", "mouth_right", "left_shoulder", "right_shoulder",
+        "left_elbow", "right_elbow", "left_wrist", "right_wrist",
+        "left_pinky", "right_pinky", "left_index", "right_index", "left_thumb", "right_thumb",
+        "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle",
+        "left_heel", "right_heel", "left_foot_index", "right_foot_index",
+    ],
+    # Same edges as mediapipe's POSE_CONNECTIONS
+    connections=[
+        ("nose", "left_eye_inner"), ("left_eye_inner", "left_eye"), ("left_eye", "left_eye_outer"),
+        ("left_eye_outer", "left_ear"), ("nose", "right_eye_inner"), ("right_eye_inner", "right_eye"),
+        ("right_eye", "right_eye_outer"), ("right_eye_outer", "right_ear"), ("mouth_left", "mouth_right"),
+        ("left_shoulder", "right_shoulder"), ("left_shoulder", "left_elbow"), ("left_elbow", "left_wrist"),
+        ("left_wrist", "left_pinky"), ("left_wrist", "left_index"), ("left_wrist", "left_thumb"),
+        ("left_pinky", "left_index"), ("right_shoulder", "right_elbow"), ("right_elbow", "right_wrist"),
+        ("right_wrist", "right_pinky"), ("right_wrist", "right_index"), ("right_wrist", "right_thumb"),
+        ("right_pinky", "right_index"), ("left_shoulder", "left_hip"), ("right_shoulder", "right_hip"),
+        ("left_hip", "right_hip"), ("left_hip", "left_knee"), ("left_knee", "left_ankle"),
+        ("left_ankle", "left_heel"), ("left_ankle", "left_foot_index"), ("left_heel", "left_foot_index"),
+        ("right_hip", "right_knee"), ("right_knee", "right_ankle"), ("right_ankle", "right_heel"),
+        ("right_ankle", "right_foot_index"), ("right_heel", "right_foot_index"),
+    ],
+    # Joint angles in the order of calculate_joint_angles
+    angles=[
+        ("right_shoulder", ("right_elbow", "right_shoulder", "right_hip")),
+        ("right_elbow", ("right_wrist", "right_elbow", "right_shoulder")),
+        ("left_shoulder", ("left_elbow", "left_shoulder", "left_hip")),
+        ("left_elbow", ("left_wrist", "left_elbow", "left_shoulder")),
+        ("right_hip", ("right_knee", "right_hip", "right_shoulder")),
+        ("right_knee", ("right_ankle", "right_knee", "right_hip")),
+        ("left_hip", ("left_knee", "left_hip", "left_shoulder")),
+        ("left_knee", ("left_ankle", "left_knee", "left_hip")),
+        ("spine", ("nose", "right_shoulder", "right_hip")),
+    ],
+    # Left/right pairs in the order of analyze_pose_balance
+    pairs=[
+        ("shoulders", ("right_shoulder", "left_shoulder")),
+        ("elbows", ("right_elbow", "left_elbow")),
+        ("hips", ("right_hip", "left_hip")),
+        ("knees", ("right_knee", "left_knee")),
+    ],
+)
+
+_FINGERS = [
+    ("thumb", ["thumb_cmc", "thumb_mcp", "thumb_ip", "thumb_tip"]),
+    ("index", ["index_finger_mcp", "index_finger_pip", "index_finger_dip", "index_finger_tip"]),
+    ("middle", ["middle_finger_mcp", "middle_finger_pip", "middle_finger_dip", "middle_finger_tip"]),
+    ("ring", ["ring_finger_mcp", "ring_finger_pip", "ring_finger_dip", "ring_finger_tip"]),
+    ("pinky", ["pinky_mcp", "pinky_pip", "pinky_dip", "pinky_tip"]),
+]
+
+# MediaPipe Hands: 21 landmarks; finger flexion measured at the two joints
+# after the knuckle (thumb: mcp/ip, fingers: pip/dip)
+HAND = Skeleton(
+    "hand",
+    landmarks=["wrist"] + [joint for _, joints in _FINGERS for joint in joints],
+    # Same edges as mediapipe's HAND_CONNECTIONS
+    connections=[
+        ("wrist", "thumb_cmc"), ("wrist", "index_finger_mcp"), ("wrist", "pinky_mcp"),
+        ("index_finger_mcp", "middle_finger_mcp"), ("middle_finger_mcp", "ring_finger_mcp"),
+        ("ring_finger_mcp", "pinky_mcp"),
+    ] + [edge for _, joints in _FINGERS for edge in zip(joints, joints[1:])],
+    angles=[
+        (f"{finger}_{joints[i].rsplit('_', 1)[1]}", (joints[i - 1], joints[i], joints[i + 1]))
+        for finger, joints in _FINGERS for i in (1, 2)
+    ],
+)
+
+# Body plus both hands, in the layout of holistic landmark arrays (33 + 21 + 21)
+HOLISTIC = combine("holistic", [("", BODY), ("left_hand_", HAND), ("right_hand_", HAND)])
+
+@lru_cache(maxsize=1)
+def face_skeleton() -> Skeleton:
+    """
+    MediaPipe Face Mesh contours (468 landmarks), built from mediapipe's
+    connection set on first use
+    """
+    from pose_extractor import get_mediapipe
+
+    contours = get_mediapipe().solutions.face_mesh.FACEMESH_CONTOURS
+    landmarks = [f"face_{i}" for i in range(468)]
+    return Skeleton("face", landmarks, [(landmarks[a], landmarks[b]) for a, b in sorted(contours)])
+
+# Body topology under the names the rest of the code uses
+NUM_POSE_LANDMARKS = len(BODY)
+LANDMARK_INDEX = BODY.index
+POSE_CONNECTIONS = BODY.connections
+ANGLE_JOINTS = BODY.angle_names
+ANGLE_TRIPLETS = BODY.angle_triplets
+SYMMETRY_PARTS = BODY.pair_names
+SYMMETRY_PAIRS = BODY.symmetry_pairs
@@ -0,0 +1,170 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from PIL import Image
+
+from atomic_io import atomic_write
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+RESULT_STORE_DIR = os.getenv(
+    "RESULT_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pose-to-image", "results")
+)
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def generation_key(control_image: bytes, prompt: str, negative_prompt: str,
+                   cfg_scale, steps, control_strength, seed) -> str:
+    """
+    Content address of a generation request: SHA-256 over the control image
+    hash and the canonical JSON of every parameter that affects the output
+    """
+    params = {
+        "control_sha256": hashlib.sha256(control_image).hexdigest(),
+        "prompt": prompt,
+        "negative_prompt": negative_prompt,
+        "cfg_scale": cfg_scale,
+        "steps": steps,
+        "control_strength": control_strength,
+        "seed": seed,
+    }
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def request_key(control_image: bytes, style_digest: str, control_strength, seed) -> str:
+    """
+    Address of a style-transfer request before any prompt is composed: the
+    control image hash, the style image's pixel digest and the parameters
+    fixed by the caller. Lets a repeated request skip the Gemini calls, whose
+    prompts are not deterministic.
+    """
+    params = {
+        "control_sha256": hashlib.sha256(control_image).hexdigest(),
+        "style_sha256": style_digest,
+        "control_strength": control_strength,
+        "seed": seed,
+    }
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def request_seed(*digests: str) -> int:
+    """
+    Deterministic non-zero Stability seed for the given input digests
+    (Stability treats seed 0 as "random", so those results are never stored)
+    """
+    digest = hashlib.sha256(":".join(digests).encode("ascii")).digest()
+    return int.from_bytes(digest[:4], "big") % (2 ** 32 - 1) + 1
+
+class ResultStore:
+    """
+    Content-addressed store of generated PNGs and their provenance metadata.
+
+    Layout:
+        <root>/objects/<key[:2]>/<key>.png   generated image
+        <root>/objects/<key[:2]>/<key>.json  metadata (parameters, seed, finish reason)
+        <root>/requests/<rk[:2]>/<rk>.json   request key -> generation key
+        <root>/index.jsonl                   one metadata line per stored result
+    """
+
+    def __init__(self, root: str = RESULT_STORE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._lock = threading.Lock()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.root, "objects", key[:2], key)
+        return base + ".png", base + ".json"
+
+    def get(self, key: str) -> Optional[Tuple[Image.Image, Dict]]:
+        """
+        Return the stored image and metadata for key, or None
+        """
+        png_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            with open(png_path, "rb") as f:
+                image = Image.open(io.BytesIO(f.read()))
+                image.load()
+            return image, metadata
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable stored result {key}: {str(e)}")
+            return None
+
+    def _request_path(self, request: str) -> str:
+        return os.path.join(self.root, "requests", request[:2], request + ".json")
+
+    def get_request(self, request: str) -> Optional[Tuple[Image.Image, Dict]]:
+        """
+        Return the stored image and metadata a request key was linked to, or None
+        """
+        try:
+            with open(self._request_path(request), "r", encoding="utf-8") as f:
+                key = json.load(f)["key"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable request link {request}: {str(e)}")
+            return None
+        return self.get(key)
+
+    def link_request(self, request: str, key: str):
+        """
+        Point a request key at a stored result
+        """
+        atomic_write(self._request_path(request), json.dumps({"key": key}).encode("utf-8"))
+
+    def put(self, key: str, png_bytes: bytes, metadata: Dict) -> Dict:
+        """
+        Store a generated PNG with its metadata and append it to the index
+        """
+        png_path, meta_path = self._paths(key)
+        record = dict(metadata, key=key, created_at=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                      size_bytes=len(png_bytes))
+
+        # Image first: a metadata file always points at a complete PNG
+        atomic_write(png_path, png_bytes)
+        atomic_write(meta_path, json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8"))
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    def iter_index(self, **filters) -> Iterator[Dict]:
+        """
+        Iterate index records (oldest first), optionally filtered by exact
+        field values, e.g. iter_index(seed=42)
+        """
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if all(record.get(k) == v for k, v in filters.items()):
+                        yield record
+        except FileNotFoundError:
+            return
+
+def get_default_store() -> ResultStore:
+    """
+    Return the process-wide store rooted at RESULT_STORE_DIR
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultStore(RESULT_STORE_DIR)
+        return _default_store
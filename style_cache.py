@@ -0,0 +1,99 @@
+"""
+Gemini style analyses cached by the style image's pixel digest, so a style
+seen once can be reused without Gemini: for degraded-mode prompts and for
+batches that apply one style to many poses.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from atomic_io import atomic_write
+from image_budget import GEMINI_IMAGE_MAX_SIDE, working_copy
+from pose_disk_cache import image_digest
+
+# Initialize logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+STYLE_CACHE_DIR = os.getenv(
+    "STYLE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pose-to-image", "styles")
+)
+# Analyses also kept in memory
+STYLE_CACHE_MEMORY_ENTRIES = 256
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def style_digest(style_image) -> str:
+    """
+    Cache key of a style image: the pixel digest of the working copy sent to
+    Gemini, so full-size and already reduced copies of one upload match
+    """
+    return image_digest(working_copy(style_image, GEMINI_IMAGE_MAX_SIDE))
+
+class StyleAnalysisCache:
+    """
+    Gemini style analyses ("style_reference" objects) keyed by the style
+    image's pixel digest, kept in memory and as JSON files on disk. They let
+    prompts be composed without Gemini: in degraded mode and for batches
+    that share one style.
+
+    Layout:
+        <root>/<digest[:2]>/<digest>.json
+    """
+
+    def __init__(self, root: str = STYLE_CACHE_DIR, memory_entries: int = STYLE_CACHE_MEMORY_ENTRIES):
+        self.root = root
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ".json")
+
+    def _remember(self, digest: str, style_reference: Dict):
+        with self._lock:
+            self._memory[digest] = style_reference
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, digest: str) -> Optional[Dict]:
+        """
+        Return the cached style analysis for an image digest, or None
+        """
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+        try:
+            with open(self._path(digest), encoding="utf-8") as f:
+                style_reference = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable style analysis {digest}: {str(e)}")
+            return None
+        self._remember(digest, style_reference)
+        return style_reference
+
+    def put(self, digest: str, style_reference: Dict):
+        self._remember(digest, style_reference)
+        try:
+            atomic_write(self._path(digest), json.dumps(style_reference, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not store style analysis {digest}: {str(e)}")
+
+def get_default_style_cache() -> StyleAnalysisCache:
+    """
+    Return the process-wide style analysis cache rooted at STYLE_CACHE_DIR
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = StyleAnalysisCache(STYLE_CACHE_DIR)
+        return _default_cache
@@ -0,0 +1,55 @@
+import numpy as np
+
+from advice_cache import PoseAdviceCache, pose_angles
+from benchmarks import fixtures
+from pose_extractor import calculate_joint_angles
+from pose_topology import ANGLE_JOINTS
+
+def _angles(value, **overrides):
+    angles = {joint: value for joint in ANGLE_JOINTS}
+    angles.update(overrides)
+    return angles
+
+def test_pose_angles_accepts_every_landmark_form():
+    landmark_list = fixtures.landmark_list(0)
+    expected = pose_angles(calculate_joint_angles(landmark_list))
+    np.testing.assert_allclose(pose_angles(landmark_list), expected, atol=1e-6)
+    np.testing.assert_allclose(pose_angles(fixtures.landmark_array(0)), expected, atol=1e-6)
+
+def test_key_quantizes_angles_into_tolerance_bins():
+    cache = PoseAdviceCache(tolerance=15)
+    assert cache.key_for(_angles(100.0)) == cache.key_for(_angles(104.0))
+    assert cache.key_for(_angles(100.0)) != cache.key_for(_angles(106.0))
+    assert cache.key_for(_angles(100.0, spine=float("nan")))[ANGLE_JOINTS.index("spine")] == -1
+
+def test_near_hit_across_a_bin_edge_and_miss_beyond_tolerance():
+    cache = PoseAdviceCache(tolerance=15, ttl_seconds=0)
+    cache.put(_angles(104.0), {"advice": "stored"})
+
+    assert cache.get(_angles(104.0)) == {"advice": "stored"}
+    # 106 falls in the next bin but is within 15 degrees
+    assert cache.get(_angles(106.0)) == {"advice": "stored"}
+    assert cache.get(_angles(104.0, right_elbow=130.0)) is None
+
+    report = cache.report()
+    assert (report["hits"], report["near_hits"], report["misses"]) == (2, 1, 1)
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PoseAdviceCache(tolerance=15, max_entries=2, ttl_seconds=0)
+    cache.put(_angles(30.0), {"advice": "a"})
+    cache.put(_angles(90.0), {"advice": "b"})
+    assert cache.get(_angles(30.0)) == {"advice": "a"}
+    cache.put(_angles(150.0), {"advice": "c"})
+
+    assert cache.get(_angles(90.0)) is None
+    assert cache.get(_angles(30.0)) == {"advice": "a"}
+    assert cache.report()["evictions"] == 1
+
+def test_expired_entries_are_misses(monkeypatch):
+    cache = PoseAdviceCache(tolerance=15, ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr("advice_cache.time.time", lambda: now[0])
+    cache.put(_angles(90.0), {"advice": "old"})
+    now[0] += 61
+    assert cache.get(_angles(90.0)) is None
+    assert cache.report()["entries"] == 0
@@ -0,0 +1,91 @@
+import pytest
+
+import circuit_breaker
+import image_generator
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_rate=0.5, window=10, min_calls=4, open_seconds=30, clock=clock)
+
+def _fail(breaker, times=1):
+    for _ in range(times):
+        breaker.record_failure(breaker.acquire())
+
+def test_opens_once_the_failure_rate_is_reached(breaker):
+    for _ in range(2):
+        breaker.record_success(breaker.acquire())
+    _fail(breaker, 1)
+    assert breaker.state == CLOSED  # 3 calls, below min_calls
+    _fail(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert not breaker.available()
+
+def test_probe_success_closes_and_failure_reopens(breaker, clock):
+    _fail(breaker, 4)
+    clock.now = 30
+    assert breaker.available()
+    probe = breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()  # one probe at a time
+    breaker.record_failure(probe)
+    assert breaker.state == OPEN
+
+    clock.now = 60
+    breaker.record_success(breaker.acquire())
+    assert breaker.state == CLOSED
+    assert breaker.report()["window_failure_rate"] == 0.0
+
+def test_calls_admitted_before_opening_cannot_decide_the_probe(breaker, clock):
+    straggler = breaker.acquire()
+    _fail(breaker, 4)
+    clock.now = 30
+    probe = breaker.acquire()
+    breaker.record_success(straggler)
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure(probe)
+    assert breaker.state == OPEN
+
+def test_reset_all_forgets_open_breakers():
+    breaker = circuit_breaker.get_breaker("reset-test")
+    _fail(breaker, circuit_breaker.CIRCUIT_MIN_CALLS)
+    assert breaker.state == OPEN
+    circuit_breaker.reset_all()
+    assert circuit_breaker.get_breaker("reset-test").state == CLOSED
+
+def test_stability_probe_is_released_on_unexpected_errors(monkeypatch, clock):
+    breaker = CircuitBreaker("stability", min_calls=1, open_seconds=30, clock=clock)
+    monkeypatch.setitem(circuit_breaker._breakers, "stability", breaker)
+    _fail(breaker, 1)
+    clock.now = 30
+
+    def broken_post(*args, **kwargs):
+        raise ValueError("not a requests exception")
+
+    monkeypatch.setattr(image_generator.requests, "post", broken_post)
+    with pytest.raises(ValueError):
+        image_generator.post_stability("http://stability.invalid")
+    assert breaker.state == OPEN
+
+    clock.now = 60
+
+    class Response:
+        status_code = 200
+
+    monkeypatch.setattr(image_generator.requests, "post", lambda *args, **kwargs: Response())
+    assert image_generator.post_stability("http://stability.invalid").status_code == 200
+    assert breaker.state == CLOSED
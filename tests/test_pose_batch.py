@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from benchmarks import fixtures
+from pose_batch import batch_joint_angles, stack_landmarks
+from pose_descriptions import describe_angles, describe_batch
+from pose_extractor import calculate_angle, calculate_joint_angles, get_pose_description
+from pose_topology import ANGLE_JOINTS, BODY
+
+@pytest.fixture
+def landmarks():
+    return fixtures.landmark_batch(50, jitter=0.05)
+
+def test_batch_angles_match_the_scalar_formula(landmarks):
+    angles = batch_joint_angles(landmarks)
+    assert angles.shape == (len(landmarks), len(ANGLE_JOINTS))
+    points = landmarks[..., :3].astype(np.float64)
+    for frame, row in zip(points, angles):
+        expected = [calculate_angle(frame[a], frame[b], frame[c]) for a, b, c in BODY.angle_triplets]
+        np.testing.assert_allclose(row, expected, atol=1e-9)
+
+def test_batch_angles_match_calculate_joint_angles():
+    landmark_list = fixtures.landmark_list(3)
+    angles = calculate_joint_angles(landmark_list)
+    batch = batch_joint_angles(stack_landmarks([landmark_list]))[0]
+    np.testing.assert_allclose([angles[joint] for joint in ANGLE_JOINTS], batch, atol=1e-9)
+
+def test_frames_without_a_pose_give_nan_rows():
+    stacked = stack_landmarks([None, fixtures.landmark_list(0)])
+    angles = batch_joint_angles(stacked)
+    assert np.isnan(angles[0]).all()
+    assert not np.isnan(angles[1]).any()
+
+def test_describe_batch_matches_describe_angles(landmarks):
+    angles = batch_joint_angles(landmarks)
+    # Exercise every bend category, including values right at the thresholds
+    angles[0, :] = 150.0
+    angles[1, :] = 90.0
+    angles[2, :] = 10.0
+    for lang in ("en", "ja"):
+        for row, batched in zip(angles, describe_batch(angles, lang)):
+            single = describe_angles(row, lang)
+            assert batched.records == single.records
+            assert batched.render() == single.render()
+            assert batched.compact() == single.compact()
+
+def test_get_pose_description_keeps_the_dict_interface():
+    angles = calculate_joint_angles(fixtures.landmark_list(0))
+    descriptions = get_pose_description(angles)
+    assert set(descriptions) == {f"{joint}_desc" for joint in ANGLE_JOINTS}
+    assert all(isinstance(text, str) and text for text in descriptions.values())
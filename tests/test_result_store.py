@@ -0,0 +1,55 @@
+import io
+
+from PIL import Image
+
+from result_store import ResultStore, generation_key, request_key, request_seed
+
+CONTROL = b"\x89PNG control image bytes"
+
+def _png(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+def test_generation_key_is_stable_and_covers_every_parameter():
+    params = dict(prompt="a dancer", negative_prompt="blurry", cfg_scale=7, steps=30,
+                  control_strength=0.8, seed=42)
+    key = generation_key(CONTROL, **params)
+    assert key == generation_key(CONTROL, **params)
+    assert len(key) == 64
+
+    for name, value in [("prompt", "a runner"), ("negative_prompt", ""), ("cfg_scale", 8),
+                        ("steps", 31), ("control_strength", 0.7), ("seed", 43)]:
+        assert generation_key(CONTROL, **dict(params, **{name: value})) != key, name
+    assert generation_key(CONTROL + b"!", **params) != key
+
+def test_request_key_depends_on_inputs_not_prompts():
+    key = request_key(CONTROL, "ab" * 32, 0.8, 7)
+    assert key == request_key(CONTROL, "ab" * 32, 0.8, 7)
+    assert key != request_key(CONTROL, "cd" * 32, 0.8, 7)
+    assert key != request_key(CONTROL, "ab" * 32, 0.7, 7)
+    assert key != request_key(CONTROL, "ab" * 32, 0.8, 8)
+    assert key != request_key(CONTROL + b"!", "ab" * 32, 0.8, 7)
+
+def test_request_seed_is_deterministic_and_never_random():
+    seeds = [request_seed(f"{i:064x}", "style") for i in range(2000)]
+    assert seeds[0] == request_seed(f"{0:064x}", "style")
+    assert all(1 <= seed <= 2 ** 32 - 1 for seed in seeds)
+    assert len(set(seeds)) > 1990
+
+def test_store_round_trip_and_request_link(tmp_path):
+    store = ResultStore(str(tmp_path))
+    key = generation_key(CONTROL, "p", "n", 7, 30, 0.8, 42)
+    assert store.get(key) is None
+
+    store.put(key, _png((255, 0, 0)), {"seed": 42, "finish_reason": "SUCCESS"})
+    image, metadata = store.get(key)
+    assert image.getpixel((0, 0)) == (255, 0, 0)
+    assert metadata["seed"] == 42
+
+    request = request_key(CONTROL, "ab" * 32, 0.8, 42)
+    assert store.get_request(request) is None
+    store.link_request(request, key)
+    image, metadata = store.get_request(request)
+    assert metadata["seed"] == 42
+    assert [record["seed"] for record in store.iter_index()] == [42]